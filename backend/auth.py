@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Dict, Optional, Tuple
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import User
+from password_pool import pwd_context, hash_password, check_password
 import os
 from dotenv import load_dotenv
 
@@ -15,67 +18,222 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production-09876543210")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-
-# 🔐 bcrypt 72 belgidan uzun parolni qo‘llamaydi
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# stateless: id/role tokendan olinadi (DB so'rovisiz), db: har safar users jadvalidan
+AUTH_MODE = os.getenv("AUTH_MODE", "stateless")
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
 
 # ⚠️ FastAPI OAuth2PasswordBearer tokenUrl **login endpoint**ga mos bo‘lishi kerak
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# Token ixtiyoriy bo'lgan endpointlar uchun (anonim o'yinchilar)
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Parolni tekshirish"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Parolni xeshlash (agar juda uzun bo‘lsa kesib tashlaymiz)"""
-    if len(password) > 72:  # ✅ bcrypt cheklov
-        password = password[:72]
-    return pwd_context.hash(password)
+    return hash_password(password)
+
 
+def preload_crypto():
+    """jose va bcrypt backendni oldindan yuklash - lifespan fonda chaqiradi"""
+    from jose import jwt  # noqa: F401
+    pwd_context().handler("bcrypt").get_backend()
 
-def create_access_token(user_id: int, expires_delta: Optional[timedelta] = None) -> str:
+
+def create_access_token(
+    user_id: int,
+    expires_delta: Optional[timedelta] = None,
+    role: Optional[str] = None
+) -> str:
     """JWT token yaratish"""
     to_encode = {"sub": str(user_id)}  # foydalanuvchi ID ni sub ga yozamiz
+    # Avtorizatsiya uchun kerakli claim - har so'rovda DB ga bormaslik uchun.
+    # Profil maydonlari (nickname, name) tokenga yozilmaydi: yangilangach eskirib qoladi
+    if role is not None:
+        to_encode["role"] = role
 
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
 
+    # python-jose (cryptography backend bilan) birinchi tokenda yuklanadi
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """JWT token orqali foydalanuvchini olish"""
-    credentials_exception = HTTPException(
+class TokenUser:
+    """Token claimlaridan olingan foydalanuvchi (ORM obyekt emas); profil - get_cached_user dan"""
+
+    __slots__ = ("id", "role")
+
+    def __init__(self, id: int, role: str):
+        self.id = id
+        self.role = role
+
+
+# ---------- qisqa TTL'li user kesh ----------
+
+_user_cache: Dict[int, Tuple[float, dict]] = {}
+_user_cache_lock = threading.Lock()
+
+
+def _user_to_dict(user: User) -> dict:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "nickname": user.nickname,
+        "name": user.name,
+        "role": user.role,
+        "profile_picture": user.profile_picture,
+        "created_at": user.created_at,
+    }
+
+
+def get_cached_user(db: Session, user_id: int) -> Optional[dict]:
+    """Foydalanuvchi ma'lumotlari (UserResponse maydonlari) - keshdan yoki DB dan"""
+    now = time.monotonic()
+    entry = _user_cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return None
+    data = _user_to_dict(user)
+    with _user_cache_lock:
+        _user_cache[user_id] = (now + USER_CACHE_TTL, data)
+    return data
+
+
+async def aget_cached_user(db: AsyncSession, user_id: int) -> Optional[dict]:
+    now = time.monotonic()
+    entry = _user_cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if user is None:
+        return None
+    data = _user_to_dict(user)
+    with _user_cache_lock:
+        _user_cache[user_id] = (now + USER_CACHE_TTL, data)
+    return data
+
+
+def invalidate_user(user_id: int):
+    """Profil o'zgarganda keshni tozalash"""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str) -> dict:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """JWT token orqali foydalanuvchini olish"""
+    payload = _decode_token(token)
+
+    user = db.query(User).filter(User.id == int(payload["sub"])).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
-def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+def get_token_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> TokenUser:
+    """Tez yo'l: claimlar tokenda bo'lsa DB ga umuman murojaat qilinmaydi"""
+    payload = _decode_token(token)
+    user_id = int(payload["sub"])
+
+    if AUTH_MODE == "stateless" and "role" in payload:
+        return TokenUser(user_id, payload["role"])
+
+    # Eski tokenlar yoki db rejimi - keshlangan foydalanuvchi
+    user = get_cached_user(db, user_id)
+    if user is None:
+        raise _credentials_exception()
+    return TokenUser(user["id"], user["role"])
+
+
+async def aget_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    payload = _decode_token(token)
+
+    result = await db.execute(select(User).where(User.id == int(payload["sub"])))
+    user = result.scalars().first()
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+async def aget_token_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> TokenUser:
+    payload = _decode_token(token)
+    user_id = int(payload["sub"])
+
+    if AUTH_MODE == "stateless" and "role" in payload:
+        return TokenUser(user_id, payload["role"])
+
+    user = await aget_cached_user(db, user_id)
+    if user is None:
+        raise _credentials_exception()
+    return TokenUser(user["id"], user["role"])
+
+
+def get_current_admin(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """Faqat adminlar uchun"""
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_optional_user(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db)
+) -> Optional[TokenUser]:
+    """Token bo'lsa foydalanuvchini qaytaradi, bo'lmasa None"""
+    if token is None:
+        return None
+    return get_token_user(token, db)
+
+
+async def aget_optional_user(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[TokenUser]:
+    if token is None:
+        return None
+    return await aget_token_user(token, db)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+user_stats jadvalini quiz_history'dan qayta qurish
+
+quiz_history (user_id, id) tartibida keyset bo'yicha BATCH qatordan o'qiladi,
+shuning uchun xotira tarix hajmiga bog'liq emas. Har bir batch tugagach
+to'liq hisoblangan foydalanuvchilar bitta upsert bilan yoziladi.
+Server ishlayotganda ham ishga tushirish mumkin, lekin backfill paytida
+yozilgan tarix qayta hisoblanishi uchun uni yana bir marta ishga tushiring.
+
+Usage:
+    python backfill_stats.py [batch_size]
+"""
+
+import sys
+import time
+
+from sqlalchemy import and_, delete, or_, select
+
+from database import Base, SessionLocal, engine
+from models import QuizHistory, UserStats
+from stats import collect, write_stats
+
+HISTORY_COLUMNS = (
+    QuizHistory.id, QuizHistory.user_id, QuizHistory.score, QuizHistory.rank,
+    QuizHistory.total_questions, QuizHistory.correct_answers, QuizHistory.played_at,
+)
+
+
+def iter_batches(batch_size: int):
+    last_user, last_id = None, None
+    while True:
+        stmt = select(*HISTORY_COLUMNS).where(QuizHistory.user_id.is_not(None))
+        if last_user is not None:
+            stmt = stmt.where(or_(
+                QuizHistory.user_id > last_user,
+                and_(QuizHistory.user_id == last_user, QuizHistory.id > last_id),
+            ))
+        stmt = stmt.order_by(QuizHistory.user_id, QuizHistory.id).limit(batch_size)
+
+        with engine.connect() as conn:
+            rows = [row._mapping for row in conn.execute(stmt)]
+        if not rows:
+            return
+        yield rows
+        last_user, last_id = rows[-1]["user_id"], rows[-1]["id"]
+
+
+def backfill(batch_size: int = 5000) -> int:
+    Base.metadata.create_all(bind=engine, tables=[UserStats.__table__])
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(UserStats))
+        db.commit()
+
+        users = 0
+        stats = {}
+        for rows in iter_batches(batch_size):
+            collect(rows, stats)
+            # Oxirgi foydalanuvchi keyingi batch'da davom etishi mumkin
+            last_user = rows[-1]["user_id"]
+            done = [stats.pop(user_id) for user_id in list(stats) if user_id != last_user]
+            if done:
+                write_stats(db, done, replace=True)
+                db.commit()
+                users += len(done)
+            print(f"   ... {users} foydalanuvchi")
+
+        if stats:
+            write_stats(db, list(stats.values()), replace=True)
+            db.commit()
+            users += len(stats)
+        return users
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print("=" * 60)
+    print("  user_stats backfill (quiz_history → user_stats)")
+    print("=" * 60)
+    started = time.perf_counter()
+    try:
+        count = backfill(batch_size)
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    print(f"✅ {count} foydalanuvchi statistikasi qayta qurildi ({time.perf_counter() - started:.1f} s)")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+O'yin kodlarini ajratish benchmarki (SQLite)
+
+Eski generate-and-query sikli GameCodeAllocator bilan taqqoslanadi,
+ikkita allocator kodlari takrorlanmasligi tekshiriladi.
+
+Usage:
+    python benchmarks/bench_game_codes.py [existing_quizzes] [allocations]
+"""
+
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_file = os.path.join(tempfile.mkdtemp(prefix="quiz-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+from sqlalchemy import text  # noqa: E402
+
+import database  # noqa: E402
+
+database.engine.echo = False
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from game_codes import GameCodeAllocator  # noqa: E402
+from models import Quiz  # noqa: E402
+
+SEED_BATCH = 50_000
+
+
+def random_code(rng):
+    return "".join(rng.choices(string.ascii_uppercase + string.digits, k=6))
+
+
+def seed(existing: int):
+    rng = random.Random(42)
+    codes = set()
+    while len(codes) < existing:
+        codes.add(random_code(rng))
+    codes = list(codes)
+
+    with engine.begin() as conn:
+        for i in range(0, existing, SEED_BATCH):
+            conn.execute(
+                Quiz.__table__.insert(),
+                [{"title": "q", "game_code": code, "questions": [], "is_active": False}
+                 for code in codes[i:i + SEED_BATCH]],
+            )
+
+
+def bench_query_loop(allocations: int):
+    rng = random.Random(7)
+    db = SessionLocal()
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(allocations):
+        code = random_code(rng)
+        queries += 1
+        while db.query(Quiz).filter(Quiz.game_code == code).first():
+            code = random_code(rng)
+            queries += 1
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed, queries
+
+
+def bench_allocator(allocations: int):
+    allocator = GameCodeAllocator()
+    start = time.perf_counter()
+    codes = [allocator.allocate() for _ in range(allocations)]
+    elapsed = time.perf_counter() - start
+
+    # Eski kodlar bilan to'qnashuvlar (insert paytida IntegrityError bo'lardi)
+    with engine.connect() as conn:
+        existing = {
+            row[0] for row in conn.execute(
+                text("SELECT game_code FROM quizzes WHERE game_code IN (SELECT value FROM json_each(:codes))"),
+                {"codes": "[" + ",".join(f'"{c}"' for c in codes) + "]"},
+            )
+        }
+    return elapsed, len(existing)
+
+
+def check_two_allocators(allocations: int):
+    first, second = GameCodeAllocator(block_size=100), GameCodeAllocator(block_size=100)
+    codes = []
+    for _ in range(allocations):
+        codes.append(first.allocate())
+        codes.append(second.allocate())
+    return len(codes), len(set(codes))
+
+
+def main():
+    existing = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    allocations = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    seed(existing)
+    seed_time = time.perf_counter() - start
+
+    loop_time, loop_queries = bench_query_loop(allocations)
+    alloc_time, collisions = bench_allocator(allocations)
+    total, unique = check_two_allocators(allocations)
+
+    print("=" * 60)
+    print(f"  Game code benchmark: {existing} existing quizzes, {allocations} new codes")
+    print("=" * 60)
+    print(f"seed                : {seed_time:8.1f} s")
+    print(f"query-in-a-loop     : {loop_time / allocations * 1e6:8.1f} us/code "
+          f"({loop_queries / allocations:.4f} queries/code)")
+    print(f"allocator           : {alloc_time / allocations * 1e6:8.1f} us/code "
+          f"(block refills included)")
+    print(f"  legacy collisions : {collisions} / {allocations} (retried on insert)")
+    print(f"two allocators      : {total} codes, {unique} unique")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Leaderboard microbenchmarki: Fenwick daraxti va har javobdan keyin qayta saralash
+
+Usage:
+    python benchmarks/bench_leaderboard.py [players] [questions]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard  # noqa: E402
+
+BASE_POINTS = 500
+MAX_TIME_BONUS = 500
+NAIVE_SAMPLE = 2000
+
+
+def generate_answers(players: int, questions: int):
+    rng = random.Random(42)
+    answers = []
+    for _ in range(questions):
+        for p in range(players):
+            points = BASE_POINTS + rng.randrange(MAX_TIME_BONUS) if rng.random() < 0.6 else 0
+            answers.append((f"player{p}", points))
+    return answers
+
+
+def bench_leaderboard(answers, players, questions):
+    board = Leaderboard(questions * (BASE_POINTS + MAX_TIME_BONUS))
+    totals = {}
+    start = time.perf_counter()
+    for player, points in answers:
+        total = totals.get(player, 0) + points
+        totals[player] = total
+        board.update(player, total)
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        board.top(10)
+    top_time = (time.perf_counter() - start) / 1000
+
+    sample = random.Random(7).sample(list(totals), 1000)
+    start = time.perf_counter()
+    for player in sample:
+        board.rank(player)
+    rank_time = (time.perf_counter() - start) / len(sample)
+
+    return update_time, top_time, rank_time
+
+
+def bench_naive(answers):
+    totals = {}
+    start = time.perf_counter()
+    for player, points in answers[:NAIVE_SAMPLE]:
+        totals[player] = totals.get(player, 0) + points
+        sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    per_answer = (time.perf_counter() - start) / NAIVE_SAMPLE
+    return per_answer
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    questions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    answers = generate_answers(players, questions)
+    # Naive variant uchun to'liq o'yinchilar soni bilan boshlaymiz
+    warm = [(f"player{p}", 0) for p in range(players)]
+
+    update_time, top_time, rank_time = bench_leaderboard(answers, players, questions)
+    naive_per_answer = bench_naive(warm + answers)
+
+    n = len(answers)
+    print("=" * 60)
+    print(f"  Leaderboard benchmark: {players} players x {questions} questions ({n} updates)")
+    print("=" * 60)
+    print(f"Fenwick leaderboard : {update_time:8.3f} s total, {update_time / n * 1e6:8.2f} us/update")
+    print(f"  top(10)           : {top_time * 1e6:8.2f} us")
+    print(f"  rank(player)      : {rank_time * 1e6:8.2f} us")
+    print(f"Re-sort per answer  : {naive_per_answer * n:8.1f} s total (extrapolated), "
+          f"{naive_per_answer * 1e6:8.0f} us/update")
+    print(f"Speedup             : {naive_per_answer * n / update_time:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+To'liq o'yin sikli yuklama testi (in-process, SQLite)
+
+Endpoint bo'yicha p50/p95/p99. --save natijani saqlaydi, --baseline bilan p95 --threshold dan oshsa exit code 1.
+
+Usage:
+    python benchmarks/bench_lifecycle.py [--games 20] [--players 50] [--questions 10]
+        [--polls 3] [--concurrency 5] [--save out.json] [--baseline base.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+if "DATABASE_URL" not in os.environ:
+    _db_file = os.path.join(tempfile.mkdtemp(prefix="quiz-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+
+database.engine.echo = False
+
+import main  # noqa: E402
+
+# ASGITransport lifespan ishga tushirmaydi; jadvallar create_tables.py dagidek yaratiladi
+database.Base.metadata.create_all(bind=database.engine)
+from password_pool import password_pool  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Recorder:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, label: str, method: str, url: str, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code not in expect:
+            self.errors[label] += 1
+        return response
+
+
+def make_quiz(rng: random.Random, questions: int) -> dict:
+    return {
+        "title": "Benchmark quiz",
+        "questions": [
+            {
+                "id": str(i),
+                "question": f"Question {i}?",
+                "options": ["A", "B", "C", "D"],
+                "correctAnswer": rng.randrange(4),
+            }
+            for i in range(questions)
+        ],
+    }
+
+
+async def play_game(rec: Recorder, game: int, args):
+    rng = random.Random(args.seed + game)
+    user = {
+        "email": f"host{game}@bench.quiz",
+        "nickname": f"host{game}",
+        "name": f"Host {game}",
+        "password": "secret",
+    }
+    r = await rec.call("POST /api/auth/register", "POST", "/api/auth/register", json=user)
+    r = await rec.call("POST /api/auth/login", "POST", "/api/auth/login",
+                       json={"email": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = await rec.call("POST /api/quiz/create", "POST", "/api/quiz/create",
+                       json=make_quiz(rng, args.questions), headers=headers)
+    code = r.json()["game_code"]
+
+    await rec.call("POST /api/game/start/{code}", "POST", f"/api/game/start/{code}", headers=headers)
+
+    players = [f"p{game}-{i}" for i in range(args.players)]
+    joined = await asyncio.gather(*(
+        rec.call("POST /api/game/join", "POST", "/api/game/join",
+                 json={"game_code": code, "player_name": name})
+        for name in players
+    ))
+    tokens = [r.json()["player_token"] for r in joined]
+
+    for _ in range(args.polls):
+        await asyncio.gather(*(
+            rec.call("GET /api/game/{code}/session", "GET", f"/api/game/{code}/session")
+            for _ in players
+        ))
+
+    for index in range(args.questions):
+        await rec.call("POST /api/game/{code}/next", "POST", f"/api/game/{code}/next", headers=headers)
+        await asyncio.gather(*(
+            rec.call("POST /api/game/{code}/answer", "POST", f"/api/game/{code}/answer",
+                     json={"player_token": token, "question_index": index, "answer": rng.randrange(4)})
+            for token in tokens
+        ))
+        await rec.call("GET /api/game/{code}/leaderboard", "GET", f"/api/game/{code}/leaderboard",
+                       params={"limit": 10})
+
+    await rec.call("PATCH /api/game/end/{code}", "PATCH", f"/api/game/end/{code}", headers=headers)
+
+    r = await rec.call("GET /api/quiz/{code}", "GET", f"/api/quiz/{code}", headers=headers)
+    await rec.call("POST /api/history/add", "POST", "/api/history/add", headers=headers, json={
+        "quiz_id": r.json()["id"],
+        "quiz_title": "Benchmark quiz",
+        "score": rng.randrange(10_000),
+        "total_questions": args.questions,
+        "rank": 1,
+        "participants_count": args.players,
+    })
+    await rec.call("GET /api/history/me", "GET", "/api/history/me", headers=headers)
+
+
+async def run(args) -> dict:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        rec = Recorder(client)
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(game):
+            async with limit:
+                await play_game(rec, game, args)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(game) for game in range(args.games)))
+        wall = time.perf_counter() - started
+
+    return {
+        "config": {
+            "games": args.games, "players": args.players, "questions": args.questions,
+            "polls": args.polls, "concurrency": args.concurrency, "seed": args.seed,
+            "db_backend": os.getenv("DB_BACKEND", "sync"),
+        },
+        "wall": wall,
+        "endpoints": {
+            label: {
+                "count": len(values),
+                "errors": rec.errors[label],
+                "rps": len(values) / wall,
+                "p50": percentile(values, 50) * 1000,
+                "p95": percentile(values, 95) * 1000,
+                "p99": percentile(values, 99) * 1000,
+            }
+            for label, values in rec.latencies.items()
+        },
+    }
+
+
+def report(result: dict, baseline: dict = None, threshold: float = 0.2, min_count: int = 20) -> int:
+    config = result["config"]
+    total = sum(e["count"] for e in result["endpoints"].values())
+    print("=" * 96)
+    print(f"  Lifecycle benchmark: {config['games']} games x {config['players']} players x "
+          f"{config['questions']} questions ({config['db_backend']})")
+    print(f"  {total} requests in {result['wall']:.2f} s ({total / result['wall']:.0f} req/s)")
+    print("=" * 96)
+    print(f"{'endpoint':<36} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  vs base")
+
+    regressions = 0
+    for label, e in result["endpoints"].items():
+        change = ""
+        base = (baseline or {}).get("endpoints", {}).get(label)
+        # Kam so'rovli endpointlarda p95 shovqin - faqat ko'rsatiladi
+        if base and base["p95"] > 0:
+            ratio = e["p95"] / base["p95"] - 1
+            change = f"{ratio:+.0%}"
+            if ratio > threshold and e["count"] >= min_count:
+                change += "  REGRESSION"
+                regressions += 1
+        print(f"{label:<36} {e['count']:>7} {e['errors']:>5} {e['rps']:>8.0f} "
+              f"{e['p50']:>8.1f} {e['p95']:>8.1f} {e['p99']:>8.1f}  {change}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Game lifecycle load test")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--polls", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=5, help="games played at the same time")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare p95 against a saved JSON run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 growth (0.2 = 20%%)")
+    parser.add_argument("--min-count", type=int, default=20, help="ignore regressions below this many requests")
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        password_pool.shutdown()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = report(result, baseline, args.threshold, args.min_count)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    errors = sum(e["errors"] for e in result["endpoints"].values())
+    sys.exit(1 if regressions or errors else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
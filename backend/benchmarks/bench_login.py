@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Login burst benchmarki: N ta parallel POST /api/auth/login (in-process, SQLite)
+
+Usage:
+    BCRYPT_ROUNDS=10 PASSWORD_WORKERS=4 python benchmarks/bench_login.py [concurrency]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_file = os.path.join(tempfile.mkdtemp(prefix="quiz-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+
+database.engine.echo = False
+
+import main  # noqa: E402
+
+# ASGITransport lifespan ishga tushirmaydi; jadvallar create_tables.py dagidek yaratiladi
+database.Base.metadata.create_all(bind=database.engine)
+from password_pool import password_pool  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(concurrency: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        user = {"email": "bench@quiz.com", "nickname": "bench", "name": "Bench", "password": "secret"}
+        r = await client.post("/api/auth/register", json=user)
+        r.raise_for_status()
+
+        async def login():
+            started = time.perf_counter()
+            resp = await client.post(
+                "/api/auth/login",
+                json={"email": user["email"], "password": user["password"]},
+            )
+            return resp.status_code, time.perf_counter() - started
+
+        async def health():
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            await client.get("/health")
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        results, health_latency = await asyncio.gather(
+            asyncio.gather(*(login() for _ in range(concurrency))),
+            health(),
+        )
+        wall = time.perf_counter() - started
+
+    ok = [latency for code, latency in results if code == 200]
+    shed = sum(1 for code, _ in results if code == 503)
+    other = len(results) - len(ok) - shed
+
+    print("=" * 60)
+    print(f"  Login burst: {concurrency} concurrent logins")
+    print(f"  bcrypt rounds={os.getenv('BCRYPT_ROUNDS', '12')} workers={password_pool.workers} "
+          f"queue limit={password_pool.queue_limit}")
+    print("=" * 60)
+    print(f"200 OK      : {len(ok)}")
+    print(f"503 shed    : {shed}")
+    print(f"other       : {other}")
+    print(f"wall time   : {wall:.2f} s ({len(ok) / wall:.1f} logins/s)")
+    print(f"p50 / p95 / p99 : {percentile(ok, 50) * 1000:.0f} / {percentile(ok, 95) * 1000:.0f} / "
+          f"{percentile(ok, 99) * 1000:.0f} ms")
+    print(f"/health during burst: {health_latency * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    try:
+        asyncio.run(run(concurrency))
+    finally:
+        password_pool.shutdown()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+NDJSON import/export benchmarki (in-process, SQLite)
+
+Ikkala yo'nalish tezligi va export paytida heap o'sishi (tracemalloc) o'lchanadi.
+
+Usage:
+    python benchmarks/bench_quiz_io.py [quizzes] [batch_size]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_file = os.path.join(tempfile.mkdtemp(prefix="quiz-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+
+database.engine.echo = False
+
+import main  # noqa: E402
+
+# ASGITransport lifespan ishga tushirmaydi; jadvallar create_tables.py dagidek yaratiladi
+database.Base.metadata.create_all(bind=database.engine)
+from password_pool import password_pool  # noqa: E402
+
+QUIZ_LINE = json.dumps({
+    "title": "Bench quiz",
+    "questions": [
+        {"id": str(i), "question": f"Question {i}?", "options": ["a", "b", "c", "d"], "correctAnswer": i % 4}
+        for i in range(10)
+    ],
+}).encode() + b"\n"
+CHUNK_LINES = 200
+
+
+async def body(quizzes: int):
+    sent = 0
+    while sent < quizzes:
+        lines = min(CHUNK_LINES, quizzes - sent)
+        yield QUIZ_LINE * lines
+        sent += lines
+
+
+async def run(quizzes: int, batch_size: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        user = {"email": "bench@quiz.com", "nickname": "bench", "name": "Bench", "password": "secret"}
+        r = await client.post("/api/auth/register", json=user)
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        started = time.perf_counter()
+        r = await client.post(
+            "/api/quiz/import", params={"batch_size": batch_size}, content=body(quizzes), headers=headers
+        )
+        r.raise_for_status()
+        import_time = time.perf_counter() - started
+        report = r.json()
+
+    # httpx ASGITransport javobni to'liq buferlaydi, shuning uchun eksport
+    # to'g'ridan-to'g'ri ASGI orqali o'qiladi va har bir bo'lak tashlab yuboriladi
+    exported = 0
+    size = 0
+
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # StreamingResponse disconnect'ni kutadi - javob tugaguncha bloklanadi
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal exported, size
+        if message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            exported += chunk.count(b"\n")
+            size += len(chunk)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/quiz/export", "raw_path": b"/api/quiz/export",
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"host", b"bench"), (b"authorization", headers["Authorization"].encode())],
+    }
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    await main.app(scope, receive, send)
+    export_time = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    print("=" * 60)
+    print(f"  Quiz NDJSON benchmark: {quizzes} quizzes, batch {batch_size}")
+    print("=" * 60)
+    print(f"import : {report['imported']} imported, {report['failed']} failed in {import_time:.1f} s "
+          f"({report['imported'] / import_time:.0f} quizzes/s)")
+    print(f"export : {exported} lines, {size / 1e6:.1f} MB in {export_time:.1f} s "
+          f"({exported / export_time:.0f} quizzes/s)")
+    print(f"export peak heap growth: {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    quizzes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    try:
+        asyncio.run(run(quizzes, batch_size))
+    finally:
+        password_pool.shutdown()
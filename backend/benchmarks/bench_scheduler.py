@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Savol taymeri benchmarki: bitta processda ko'p o'yin
+
+Umumiy round_scheduler (heap) o'yin boshiga asyncio task (tasks) bilan taqqoslanadi:
+deadline kechikishi, event loop lag, CPU va wall vaqt.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--games 10000] [--questions 3]
+        [--limit 2] [--break 1] [--ramp 2] [--mode both|heap|tasks]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Round scheduler benchmark")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--limit", type=float, default=2.0, help="QUESTION_TIME_LIMIT")
+    parser.add_argument("--break", dest="round_break", type=float, default=1.0, help="ROUND_BREAK")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which games start")
+    parser.add_argument("--mode", choices=("both", "heap", "tasks"), default="both")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Modullar import qilinishidan oldin
+if "DATABASE_URL" not in os.environ:
+    _db_file = os.path.join(tempfile.mkdtemp(prefix="quiz-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ["QUESTION_TIME_LIMIT"] = str(args.limit)
+os.environ["ROUND_BREAK"] = str(args.round_break)
+os.environ.setdefault("EVENT_LOG_ENABLED", "false")
+
+from sqlalchemy import insert  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+import database  # noqa: E402
+
+database.engine.echo = False
+
+import game_service  # noqa: E402
+from auth import TokenUser  # noqa: E402
+from models import Base, GameSession, Quiz, User  # noqa: E402
+from round_scheduler import CLOSE, round_scheduler  # noqa: E402
+from session_store import session_registry  # noqa: E402
+
+Base.metadata.create_all(bind=database.engine)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class TaskPerGame:
+    """Taqqoslash uchun: har bir o'yinga alohida asyncio task"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.loop = None
+        self.tasks = {}
+        self.seq = 0
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+
+    async def _fire(self, entry):
+        await asyncio.sleep(max(entry[0] - time.monotonic(), 0.0))
+        if self.tasks.get(entry[2]) is asyncio.current_task():
+            del self.tasks[entry[2]]
+        await run_in_threadpool(self.handler, [entry])
+
+    def _spawn(self, entry):
+        previous = self.tasks.get(entry[2])
+        if previous is not None:
+            previous.cancel()
+        self.tasks[entry[2]] = self.loop.create_task(self._fire(entry))
+
+    def schedule(self, game_code, delay, kind, index, questions):
+        self.seq += 1
+        entry = (time.monotonic() + max(delay, 0.0), self.seq, game_code, kind, index, questions)
+        self.loop.call_soon_threadsafe(self._spawn, entry)
+
+    def cancel(self, game_code):
+        task = self.tasks.pop(game_code, None)
+        if task is not None:
+            self.loop.call_soon_threadsafe(task.cancel)
+
+    async def stop(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+
+class Probe:
+    """Handler o'rami: har bir deadline qachon to'liq bajarilganini yozadi"""
+
+    def __init__(self, handler, games, questions):
+        self.handler = handler
+        self.expected = games * (2 * questions - 1)  # har savol close + (oxirgisidan tashqari) advance
+        self.lateness = []
+        self.done = asyncio.Event()
+        self.loop = None
+
+    def __call__(self, due):
+        self.handler(due)
+        finished = time.monotonic()
+        self.lateness.extend(finished - entry[0] for entry in due)
+        if len(self.lateness) >= self.expected:
+            self.loop.call_soon_threadsafe(self.done.set)
+
+
+def seed(prefix: str, games: int, questions: int):
+    db = database.SessionLocal()
+    try:
+        host = User(email=f"{prefix}@bench.quiz", nickname=prefix, name="Bench", hashed_password="-", role="admin")
+        db.add(host)
+        db.flush()
+        payload = [{"id": str(i), "question": f"q{i}", "options": ["a", "b", "c", "d"], "correctAnswer": 0}
+                   for i in range(questions)]
+        codes = [f"{prefix}{n:06d}" for n in range(games)]
+        db.execute(insert(Quiz), [
+            {"title": code, "game_code": code, "questions": payload, "creator_id": host.id, "is_active": True}
+            for code in codes
+        ])
+        quiz_ids = dict(db.query(Quiz.game_code, Quiz.id).filter(Quiz.creator_id == host.id).all())
+        db.execute(insert(GameSession), [
+            {"game_code": code, "quiz_id": quiz_ids[code], "host_id": host.id, "is_active": True,
+             "players": [f"p{i}" for i in range(5)], "status": "waiting"}
+            for code in codes
+        ])
+        db.commit()
+        for row in db.query(GameSession).filter(GameSession.host_id == host.id):
+            session_registry.activate(row)
+        return codes
+    finally:
+        db.close()
+
+
+def start_batch(codes):
+    db = database.SessionLocal()
+    host = TokenUser(0, "admin")
+    try:
+        for code in codes:
+            game_service.next_question(db, code, host)
+    finally:
+        db.close()
+
+
+async def lag_ticker(samples, interval=0.01):
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        samples.append(time.monotonic() - expected)
+
+
+async def run_mode(mode: str) -> dict:
+    codes = await run_in_threadpool(seed, mode, args.games, args.questions)
+    probe = Probe(game_service._on_deadlines, args.games, args.questions)
+    probe.loop = asyncio.get_running_loop()
+    if mode == "heap":
+        scheduler = round_scheduler
+        scheduler.set_handler(probe)
+    else:
+        scheduler = TaskPerGame(probe)
+    game_service.round_scheduler = scheduler
+
+    lag = []
+    ticker = asyncio.create_task(lag_ticker(lag))
+    scheduler.start()
+    cpu, wall = time.process_time(), time.perf_counter()
+
+    # O'yinlar ramp davomida 100 talik guruhlarda boshlanadi
+    step = 100
+    groups = max(1, (len(codes) + step - 1) // step)
+    for n in range(groups):
+        await run_in_threadpool(start_batch, codes[n * step:(n + 1) * step])
+        await asyncio.sleep(max(0.0, wall + args.ramp * (n + 1) / groups - time.perf_counter()))
+
+    game_seconds = args.questions * args.limit + (args.questions - 1) * args.round_break
+    try:
+        await asyncio.wait_for(probe.done.wait(), args.ramp + game_seconds + 60)
+    except asyncio.TimeoutError:
+        print(f"⚠️  {mode}: only {len(probe.lateness)}/{probe.expected} deadlines handled")
+    result = {
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu,
+        "handled": len(probe.lateness),
+        "expected": probe.expected,
+        "lateness": probe.lateness,
+        "lag": lag,
+    }
+    ticker.cancel()
+    await scheduler.stop()
+    game_service.round_scheduler = round_scheduler
+    return result
+
+
+def ms(value: float) -> str:
+    return f"{value * 1000:>9.1f}"
+
+
+async def main_async():
+    modes = ("heap", "tasks") if args.mode == "both" else (args.mode,)
+    results = {mode: await run_mode(mode) for mode in modes}
+
+    print("=" * 78)
+    print(f"  Round scheduler: {args.games} games x {args.questions} questions, "
+          f"limit {args.limit}s, break {args.round_break}s, ramp {args.ramp}s")
+    print("=" * 78)
+    print(f"{'mode':<7} {'handled':>13} {'late p50':>9} {'late p99':>9} {'late max':>9} "
+          f"{'lag p99':>9} {'lag max':>9} {'cpu s':>7} {'wall s':>7}")
+    for mode, r in results.items():
+        print(f"{mode:<7} {r['handled']:>6}/{r['expected']:<6} {ms(percentile(r['lateness'], 50))} "
+              f"{ms(percentile(r['lateness'], 99))} {ms(max(r['lateness'], default=0))} "
+              f"{ms(percentile(r['lag'], 99))} {ms(max(r['lag'], default=0))} {r['cpu']:>7.2f} {r['wall']:>7.2f}")
+    print("\nlateness/lag in ms; lateness = deadline -> window closed and broadcast (or next question started)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Ishga tushish vaqti benchmarki
+
+import main, uvicorn dan /health va /ready gacha, birinchi va ikkinchi register + login vaqtlari.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--port 8766] [--warm 4]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(elapsed, int('jose' in sys.modules), int('passlib.context' in sys.modules))\n"
+)
+
+
+def server_env(workdir: str, warm: int) -> dict:
+    return dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'quiz.db')}",
+        GAME_STATE_PATH=os.path.join(workdir, "game_state.db"),
+        DB_POOL_WARM=str(warm),
+        BCRYPT_ROUNDS="4",
+        RATE_LIMIT_ENABLED="false",
+    )
+
+
+def measure_import(env: dict):
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                         check=True, capture_output=True, text=True).stdout.split()
+    return float(out[0]), out[1] == "1", out[2] == "1"
+
+
+def wait_for(client: httpx.Client, path: str, started: float, timeout: float = 60) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} did not answer 200")
+
+
+def timed(client: httpx.Client, method: str, path: str, **kwargs) -> float:
+    started = time.perf_counter()
+    client.request(method, path, **kwargs).raise_for_status()
+    return time.perf_counter() - started
+
+
+def measure_boot(env: dict, port: int, run: int) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            health = wait_for(client, "/health", started)
+            ready = wait_for(client, "/ready", started)
+
+            logins = []
+            for n in range(2):
+                user = {"email": f"u{run}-{n}@bench.quiz", "nickname": f"u{run}-{n}",
+                        "name": "Bench", "password": "secret"}
+                register = timed(client, "POST", "/api/auth/register", json=user)
+                login = timed(client, "POST", "/api/auth/login",
+                              json={"email": user["email"], "password": user["password"]})
+                logins.append(register + login)
+        return {"health": health, "ready": ready, "first": logins[0], "second": logins[1]}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def ms(values) -> str:
+    return f"{statistics.median(values) * 1000:>8.1f} {min(values) * 1000:>8.1f} {max(values) * 1000:>8.1f}"
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--warm", type=int, default=4, help="DB_POOL_WARM")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="quiz-startup-")
+    env = server_env(workdir, args.warm)
+    subprocess.run([sys.executable, "create_tables.py"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    imports, boots = [], []
+    eager = set()
+    for run in range(args.runs):
+        elapsed, jose, passlib = measure_import(env)
+        imports.append(elapsed)
+        eager.update(name for name, loaded in (("jose", jose), ("passlib", passlib)) if loaded)
+        boots.append(measure_boot(env, args.port, run))
+
+    print("=" * 60)
+    print(f"  Startup benchmark: {args.runs} cold starts, DB_POOL_WARM={args.warm}")
+    print("=" * 60)
+    print(f"{'':<28} {'median':>8} {'min':>8} {'max':>8}  (ms)")
+    print(f"{'import main':<28} {ms(imports)}")
+    print(f"{'spawn -> /health':<28} {ms([b['health'] for b in boots])}")
+    print(f"{'spawn -> /ready':<28} {ms([b['ready'] for b in boots])}")
+    print(f"{'first register+login':<28} {ms([b['first'] for b in boots])}")
+    print(f"{'second register+login':<28} {ms([b['second'] for b in boots])}")
+    print(f"\nloaded at import: {', '.join(sorted(eager)) or 'neither jose nor passlib'}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Ko'p workerli scale-out benchmarki (GAME_STATE_BACKEND=sqlite)
+
+O'yinchi so'rovlari real TCP orqali istalgan workerga tushadi; oxirida har bir worker
+barcha o'yinchilarni ko'rishi tekshiriladi.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1,2,4] [--games 20] [--players 30]
+        [--questions 5] [--clients 4] [--port 8765] [--state sqlite|memory]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUIZ = {
+    "title": "Workers benchmark",
+    "questions": [
+        {"id": str(i), "question": f"Question {i}?", "options": ["A", "B", "C", "D"], "correctAnswer": i % 4}
+        for i in range(50)
+    ],
+}
+
+
+def start_server(workers: int, port: int, workdir: str, state: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'quiz.db')}",
+        GAME_STATE_BACKEND=state,
+        GAME_STATE_PATH=os.path.join(workdir, "game_state.db"),
+        BCRYPT_ROUNDS="4",
+        METRICS_ENABLED="false",
+        RATE_LIMIT_ENABLED="false",  # barcha o'yinchilar bitta IP dan
+    )
+    # Jadvallar workerlar ishga tushishidan oldin bir marta yaratiladi
+    subprocess.run([sys.executable, "create_tables.py"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def setup_games(base_url: str, games: int, questions: int):
+    quiz = dict(QUIZ, questions=QUIZ["questions"][:questions])
+    codes, hosts = [], []
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        for game in range(games):
+            r = client.post("/api/auth/register", json={
+                "email": f"host{game}@bench.quiz", "nickname": f"host{game}",
+                "name": f"Host {game}", "password": "secret",
+            })
+            r.raise_for_status()
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+            r = client.post("/api/quiz/create", json=quiz, headers=headers)
+            r.raise_for_status()
+            code = r.json()["game_code"]
+            client.post(f"/api/game/start/{code}", headers=headers).raise_for_status()
+            codes.append(code)
+            hosts.append(headers)
+    return codes, hosts
+
+
+def open_question(base_url: str, codes, hosts) -> int:
+    errors = 0
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        for code, headers in zip(codes, hosts):
+            errors += client.post(f"/api/game/{code}/next", headers=headers).status_code != 200
+    return errors
+
+
+async def play(base_url: str, codes, players: range, index: int, polls: int, seed: int, tokens: dict):
+    """index < 0: join + polling (tokens to'ldiriladi); aks holda shu savolga tokenlar bilan javoblar"""
+    rng = random.Random(seed)
+    requests = errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None,
+                                 limits=httpx.Limits(max_connections=64)) as client:
+        async def call(method, url, **kwargs):
+            nonlocal requests, errors
+            r = await client.request(method, url, **kwargs)
+            requests += 1
+            if r.status_code != 200:
+                errors += 1
+            return r
+
+        for code in codes:
+            names = [f"p{i}" for i in players]
+            if index < 0:
+                joined = await asyncio.gather(*(call("POST", "/api/game/join",
+                                                     json={"game_code": code, "player_name": n}) for n in names))
+                for n, r in zip(names, joined):
+                    if r.status_code == 200:
+                        tokens[code, n] = r.json()["player_token"]
+                for _ in range(polls):
+                    await asyncio.gather(*(call("GET", f"/api/game/{code}/session") for _ in names))
+                continue
+            await asyncio.gather(*(call("POST", f"/api/game/{code}/answer", json={
+                "player_token": tokens.get((code, n)), "question_index": index, "answer": rng.randrange(4),
+            }) for n in names))
+            await call("GET", f"/api/game/{code}/leaderboard")
+    return requests, errors, tokens
+
+
+def client_process(args):
+    base_url, codes, first, last, index, polls, seed, tokens = args
+    return asyncio.run(play(base_url, codes, range(first, last), index, polls, seed, tokens))
+
+
+def verify(base_url: str, codes, players: int) -> int:
+    mismatches = 0
+    with httpx.Client(base_url=base_url) as client:
+        for code in codes:
+            # Har bir o'yin bir necha marta so'raladi - turli workerlarga tushadi
+            for _ in range(3):
+                session = client.get(f"/api/game/{code}/session").json()
+                board = client.get(f"/api/game/{code}/leaderboard").json()
+                if len(session["players"]) != players or board["total_players"] != players:
+                    mismatches += 1
+    return mismatches
+
+
+def run(workers: int, args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="quiz-workers-")
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(workers, args.port, workdir, args.state)
+    try:
+        wait_ready(base_url)
+        codes, hosts = setup_games(base_url, args.games, args.questions)
+
+        # O'yinchilar client jarayonlari o'rtasida bo'linadi
+        step = -(-args.players // args.clients)
+        ranges = [(first, min(first + step, args.players)) for first in range(0, args.players, step)]
+        results, next_errors, tokens = [], 0, {}
+        started = time.perf_counter()
+        with multiprocessing.Pool(len(ranges)) as pool:
+            for index in range(-1, args.questions):
+                if index >= 0:
+                    next_errors += open_question(base_url, codes, hosts)
+                phase = pool.map(client_process, [
+                    (base_url, codes, first, last, index, args.polls, args.seed + first * args.questions + index,
+                     tokens if index >= 0 else {})
+                    for first, last in ranges
+                ])
+                results += [(r, e) for r, e, _ in phase]
+                if index < 0:
+                    for _, _, joined in phase:
+                        tokens.update(joined)
+        wall = time.perf_counter() - started
+
+        return {
+            "workers": workers,
+            "requests": sum(r for r, _ in results) + len(codes) * args.questions,
+            "errors": sum(e for _, e in results) + next_errors,
+            "wall": wall,
+            "mismatches": verify(base_url, codes, args.players),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Multi-worker scale-out benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--state", default="sqlite", choices=("sqlite", "memory"),
+                        help="GAME_STATE_BACKEND (memory shows stale reads with >1 worker)")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"  Scale-out benchmark ({args.state}): {args.games} games x {args.players} players x "
+          f"{args.questions} questions, {args.clients} clients, {os.cpu_count()} CPUs")
+    print("=" * 72)
+    print(f"{'workers':>7} {'requests':>9} {'errors':>7} {'wall s':>8} {'req/s':>8} {'speedup':>8} {'stale':>6}")
+
+    failed = False
+    base_rps = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        result = run(workers, args)
+        rps = result["requests"] / result["wall"]
+        base_rps = base_rps or rps
+        print(f"{workers:>7} {result['requests']:>9} {result['errors']:>7} {result['wall']:>8.2f} "
+              f"{rps:>8.0f} {rps / base_rps:>7.2f}x {result['mismatches']:>6}")
+        failed = failed or result["errors"] > 0 or result["mismatches"] > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,276 @@
+"""
+O'yin hodisalari logi (replay va audit uchun)
+
+Har bir hodisa EVENT_LOG_DIR/<game_code>.log ga binary yozuv sifatida qo'shiladi:
+
+    <u32 uzunlik> <u32 crc32> <f64 vaqt> <u8 hodisa> <JSON>
+
+Yozuvlar fon threadida batch qilib, fayl boshiga bitta write + fsync bilan yoziladi.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from leaderboard import Leaderboard
+from metrics import PrometheusWriter
+from serialization import dumps
+
+logger = logging.getLogger("quiz.event_log")
+
+EVENT_LOG_ENABLED = os.getenv("EVENT_LOG_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "game_logs")
+EVENT_LOG_FLUSH_INTERVAL = float(os.getenv("EVENT_LOG_FLUSH_INTERVAL", "0.2"))
+EVENT_LOG_BATCH = int(os.getenv("EVENT_LOG_BATCH", "1000"))
+EVENT_LOG_QUEUE_LIMIT = int(os.getenv("EVENT_LOG_QUEUE_LIMIT", "100000"))
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "true").lower() in ("1", "true", "yes", "on")
+EVENT_LOG_OPEN_FILES = int(os.getenv("EVENT_LOG_OPEN_FILES", "256"))
+
+HEADER = struct.Struct("<IIdB")
+PREFIX = struct.Struct("<II")  # uzunlik, crc32 (crc vaqt+event+body ustidan)
+STAMP = struct.Struct("<dB")
+READ_CHUNK = 64 * 1024
+
+EVENTS = ("start", "join", "leave", "question", "answer", "rejected", "end", "closed")
+EVENT_CODES = {name: code for code, name in enumerate(EVENTS, 1)}
+
+
+def encode_record(event: str, data: dict, ts: Optional[float] = None) -> bytes:
+    body = dumps(data)
+    stamp = STAMP.pack(time.time() if ts is None else ts, EVENT_CODES[event])
+    return PREFIX.pack(len(body), zlib.crc32(stamp + body)) + stamp + body
+
+
+def decode_records(chunks: Iterator[bytes]) -> Iterator[dict]:
+    """Baytlar oqimidan yozuvlar; chala yoki buzilgan yozuvda to'xtaydi"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            length, crc, ts, code = HEADER.unpack_from(buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break
+            body = bytes(buffer[offset + HEADER.size:end])
+            if zlib.crc32(buffer[offset + PREFIX.size:offset + HEADER.size] + body) != crc or not 0 < code <= len(EVENTS):
+                logger.warning("Corrupt event log record, stopping replay")
+                return
+            yield {"ts": ts, "event": EVENTS[code - 1], **json.loads(body)}
+            offset = end
+        del buffer[:offset]
+
+
+def _valid_code(game_code: str) -> bool:
+    # Fayl nomi sifatida ishlatiladi - faqat harf va raqam
+    return game_code.isalnum()
+
+
+class EventLog:
+    def __init__(self, directory: str = EVENT_LOG_DIR):
+        self.directory = directory
+        self._pending: List[Tuple[str, bytes]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._fds: "OrderedDict[str, int]" = OrderedDict()
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.errors = 0
+
+    def path(self, game_code: str) -> str:
+        return os.path.join(self.directory, f"{game_code}.log")
+
+    # ---------- yozish ----------
+
+    def append(self, game_code: str, event: str, data: dict):
+        """Request yo'lida: faqat kodlash va navbatga qo'yish (disk yo'q)"""
+        if not EVENT_LOG_ENABLED or not _valid_code(game_code):
+            return
+        record = encode_record(event, data)
+        with self._cond:
+            if len(self._pending) >= EVENT_LOG_QUEUE_LIMIT:
+                self.dropped += 1
+                return
+            self._pending.append((game_code, record))
+            self.appended += 1
+            if self._thread is None:
+                self._start_locked()
+            elif len(self._pending) >= EVENT_LOG_BATCH:
+                self._cond.notify_all()
+
+    def _fd(self, game_code: str) -> int:
+        fd = self._fds.get(game_code)
+        if fd is not None:
+            self._fds.move_to_end(game_code)
+            return fd
+        while len(self._fds) >= EVENT_LOG_OPEN_FILES:
+            _, oldest = self._fds.popitem(last=False)
+            os.close(oldest)
+        fd = self._fds[game_code] = os.open(self.path(game_code), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return fd
+
+    def _close(self, game_code: str):
+        fd = self._fds.pop(game_code, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _write(self, batch: List[Tuple[str, bytes]]):
+        files: Dict[str, bytearray] = {}
+        for game_code, record in batch:
+            files.setdefault(game_code, bytearray()).extend(record)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for game_code, data in files.items():
+            try:
+                fd = self._fd(game_code)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if EVENT_LOG_FSYNC:
+                    os.fsync(fd)
+                    self.fsyncs += 1
+                self.bytes += len(data)
+            except OSError:
+                self.errors += 1
+                self._close(game_code)
+                logger.exception("Event log write failed for %s", game_code)
+        self.batches += 1
+
+        # Tugagan o'yinlarning fayllari yopiladi
+        ended = EVENT_CODES["end"]
+        for game_code, record in batch:
+            if record[HEADER.size - 1] == ended:
+                self._close(game_code)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._pending) < EVENT_LOG_BATCH and not self._stopping:
+                    self._cond.wait(EVENT_LOG_FLUSH_INTERVAL)
+                batch, self._pending = self._pending, []
+                if not batch and self._stopping:
+                    return
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Event log batch failed")
+            with self._cond:
+                self.written += len(batch)
+                self._cond.notify_all()
+
+    def _start_locked(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._start_locked()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Hozirgacha navbatga qo'yilgan yozuvlar diskka tushguncha kutish"""
+        with self._cond:
+            target = self.appended
+            if self._thread is None:
+                return self.written >= target
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self.written >= target, timeout)
+
+    def stop(self):
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            self._thread = None
+            for game_code in list(self._fds):
+                self._close(game_code)
+
+    # ---------- o'qish ----------
+
+    def exists(self, game_code: str) -> bool:
+        return _valid_code(game_code) and os.path.exists(self.path(game_code))
+
+    def _chunks(self, game_code: str) -> Iterator[bytes]:
+        try:
+            f = open(self.path(game_code), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+    def read(self, game_code: str) -> Iterator[dict]:
+        if not _valid_code(game_code):
+            return iter(())
+        return decode_records(self._chunks(game_code))
+
+    def replay_ndjson(self, game_code: str, lines_per_chunk: int = 256) -> Iterator[bytes]:
+        """StreamingResponse uchun: har bir yozuv - bitta JSON qator"""
+        chunk = []
+        for record in self.read(game_code):
+            chunk.append(dumps(record))
+            if len(chunk) >= lines_per_chunk:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+    def replay_leaderboard(self, game_code: str, until_question: Optional[int] = None,
+                           limit: int = 10) -> dict:
+        """Oxirgi run'ning reytingi; until_question - shu savolgacha (shu jumladan)"""
+        board = Leaderboard()
+        answers = 0
+        for record in self.read(game_code):
+            if record["event"] == "start":
+                board = Leaderboard()
+                answers = 0
+            elif record["event"] == "answer":
+                if until_question is not None and record["question_index"] > until_question:
+                    continue
+                board.update(record["player_name"], (board.score(record["player_name"]) or 0) + record["points"])
+                answers += 1
+        return {
+            "game_code": game_code,
+            "total_players": len(board),
+            "answers": answers,
+            "top": [{"rank": rank, "player_name": name, "score": score} for rank, name, score in board.top(limit)],
+        }
+
+    # ---------- metrikalar ----------
+
+    def write(self, writer: PrometheusWriter):
+        with self._cond:
+            pending = len(self._pending)
+        for name, kind, help_text, value in (
+            ("quiz_event_log_records_total", "counter", "Game events written to the log", self.written),
+            ("quiz_event_log_dropped_total", "counter", "Game events dropped (queue full)", self.dropped),
+            ("quiz_event_log_bytes_total", "counter", "Bytes appended to game event logs", self.bytes),
+            ("quiz_event_log_batches_total", "counter", "Event log write batches", self.batches),
+            ("quiz_event_log_fsyncs_total", "counter", "Event log fsync calls", self.fsyncs),
+            ("quiz_event_log_errors_total", "counter", "Event log write errors", self.errors),
+            ("quiz_event_log_pending", "gauge", "Game events waiting for the writer", pending),
+        ):
+            writer.sample(name, kind, help_text, value)
+
+
+event_log = EventLog()
@@ -0,0 +1,137 @@
+"""
+O'yin kodlarini ajratish
+
+Har bir process hisoblagichdan blok oladi, qiymatlar Feistel permutatsiyasi bilan
+6 belgili kodga aylantiriladi - kodlar takrorlanmaydi, DB tekshiruvi kerak emas.
+"""
+
+import hashlib
+import os
+import string
+import threading
+from collections import deque
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models import GameCodeCounter
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH
+
+GAME_CODE_BLOCK_SIZE = int(os.getenv("GAME_CODE_BLOCK_SIZE", "1000"))
+GAME_CODE_KEY = os.getenv("GAME_CODE_KEY") or os.getenv(
+    "SECRET_KEY", "your-secret-key-change-this-in-production-09876543210"
+)
+# Eski (tasodifiy) kodlar bilan to'qnashuvda nechta kod sinab ko'riladi
+GAME_CODE_ATTEMPTS = int(os.getenv("GAME_CODE_ATTEMPTS", "5"))
+COUNTER_NAME = "quiz"
+
+
+def encode_code(value: int) -> str:
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class CodePermutation:
+    """[0, CODE_SPACE) ustida kalitli biyeksiya: 32-bit Feistel + cycle walking"""
+
+    ROUNDS = 4
+
+    def __init__(self, key: str):
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        self.round_keys = [
+            int.from_bytes(digest[i * 4:(i + 1) * 4], "big") for i in range(self.ROUNDS)
+        ]
+
+    @staticmethod
+    def _round(half: int, key: int) -> int:
+        x = (half ^ key) * 0x45D9F3B & 0xFFFFFFFF
+        x ^= x >> 16
+        x = x * 0x45D9F3B & 0xFFFFFFFF
+        return (x ^ (x >> 16)) & 0xFFFF
+
+    def _feistel(self, value: int) -> int:
+        left, right = value >> 16, value & 0xFFFF
+        for key in self.round_keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << 16) | right
+
+    def __call__(self, value: int) -> int:
+        # 2**32 / CODE_SPACE ~ 2, shuning uchun o'rtacha ~2 iteratsiya
+        value = self._feistel(value)
+        while value >= CODE_SPACE:
+            value = self._feistel(value)
+        return value
+
+
+def is_code_collision(exc: IntegrityError) -> bool:
+    """IntegrityError game_code unique to'qnashuvimi (SQLite, MySQL, PostgreSQL xabarlari)"""
+    message = str(exc.orig).lower()
+    return "game_code" in message and ("unique" in message or "duplicate" in message)
+
+
+class GameCodeAllocator:
+    def __init__(self, block_size: int = GAME_CODE_BLOCK_SIZE, key: str = GAME_CODE_KEY,
+                 session_factory=SessionLocal):
+        self.block_size = block_size
+        self.permutation = CodePermutation(key)
+        self.session_factory = session_factory
+        self._next = 0
+        self._end = 0
+        self._released = deque()
+        self._lock = threading.Lock()
+
+    def _reserve_block(self):
+        """Counter qatorini bitta atomik UPDATE bilan surish (jarayonlar o'rtasida xavfsiz)"""
+        db = self.session_factory()
+        try:
+            while True:
+                result = db.execute(
+                    update(GameCodeCounter)
+                    .where(GameCodeCounter.name == COUNTER_NAME)
+                    .values(next_value=GameCodeCounter.next_value + self.block_size)
+                )
+                if result.rowcount:
+                    end = db.execute(
+                        select(GameCodeCounter.next_value).where(GameCodeCounter.name == COUNTER_NAME)
+                    ).scalar_one()
+                    db.commit()
+                    break
+
+                # Birinchi marta - counter qatorini yaratamiz
+                db.rollback()
+                try:
+                    db.add(GameCodeCounter(name=COUNTER_NAME, next_value=0))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+        finally:
+            db.close()
+
+        if end > CODE_SPACE:
+            raise RuntimeError("Game code space exhausted")
+        self._next, self._end = end - self.block_size, end
+
+    def allocate(self) -> str:
+        with self._lock:
+            if self._released:
+                return self._released.popleft()
+            if self._next >= self._end:
+                self._reserve_block()
+            value = self._next
+            self._next += 1
+        return encode_code(self.permutation(value))
+
+    def release(self, code: str):
+        """Ishlatilmay qolgan kodni qaytarish (masalan insert bekor bo'lganda)"""
+        with self._lock:
+            self._released.append(code)
+
+
+game_code_allocator = GameCodeAllocator()
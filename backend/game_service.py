@@ -0,0 +1,483 @@
+"""
+O'yin jarayoni: start, join/leave, session, next, answer, leaderboard, end
+
+Sync (game_routes) va async (async_routes) handlerlar shu funksiyalarni chaqiradi.
+Har bir qadam event_log ga yoziladi, savollarni round_scheduler vaqtlaydi.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from auth import TokenUser
+from database import SessionLocal
+from event_log import event_log
+from models import Quiz, GameSession
+from player_tokens import PlayerClaim, PLAYER_TOKEN_OPTIONAL, issue, new_slot, run_id, verify
+from quiz_cache import quiz_cache, CachedQuiz
+from realtime import game_hub
+from round_scheduler import ADVANCE, CLOSE, ROUND_AUTO_ADVANCE, ROUND_BREAK, round_scheduler
+from scoring import score_buffer, AnswerRejected, QUESTION_TIME_LIMIT
+from schemas import AnswerSubmit
+from session_store import PlayerNameTaken, StalePlayerToken, session_registry
+from shared_state import offload
+
+logger = logging.getLogger("quiz.game")
+
+NOT_ACTIVE_DETAIL = "This game is not active. Wait for the host to start it."
+
+
+def _require_quiz(quiz: Optional[CachedQuiz]) -> CachedQuiz:
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return quiz
+
+
+def _require_host(quiz: CachedQuiz, user: TokenUser, action: str) -> CachedQuiz:
+    # 🔒 O'yinni faqat uning egasi (yoki admin) boshqaradi
+    if user.role != "admin" and quiz.creator_id != user.id:
+        raise HTTPException(status_code=403, detail=f"Only the host can {action}")
+    return quiz
+
+
+# ==================== START ====================
+
+def _session_query(game_code: str):
+    return select(GameSession).where(GameSession.game_code == game_code)
+
+
+def _reset_session(session: Optional[GameSession], quiz: CachedQuiz) -> GameSession:
+    """Yangi sessiya yoki mavjudini qayta faollashtirish"""
+    if session is None:
+        return GameSession(
+            game_code=quiz.game_code,
+            quiz_id=quiz.id,
+            host_id=quiz.creator_id,  # ✅ kim yaratganini yozamiz
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+            players=[],
+            status="waiting",
+            is_active=True,
+        )
+    session.is_active = True
+    session.status = "waiting"
+    # Oldingi o'yinning o'yinchilari va slotlari qolmaydi
+    session.players = []
+    session.created_at = session.updated_at = datetime.utcnow()
+    return session
+
+
+def _other_active_query(quiz: CachedQuiz):
+    # ix_quizzes_creator_active: faqat shu hostning aktiv quizlari
+    return select(Quiz.id, Quiz.game_code).where(
+        Quiz.creator_id == quiz.creator_id,
+        Quiz.is_active.is_(True),
+        Quiz.id != quiz.id,
+    )
+
+
+def _deactivate_statement(ids: List[int]):
+    return update(Quiz).where(Quiz.id.in_(ids)).values(is_active=False)
+
+
+def _activate_statement(quiz: CachedQuiz):
+    return update(Quiz).where(Quiz.id == quiz.id).values(is_active=True)
+
+
+def _reset_caches(quiz: CachedQuiz, deactivated: List[Tuple[int, str]]):
+    for _, game_code in deactivated:
+        quiz_cache.set_active(game_code, False)
+    quiz_cache.invalidate(quiz.game_code)
+    score_buffer.discard(quiz.game_code)
+
+
+def _started(snapshot: dict, quiz: CachedQuiz) -> dict:
+    round_scheduler.cancel(quiz.game_code)  # qayta start: oldingi run taymeri bekor
+    event_log.append(quiz.game_code, "start", {
+        "session_id": snapshot["id"], "quiz_id": quiz.id, "questions": len(quiz.questions),
+    })
+    game_hub.publish(quiz.game_code, "status", {"status": snapshot["status"], "is_active": True})
+    return snapshot
+
+
+def start_game(db: Session, game_code: str, user: TokenUser) -> dict:
+    quiz = _require_host(_require_quiz(quiz_cache.get(db, game_code)), user, "start the game")
+
+    # Xotirada yozilmagan o'zgarishlar bo'lsa, avval DB ga tushiramiz
+    session_registry.flush([game_code])
+
+    session = _reset_session(db.execute(_session_query(game_code)).scalars().first(), quiz)
+    db.add(session)
+
+    # 🔹 Hostning boshqa aktiv quizlari o'chiriladi, shu quiz yoqiladi
+    deactivated = db.execute(_other_active_query(quiz)).all()
+    if deactivated:
+        db.execute(_deactivate_statement([row.id for row in deactivated]))
+    db.execute(_activate_statement(quiz))
+
+    db.commit()
+    db.refresh(session)
+    _reset_caches(quiz, deactivated)
+    return _started(session_registry.activate(session), quiz)
+
+
+async def astart_game(db: AsyncSession, game_code: str, user: TokenUser) -> dict:
+    quiz = _require_host(_require_quiz(await quiz_cache.aget(db, game_code)), user, "start the game")
+
+    await run_in_threadpool(session_registry.flush, [game_code])
+
+    session = _reset_session((await db.execute(_session_query(game_code))).scalars().first(), quiz)
+    db.add(session)
+
+    deactivated = (await db.execute(_other_active_query(quiz))).all()
+    if deactivated:
+        await db.execute(_deactivate_statement([row.id for row in deactivated]))
+    await db.execute(_activate_statement(quiz))
+
+    await db.commit()
+    await db.refresh(session)
+    await offload(_reset_caches, quiz, deactivated)
+    return _started(await session_registry.aactivate(session), quiz)
+
+
+# ==================== JOIN / LEAVE / SESSION ====================
+
+def _player(game_code: str, player_name: Optional[str], player_token: Optional[str],
+            required: bool = False) -> Tuple[str, Optional[PlayerClaim]]:
+    """So'rovdagi o'yinchi: token bo'lsa ism va slot tokendan (DB ga murojaatsiz)"""
+    if player_token:
+        claim = verify(player_token, game_code)
+        if claim is None:
+            raise HTTPException(status_code=401, detail="Invalid player token")
+        return claim.player_name, claim
+    # 🔒 answer/leave faqat token bilan (PLAYER_TOKEN_OPTIONAL=true bo'lmasa)
+    if required and not PLAYER_TOKEN_OPTIONAL:
+        raise HTTPException(status_code=401, detail="Player token required")
+    if not player_name:
+        raise HTTPException(status_code=400, detail="player_name or player_token is required")
+    return player_name, None
+
+
+def _stale_token() -> HTTPException:
+    return HTTPException(status_code=401, detail="Player token is from an earlier run of this game")
+
+
+def _name_taken() -> HTTPException:
+    return HTTPException(status_code=409, detail="Player name is already taken in this game")
+
+
+def _joined(game_code: str, player_name: str, session: Optional[dict]) -> dict:
+    if not session:
+        raise HTTPException(status_code=400, detail=NOT_ACTIVE_DETAIL)
+    token = issue(game_code, player_name, session["player_slot"], run_id(session["created_at"]))
+    event_log.append(game_code, "join", {"player_name": player_name, "resumed": session["resumed"]})
+    game_hub.publish(game_code, "player_joined", {"player_name": player_name, "resumed": session["resumed"]})
+    return {**session, "player_token": token}
+
+
+def join_game(db: Session, game_code: str, player_name: Optional[str], player_token: Optional[str] = None) -> dict:
+    player_name, claim = _player(game_code, player_name, player_token)
+    # 🔹 O'yinchi xotiradagi sessiyaga qo'shiladi, DB ga fonda yoziladi
+    try:
+        session = session_registry.join(db, game_code, player_name, new_slot(), claim)
+    except PlayerNameTaken:
+        raise _name_taken()
+    except StalePlayerToken:
+        raise _stale_token()
+    return _joined(game_code, player_name, session)
+
+
+async def ajoin_game(db: AsyncSession, game_code: str, player_name: Optional[str],
+                     player_token: Optional[str] = None) -> dict:
+    player_name, claim = _player(game_code, player_name, player_token)
+    try:
+        session = await session_registry.ajoin(db, game_code, player_name, new_slot(), claim)
+    except PlayerNameTaken:
+        raise _name_taken()
+    except StalePlayerToken:
+        raise _stale_token()
+    return _joined(game_code, player_name, session)
+
+
+def _left(game_code: str, player_name: str, session: Optional[dict]) -> dict:
+    if not session:
+        raise HTTPException(status_code=404, detail="Player not found in this game")
+    event_log.append(game_code, "leave", {"player_name": player_name})
+    game_hub.publish(game_code, "player_left", {"player_name": player_name})
+    return {"message": "Left the game", "game_code": game_code}
+
+
+def leave_game(db: Session, game_code: str, player_name: Optional[str], player_token: Optional[str] = None) -> dict:
+    player_name, claim = _player(game_code, player_name, player_token, required=True)
+    return _left(game_code, player_name, session_registry.leave(db, game_code, player_name, claim))
+
+
+async def aleave_game(db: AsyncSession, game_code: str, player_name: Optional[str],
+                      player_token: Optional[str] = None) -> dict:
+    player_name, claim = _player(game_code, player_name, player_token, required=True)
+    return _left(game_code, player_name, await session_registry.aleave(db, game_code, player_name, claim))
+
+
+def _require_session(session: Optional[dict]) -> dict:
+    if not session:
+        raise HTTPException(status_code=404, detail="Game session not found")
+    return session
+
+
+def game_session(db: Session, game_code: str) -> dict:
+    return _require_session(session_registry.get(db, game_code))
+
+
+async def agame_session(db: AsyncSession, game_code: str) -> dict:
+    return _require_session(await session_registry.aget(db, game_code))
+
+
+# ==================== QUESTIONS / ANSWERS ====================
+
+def _advanced(game_code: str, session: Optional[dict], questions: int) -> dict:
+    if not session:
+        raise HTTPException(status_code=400, detail="Game is not active or has no more questions")
+    event_log.append(game_code, "question", {
+        "index": session["current_question"],
+        "started_at": session["question_started_at"].isoformat(),
+    })
+    game_hub.publish(game_code, "question", {
+        "index": session["current_question"],
+        "started_at": session["question_started_at"],
+        "ends_at": session["question_ends_at"],
+    })
+    # Avvalgi savol taymeri (agar bo'lsa) shu bilan almashadi
+    round_scheduler.schedule(game_code, QUESTION_TIME_LIMIT, CLOSE, session["current_question"], questions)
+    return session
+
+
+def next_question(db: Session, game_code: str, user: TokenUser) -> dict:
+    quiz = _require_host(_require_quiz(quiz_cache.get(db, game_code)), user, "move to the next question")
+    questions = len(quiz.questions)
+    return _advanced(game_code, session_registry.advance(db, game_code, questions), questions)
+
+
+async def anext_question(db: AsyncSession, game_code: str, user: TokenUser) -> dict:
+    quiz = _require_host(_require_quiz(await quiz_cache.aget(db, game_code)), user, "move to the next question")
+    questions = len(quiz.questions)
+    return _advanced(game_code, await session_registry.aadvance(db, game_code, questions), questions)
+
+
+def _rejected(game_code: str, submission: AnswerSubmit, detail: str) -> HTTPException:
+    # 409 lar nizolarda kerak bo'ladi ("javob berdim, lekin qabul qilinmadi")
+    event_log.append(game_code, "rejected", {
+        "player_name": submission.player_name,
+        "question_index": submission.question_index,
+        "answer": submission.answer,
+        "detail": detail,
+    })
+    return HTTPException(status_code=409, detail=detail)
+
+
+def _answer_elapsed(game_code: str, session: Optional[dict], submission: AnswerSubmit) -> float:
+    """Javob oynasini tekshirish; savol ochilgandan beri o'tgan vaqt (server soati)"""
+    if not session or not session["is_active"]:
+        raise HTTPException(status_code=400, detail="Game is not active")
+    if not session["joined"]:
+        raise HTTPException(status_code=403, detail="Player has not joined this game")
+
+    # 🔒 Host savolni ochmaguncha javob qabul qilinmaydi
+    if session["current_question"] < 0:
+        raise _rejected(game_code, submission, "No question is open yet")
+    if submission.question_index != session["current_question"]:
+        raise _rejected(game_code, submission, "Answer window is closed")
+    elapsed = (datetime.utcnow() - session["question_started_at"]).total_seconds()
+    if elapsed > QUESTION_TIME_LIMIT:
+        raise _rejected(game_code, submission, "Answer window is closed")
+    return elapsed
+
+
+def _submit(game_code: str, scores, submission: AnswerSubmit, elapsed: float,
+            user_id: Optional[int]) -> dict:
+    if scores is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    try:
+        result = scores.submit(
+            submission.player_name,
+            submission.question_index,
+            submission.answer,
+            elapsed,
+            user_id=user_id,
+        )
+    except AnswerRejected as e:
+        if e.status_code == 409:
+            raise _rejected(game_code, submission, e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    event_log.append(game_code, "answer", {
+        "player_name": submission.player_name,
+        "question_index": submission.question_index,
+        "answer": submission.answer,
+        "elapsed": elapsed,
+        "user_id": user_id,
+        **result,
+    })
+    return result
+
+
+def _answering(game_code: str, submission: AnswerSubmit) -> Tuple[AnswerSubmit, Optional[PlayerClaim]]:
+    player_name, claim = _player(game_code, submission.player_name, submission.player_token, required=True)
+    return submission.model_copy(update={"player_name": player_name}), claim
+
+
+def submit_answer(db: Session, game_code: str, submission: AnswerSubmit, user_id: Optional[int]) -> dict:
+    submission, claim = _answering(game_code, submission)
+    session = session_registry.player_view(db, game_code, submission.player_name, claim)
+    elapsed = _answer_elapsed(game_code, session, submission)
+    return _submit(game_code, score_buffer.get_or_create(db, game_code), submission, elapsed, user_id)
+
+
+async def asubmit_answer(db: AsyncSession, game_code: str, submission: AnswerSubmit, user_id: Optional[int]) -> dict:
+    submission, claim = _answering(game_code, submission)
+    session = await session_registry.aplayer_view(db, game_code, submission.player_name, claim)
+    elapsed = _answer_elapsed(game_code, session, submission)
+    scores = await score_buffer.aget_or_create(db, game_code)
+    return await offload(_submit, game_code, scores, submission, elapsed, user_id)
+
+
+def leaderboard(game_code: str, limit: int, player_name: Optional[str]) -> dict:
+    scores = score_buffer.get(game_code)
+    if scores is None:
+        return {"game_code": game_code, "total_players": 0, "top": [], "player": None}
+    return {"game_code": game_code, **scores.standings(limit, player_name)}
+
+
+async def aleaderboard(game_code: str, limit: int, player_name: Optional[str]) -> dict:
+    return await offload(leaderboard, game_code, limit, player_name)
+
+
+# ==================== END ====================
+
+def _end_statement(game_code: str):
+    return update(Quiz).where(Quiz.game_code == game_code).values(is_active=False)
+
+
+def _ended(game_code: str, saved: int) -> dict:
+    round_scheduler.cancel(game_code)
+    quiz_cache.invalidate(game_code)
+    event_log.append(game_code, "end", {"results_saved": saved})
+    game_hub.publish(game_code, "status", {"status": "finished", "is_active": False})
+    return {
+        "message": "Game session ended successfully",
+        "game_code": game_code,
+        "results_saved": saved
+    }
+
+
+def end_game(db: Session, game_code: str, user: TokenUser) -> dict:
+    _require_host(_require_quiz(quiz_cache.get(db, game_code)), user, "end the game")
+    session = _require_session(session_registry.finish(db, game_code))
+    db.execute(_end_statement(game_code))
+
+    # 🔹 Buferdagi natijalar bitta bulk insert bilan tarixga yoziladi - sessiya, quiz va tarix bitta commit'da
+    saved = score_buffer.add_history(db, game_code, len(session["players"]))
+    db.commit()
+    score_buffer.discard(game_code)
+    return _ended(game_code, saved)
+
+
+async def aend_game(db: AsyncSession, game_code: str, user: TokenUser) -> dict:
+    _require_host(_require_quiz(await quiz_cache.aget(db, game_code)), user, "end the game")
+    session = _require_session(await session_registry.afinish(db, game_code))
+    await db.execute(_end_statement(game_code))
+    saved = await score_buffer.aadd_history(db, game_code, len(session["players"]))
+    await db.commit()
+    await offload(score_buffer.discard, game_code)
+    return _ended(game_code, saved)
+
+
+# ==================== ROUND CLOCK ====================
+# round_scheduler handleri: muddati kelgan taymerlar bitta batch, threadpool'da.
+# Savollar soni taymer yozuvida - minglab o'yinda quiz_cache'dan o'qilmaydi.
+
+def _close_question(db: Session, game_code: str, index: int, questions: int):
+    session = session_registry.get(db, game_code)
+    if not session or not session["is_active"] or session["current_question"] != index:
+        return
+    last = index + 1 >= questions
+    event_log.append(game_code, "closed", {"index": index})
+    game_hub.publish(game_code, "question_closed", {"index": index, "last": last})
+    if ROUND_AUTO_ADVANCE and not last:
+        round_scheduler.schedule(game_code, ROUND_BREAK, ADVANCE, index, questions)
+
+
+def _auto_advance(db: Session, game_code: str, index: int, questions: int):
+    # index hali joriy savol bo'lsagina o'tadi: host /next bosgan bo'lsa no-op
+    session = session_registry.advance(db, game_code, questions, expected=index)
+    if session:
+        _advanced(game_code, session, questions)
+
+
+def _on_deadlines(due: list):
+    db = SessionLocal()
+    try:
+        for _, _, game_code, kind, index, questions in due:
+            try:
+                if kind == CLOSE:
+                    _close_question(db, game_code, index, questions)
+                elif kind == ADVANCE:
+                    _auto_advance(db, game_code, index, questions)
+            except Exception:
+                logger.exception("Round %s failed for %s", kind, game_code)
+    finally:
+        db.close()
+
+
+round_scheduler.set_handler(_on_deadlines)
+
+
+# ==================== REPLAY ====================
+
+def _require_log(game_code: str):
+    if not event_log.exists(game_code):
+        raise HTTPException(status_code=404, detail="No events recorded for this game")
+
+
+def replay_events(db: Session, game_code: str, user: TokenUser) -> Iterator[bytes]:
+    _require_host(_require_quiz(quiz_cache.get(db, game_code)), user, "replay this game")
+    event_log.flush()  # navbatdagi yozuvlar ham ko'rinsin
+    _require_log(game_code)
+    return event_log.replay_ndjson(game_code)
+
+
+async def areplay_events(db: AsyncSession, game_code: str, user: TokenUser) -> Iterator[bytes]:
+    _require_host(_require_quiz(await quiz_cache.aget(db, game_code)), user, "replay this game")
+    await run_in_threadpool(event_log.flush)
+    _require_log(game_code)
+    return event_log.replay_ndjson(game_code)
+
+
+def replay_leaderboard(db: Session, game_code: str, user: TokenUser,
+                       until_question: Optional[int], limit: int) -> dict:
+    _require_host(_require_quiz(quiz_cache.get(db, game_code)), user, "replay this game")
+    event_log.flush()
+    _require_log(game_code)
+    return event_log.replay_leaderboard(game_code, until_question, limit)
+
+
+async def areplay_leaderboard(db: AsyncSession, game_code: str, user: TokenUser,
+                              until_question: Optional[int], limit: int) -> dict:
+    _require_host(_require_quiz(await quiz_cache.aget(db, game_code)), user, "replay this game")
+    await run_in_threadpool(event_log.flush)
+    _require_log(game_code)
+    return await run_in_threadpool(event_log.replay_leaderboard, game_code, until_question, limit)
+
+
+def _on_remote_event(game_code: str, event: str):
+    # Boshqa workerda start/end bo'lgan - is_active bayrog'i eskirgan
+    if event == "status":
+        quiz_cache.invalidate(game_code)
+
+
+game_hub.add_listener(_on_remote_event)
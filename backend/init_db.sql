@@ -43,6 +43,8 @@ CREATE TABLE IF NOT EXISTS quizzes (
     
     INDEX idx_game_code (game_code),
     INDEX idx_creator (creator_id),
+    INDEX idx_creator_created (creator_id, created_at, id),
+    INDEX idx_creator_active (creator_id, is_active),
     INDEX idx_active (is_active)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -57,12 +59,14 @@ CREATE TABLE IF NOT EXISTS quiz_history (
     total_questions INT NOT NULL DEFAULT 0,
     rank INT NOT NULL DEFAULT 0,
     participants INT NOT NULL DEFAULT 0,
+    correct_answers INT NULL,
     completed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE,
     
     INDEX idx_user (user_id),
+    INDEX idx_user_completed (user_id, completed_at, id),
     INDEX idx_quiz (quiz_id),
     INDEX idx_completed (completed_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -75,16 +79,82 @@ CREATE TABLE IF NOT EXISTS game_sessions (
     quiz_id INT NOT NULL,
     game_code VARCHAR(20) NOT NULL UNIQUE,
     host_id INT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT FALSE,
     status ENUM('waiting', 'playing', 'finished') NOT NULL DEFAULT 'waiting',
     players JSON NULL,
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NULL,
     
     FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE,
     FOREIGN KEY (host_id) REFERENCES users(id) ON DELETE CASCADE,
     
     INDEX idx_game_code (game_code),
     INDEX idx_host (host_id),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_active_updated (is_active, updated_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- 5. QUESTIONS TABLE (QUESTION_STORAGE=table)
+-- ============================================
+-- Normallashtirilgan savollar; mavjud quizlar: python migrate_questions.py
+CREATE TABLE IF NOT EXISTS questions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    quiz_id INT NOT NULL,
+    position INT NOT NULL,
+    payload JSON NOT NULL,
+
+    FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE,
+
+    UNIQUE KEY uq_questions_quiz_position (quiz_id, position)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- 6. USER_STATS TABLE
+-- ============================================
+-- quiz_history'dan inkremental yangilanadi (python backfill_stats.py bilan qayta quriladi)
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INT PRIMARY KEY,
+    games_played INT NOT NULL DEFAULT 0,
+    total_score BIGINT NOT NULL DEFAULT 0,
+    best_score INT NULL,
+    best_rank INT NULL,
+    total_questions INT NOT NULL DEFAULT 0,
+    graded_questions INT NOT NULL DEFAULT 0,
+    correct_answers INT NOT NULL DEFAULT 0,
+    last_played_at DATETIME NULL,
+    updated_at DATETIME NULL,
+
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- 7. GAME_CODE_COUNTERS TABLE
+-- ============================================
+-- Game code allocator har bir jarayon uchun shu qatordan blok band qiladi
+CREATE TABLE IF NOT EXISTS game_code_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    next_value BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- 8. GAME_SESSIONS_ARCHIVE TABLE
+-- ============================================
+-- Janitor tugagan sessiyalarni game_sessions dan shu yerga ko'chiradi
+CREATE TABLE IF NOT EXISTS game_sessions_archive (
+    archive_id INT AUTO_INCREMENT PRIMARY KEY,
+    session_id INT NOT NULL,
+    game_code VARCHAR(20) NOT NULL,
+    quiz_id INT NULL,
+    host_id INT NULL,
+    players JSON NULL,
+    status VARCHAR(20) NULL,
+    created_at DATETIME NULL,
+    updated_at DATETIME NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_session (session_id),
+    INDEX idx_game_code (game_code)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -137,6 +207,10 @@ DESCRIBE users;
 DESCRIBE quizzes;
 DESCRIBE quiz_history;
 DESCRIBE game_sessions;
+DESCRIBE questions;
+DESCRIBE user_stats;
+DESCRIBE game_code_counters;
+DESCRIBE game_sessions_archive;
 
 -- ============================================
 -- SUCCESS MESSAGE
@@ -0,0 +1,204 @@
+"""
+Eskirgan o'yin sessiyalarini tozalash
+
+Har JANITOR_INTERVAL sekundda: SESSION_IDLE_TTL davomida faolliksiz sessiyalar tugatiladi,
+SESSION_ARCHIVE_AFTER dan eski tugagan sessiyalar game_sessions_archive ga ko'chiriladi.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from event_log import event_log
+from metrics import PrometheusWriter
+from models import GameSession, GameSessionArchive, Quiz
+from quiz_cache import quiz_cache
+from realtime import game_hub
+from round_scheduler import round_scheduler
+from scoring import score_buffer
+from session_store import session_registry
+
+logger = logging.getLogger("quiz.janitor")
+
+JANITOR_ENABLED = os.getenv("JANITOR_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "300"))
+JANITOR_BATCH = int(os.getenv("JANITOR_BATCH", "500"))
+JANITOR_MAX_CHUNKS = int(os.getenv("JANITOR_MAX_CHUNKS", "20"))  # bitta ishga tushishda, har bir pass uchun
+JANITOR_CHUNK_PAUSE = float(os.getenv("JANITOR_CHUNK_PAUSE", "0.05"))
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "7200"))
+SESSION_ARCHIVE_AFTER = int(os.getenv("SESSION_ARCHIVE_AFTER", "86400"))
+
+ARCHIVED_COLUMNS = ("game_code", "quiz_id", "host_id", "players", "status", "created_at", "updated_at")
+
+
+class Janitor:
+    def __init__(self, batch_size: int = JANITOR_BATCH, max_chunks: int = JANITOR_MAX_CHUNKS):
+        self.batch_size = batch_size
+        self.max_chunks = max_chunks
+        self.runs = 0
+        self.expired = 0
+        self.archived = 0
+        self.conflicts = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- expire ----------
+
+    def _expire_chunk(self, cutoff: datetime, after: int) -> List[int]:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(GameSession.id, GameSession.game_code)
+                .where(GameSession.is_active.is_(True), GameSession.updated_at < cutoff, GameSession.id > after)
+                .order_by(GameSession.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return []
+
+            # Live store'da yopiladi - shu paytdan join rad etiladi
+            expired = [row for row in rows if session_registry.expire(row.game_code, cutoff)]
+            if expired:
+                ids = [row.id for row in expired]
+                codes = [row.game_code for row in expired]
+                db.execute(
+                    update(GameSession)
+                    .where(GameSession.id.in_(ids))
+                    .values(is_active=False, status="finished", updated_at=datetime.utcnow())
+                )
+                db.execute(update(Quiz).where(Quiz.game_code.in_(codes)).values(is_active=False))
+                db.commit()
+                for code in codes:
+                    self._forget(code)
+                self.expired += len(expired)
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _forget(game_code: str):
+        session_registry.discard(game_code)
+        round_scheduler.cancel(game_code)
+        score_buffer.discard(game_code)
+        quiz_cache.invalidate(game_code)
+        event_log.append(game_code, "end", {"expired": True})
+        game_hub.publish(game_code, "status", {"status": "finished", "is_active": False})
+
+    # ---------- archive ----------
+
+    def _archive_chunk(self, cutoff: datetime, after: int) -> List[int]:
+        db = SessionLocal()
+        try:
+            sessions: List[GameSession] = db.execute(
+                select(GameSession)
+                .where(GameSession.is_active.is_(False), GameSession.updated_at < cutoff, GameSession.id > after)
+                .order_by(GameSession.id)
+                .limit(self.batch_size)
+                .with_for_update()
+            ).scalars().all()
+            if not sessions:
+                return []
+
+            ids = [session.id for session in sessions]
+            deleted = db.execute(delete(GameSession).where(GameSession.id.in_(ids))).rowcount
+            if deleted != len(ids):
+                # Boshqa worker shu qatorlarning bir qismini ko'chirib bo'lgan
+                db.rollback()
+                self.conflicts += 1
+                return ids
+
+            now = datetime.utcnow()
+            db.execute(insert(GameSessionArchive), [
+                {"session_id": s.id, "archived_at": now, **{c: getattr(s, c) for c in ARCHIVED_COLUMNS}}
+                for s in sessions
+            ])
+            db.commit()
+            self.archived += len(ids)
+            return ids
+        except DBAPIError:
+            # SQLite: eskirgan snapshot ustida yozish - keyingi safar qayta urinamiz
+            db.rollback()
+            self.conflicts += 1
+            return []
+        finally:
+            db.close()
+
+    # ---------- run ----------
+
+    def _drain(self, chunk, cutoff: datetime):
+        # Keyset (id > oxirgi): o'tkazib yuborilgan qatorlar qayta tanlanmaydi
+        after = 0
+        for _ in range(self.max_chunks):
+            ids = chunk(cutoff, after)
+            if len(ids) < self.batch_size:
+                return
+            after = ids[-1]
+            time.sleep(JANITOR_CHUNK_PAUSE)  # boshqa yozuvchilarga navbat
+
+    def run_once(self, now: Optional[datetime] = None) -> dict:
+        """Bitta to'liq tozalash (threadpool'da); shu ishga tushishdagi natija"""
+        now = now or datetime.utcnow()
+        started = time.perf_counter()
+        expired, archived = self.expired, self.archived
+
+        # Xotiradagi yozilmagan faollik avval DB ga tushadi
+        session_registry.flush()
+        self._drain(self._expire_chunk, now - timedelta(seconds=SESSION_IDLE_TTL))
+        self._drain(self._archive_chunk, now - timedelta(seconds=SESSION_ARCHIVE_AFTER))
+
+        self.runs += 1
+        self.last_duration = time.perf_counter() - started
+        result = {"expired": self.expired - expired, "archived": self.archived - archived}
+        if result["expired"] or result["archived"]:
+            logger.info("Janitor expired %(expired)d and archived %(archived)d sessions", result)
+        return result
+
+    async def _loop(self):
+        while True:
+            # Workerlar bir vaqtda uyg'onmasligi uchun jitter
+            await asyncio.sleep(JANITOR_INTERVAL * random.uniform(0.8, 1.2))
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                self.errors += 1
+                logger.exception("Janitor run failed")
+
+    def start(self):
+        if JANITOR_ENABLED and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---------- metrikalar ----------
+
+    def write(self, writer: PrometheusWriter):
+        for name, kind, help_text, value in (
+            ("quiz_janitor_runs_total", "counter", "Completed janitor runs", self.runs),
+            ("quiz_janitor_expired_total", "counter", "Idle game sessions expired", self.expired),
+            ("quiz_janitor_archived_total", "counter", "Game sessions moved to game_sessions_archive", self.archived),
+            ("quiz_janitor_conflicts_total", "counter", "Chunks skipped because another worker got there first",
+             self.conflicts),
+            ("quiz_janitor_errors_total", "counter", "Failed janitor runs", self.errors),
+            ("quiz_janitor_last_run_seconds", "gauge", "Duration of the last janitor run", self.last_duration),
+        ):
+            writer.sample(name, kind, help_text, value)
+
+
+janitor = Janitor()
@@ -0,0 +1,109 @@
+"""
+Inkremental leaderboard
+
+O'yinchilar ochko bo'yicha Fenwick daraxtida sanaladi: yangilash, o'rin va top-K - O(log S).
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+class Leaderboard:
+    def __init__(self, max_score: int = 0):
+        self._size = 1
+        while self._size < max_score + 1:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        self._scores: Dict[str, int] = {}
+        # Bir xil balldagi o'yinchilar - shu ballga birinchi yetgan oldinda
+        self._buckets: Dict[int, Dict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, player: str) -> bool:
+        return player in self._scores
+
+    # ---------- Fenwick tree ----------
+
+    def _add(self, score: int, delta: int):
+        i = score + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_upto(self, score: int) -> int:
+        """score dan oshmagan ballli o'yinchilar soni"""
+        i = min(score + 1, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _kth_smallest(self, k: int) -> int:
+        """k-chi (1 dan) eng kichik ball"""
+        pos = 0
+        step = self._size
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step //= 2
+        return pos
+
+    def _grow(self, score: int):
+        while self._size < score + 1:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        for value, bucket in self._buckets.items():
+            self._add(value, len(bucket))
+
+    # ---------- public API ----------
+
+    def score(self, player: str) -> Optional[int]:
+        return self._scores.get(player)
+
+    def update(self, player: str, score: int):
+        """O'yinchining umumiy balini o'rnatish"""
+        old = self._scores.get(player)
+        if old == score:
+            return
+        if old is not None:
+            bucket = self._buckets[old]
+            del bucket[player]
+            if not bucket:
+                del self._buckets[old]
+            self._add(old, -1)
+
+        if score + 1 > self._size:
+            self._grow(score)
+        self._scores[player] = score
+        self._buckets.setdefault(score, {})[player] = None
+        self._add(score, 1)
+
+    def rank(self, player: str) -> Optional[int]:
+        """1 + undan ko'p ball to'plaganlar soni (teng ballar bir xil o'rin oladi)"""
+        score = self._scores.get(player)
+        if score is None:
+            return None
+        return 1 + len(self._scores) - self._count_upto(score)
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[int, str, int]]:
+        """Eng yaxshi k ta o'yinchi: (rank, player, score)"""
+        n = len(self._scores)
+        if k is None or k > n:
+            k = n
+
+        entries = []
+        seen = 0
+        while len(entries) < k:
+            # (seen + 1)-chi eng yaxshi = (n - seen)-chi eng kichik
+            score = self._kth_smallest(n - seen)
+            rank = seen + 1
+            for player in self._buckets[score]:
+                if len(entries) == k:
+                    break
+                entries.append((rank, player, score))
+            seen += len(self._buckets[score])
+        return entries
@@ -1,29 +1,102 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import timedelta
-import random
-import string
 
-from database import engine, get_db, Base
-from models import User, Quiz, QuizHistory, GameSession
+from database import (
+    engine, async_engine, get_db, Base, DB_BACKEND, SessionLocal,
+    DB_CREATE_TABLES, warm_pool, awarm_pool, ping, aping
+)
+from pool_metrics import pool_status
+from metrics import PROMETHEUS_CONTENT_TYPE
+from request_metrics import RequestMetricsMiddleware, render_prometheus
+from ratelimit import rate_limiter, client_ip
+from game_codes import game_code_allocator, is_code_collision, GAME_CODE_ATTEMPTS
+from models import User, Quiz, QuizHistory, UserStats
 from schemas import (
     UserCreate, UserResponse, UserUpdate, Token, LoginRequest,
-    QuizCreate, QuizResponse, QuizHistoryCreate, QuizHistoryResponse,
-    JoinGameRequest, GameSessionResponse
+    QuizCreate, QuizResponse, PlayerQuizResponse, QuestionResponse, QuizHistoryCreate, QuizHistoryResponse,
+    QuizSummaryPage, QuizHistoryPage, UserStatsResponse
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, get_current_admin, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_access_token, preload_crypto,
+    get_current_user, get_current_admin, get_token_user, get_cached_user,
+    invalidate_user, TokenUser, ACCESS_TOKEN_EXPIRE_MINUTES
 )
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-from routes import game_routes
-
-
-app = FastAPI(title="Quiz Game API", version="1.0.0")
+from routes import game_routes, ws_routes
+from session_store import session_registry
+from realtime import game_hub
+from event_log import event_log
+from janitor import janitor
+from round_scheduler import round_scheduler
+from quiz_cache import quiz_cache
+from serialization import JSONBytesResponse
+from stats import record_history, stats_response
+from quiz_io import (
+    ImportReport, read_batches, import_batch, export_quizzes,
+    QUIZ_IMPORT_BATCH, QUIZ_IMPORT_MAX_BATCH, NDJSON_MEDIA_TYPE
+)
+from question_store import (
+    stored_json, save_questions, load_questions, load_question, quiz_with_questions, player_question
+)
+from pagination import (
+    history_page_query, quiz_summary_page_query, make_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from password_pool import password_pool, hash_password_async, verify_password_async
+
+logger = logging.getLogger("quiz.startup")
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "2"))
+
+
+async def warm_up():
+    """Jadvallar (faqat DB_CREATE_TABLES=true da), pool va lazy crypto modullarini isitish"""
+    # jose/passlib importda yuklanmaydi; birinchi login ularni kutmasligi uchun shu yerda
+    await run_in_threadpool(preload_crypto)
+    try:
+        if DB_CREATE_TABLES:
+            await run_in_threadpool(Base.metadata.create_all, bind=engine)
+        warmed = await run_in_threadpool(warm_pool, engine)
+        if async_engine is not None:
+            warmed += await awarm_pool(async_engine)
+        logger.info("DB pool warmed with %d connections", warmed)
+    except Exception as e:
+        # DB sekin yoki yo'q - app baribir ko'tariladi, /ready esa 503 qaytaradi
+        logger.warning("Database startup failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # fork boshqa threadlar lock ushlab turgan paytga to'g'ri kelmasligi uchun birinchi
+    password_pool.start()
+    game_hub.bind_loop(asyncio.get_running_loop())
+    game_hub.start()
+    session_registry.start()
+    event_log.start()
+    janitor.start()
+    round_scheduler.start()
+    # Isitish fonda: /health darhol javob beradi, /ready tugashini kutadi
+    app.state.warmup = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        app.state.warmup.cancel()
+        await janitor.stop()
+        await round_scheduler.stop()
+        session_registry.stop()
+        game_hub.stop()
+        event_log.stop()  # navbatdagi hodisalar diskka yoziladi
+        password_pool.shutdown()
+
+
+app = FastAPI(title="Quiz Game API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -33,24 +106,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Har bir so'rov: latency, SQL so'rovlar soni, DB vaqti, javob hajmi (route bo'yicha)
+app.add_middleware(RequestMetricsMiddleware)
 
-app.include_router(game_routes.router)
-# Generate random game code
-def generate_game_code():
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+# Sinxron HTTP handlerlar; DB_BACKEND=async da ular o'rniga async_routes ulanadi
+sync_router = APIRouter()
 
 
 # ==================== AUTH ENDPOINTS ====================
 
-@app.post("/api/auth/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user_data.email).first():
+def _ensure_user_available(db: Session, email: str, nickname: str):
+    if db.query(User).filter(User.email == email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    if db.query(User).filter(User.nickname == user_data.nickname).first():
+    if db.query(User).filter(User.nickname == nickname).first():
         raise HTTPException(status_code=400, detail="Nickname already taken")
 
-    hashed_password = get_password_hash(user_data.password)
+
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     new_user = User(
         email=user_data.email,
         nickname=user_data.nickname,
@@ -61,46 +134,72 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    return new_user
+
+
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
 
+def _token_response(user: User) -> dict:
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        user_id=new_user.id, expires_delta=access_token_expires
+        user_id=user.id, expires_delta=access_token_expires, role=user.role
     )
 
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": new_user
+        "user": user
     }
 
 
-@app.post("/api/auth/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+# 🔐 bcrypt alohida process pool'da ishlaydi, DB so'rovlari threadpool'da
+@sync_router.post("/api/auth/register", response_model=Token)
+async def register(
+        user_data: UserCreate,
+        ip: str = Depends(client_ip),
+        db: Session = Depends(get_db)
+):
+    rate_limiter.check("auth_register", ip=ip)
+    await run_in_threadpool(_ensure_user_available, db, user_data.email, user_data.nickname)
+
+    hashed_password = await hash_password_async(user_data.password)
+    new_user = await run_in_threadpool(_create_user, db, user_data, hashed_password)
+
+    return _token_response(new_user)
+
+
+@sync_router.post("/api/auth/login", response_model=Token)
+async def login(
+        login_data: LoginRequest,
+        ip: str = Depends(client_ip),
+        db: Session = Depends(get_db)
+):
+    # 🔹 bcrypt qimmat - limit undan oldin tekshiriladi
+    rate_limiter.check("auth_login", ip=ip, user=login_data.email.lower())
+    user = await run_in_threadpool(_get_user_by_email, db, login_data.email)
+    if not user or not await verify_password_async(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        user_id=user.id, expires_delta=access_token_expires
-    )
-
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return _token_response(user)
 
 
-@app.get("/api/auth/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+@sync_router.get("/api/auth/me", response_model=UserResponse)
+def get_me(
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    user = get_cached_user(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
-@app.put("/api/auth/profile", response_model=UserResponse)
+@sync_router.put("/api/auth/profile", response_model=UserResponse)
 def update_profile(
         updates: UserUpdate,
         current_user: User = Depends(get_current_user),
@@ -121,145 +220,146 @@ def update_profile(
 
     db.commit()
     db.refresh(current_user)
+    invalidate_user(current_user.id)
     return current_user
 
 
 # ==================== QUIZ ENDPOINTS ====================
 
-@app.post("/api/quiz/create", response_model=QuizResponse)
+@sync_router.post("/api/quiz/create", response_model=QuizResponse, response_class=JSONBytesResponse)
 def create_quiz(
         quiz_data: QuizCreate,
-        current_user: User = Depends(get_current_user),
+        current_user: TokenUser = Depends(get_token_user),
         db: Session = Depends(get_db)
 ):
-    game_code = generate_game_code()
-    while db.query(Quiz).filter(Quiz.game_code == game_code).first():
-        game_code = generate_game_code()
-
     # ✅ alias bilan saqlash
     questions_dict = [q.dict(by_alias=True) for q in quiz_data.questions]
 
-    new_quiz = Quiz(
-        title=quiz_data.title,
-        game_code=game_code,
-        questions=questions_dict,
-        creator_id=current_user.id
-    )
-    db.add(new_quiz)
-    db.commit()
+    # ✅ Kod allocator'dan olinadi (DB ga tekshiruv so'rovisiz)
+    for _ in range(GAME_CODE_ATTEMPTS):
+        game_code = game_code_allocator.allocate()
+        new_quiz = Quiz(
+            title=quiz_data.title,
+            game_code=game_code,
+            questions=stored_json(questions_dict),
+            creator_id=current_user.id
+        )
+        db.add(new_quiz)
+        try:
+            db.flush()
+            save_questions(db, new_quiz.id, questions_dict)
+            db.commit()
+            break
+        except IntegrityError as exc:
+            db.rollback()
+            if not is_code_collision(exc):
+                game_code_allocator.release(game_code)
+                raise
+            # Eski tasodifiy kod bilan to'qnashdi - keyingisini olamiz
+        except Exception:
+            db.rollback()
+            game_code_allocator.release(game_code)
+            raise
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate a game code")
     db.refresh(new_quiz)
 
-    return new_quiz
+    # ✅ JSON bir marta yaratiladi va keshda qoladi
+    return JSONBytesResponse(quiz_cache.put(new_quiz, questions_dict).response_body())
 
 
-@app.get("/api/quiz/{game_code}", response_model=QuizResponse)
-def get_quiz(game_code: str, db: Session = Depends(get_db)):
-    quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    return quiz
-
-
-@app.get("/api/quiz/user/created", response_model=List[QuizResponse])
-def get_user_quizzes(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+# ✅ NDJSON: har bir qator - bitta QuizCreate
+@sync_router.post("/api/quiz/import")
+async def import_quizzes(
+        request: Request,
+        batch_size: int = Query(QUIZ_IMPORT_BATCH, ge=1, le=QUIZ_IMPORT_MAX_BATCH),
+        current_user: TokenUser = Depends(get_token_user)
 ):
-    quizzes = db.query(Quiz).filter(Quiz.creator_id == current_user.id).all()
-    return quizzes
+    report = ImportReport()
+    db = SessionLocal()
+    try:
+        async for lines in read_batches(request.stream(), report, batch_size):
+            await run_in_threadpool(import_batch, db, lines, current_user.id, report)
+    finally:
+        db.close()
+    return report.as_dict()
+
 
+# ✅ /api/quiz/{game_code} dan oldin turishi kerak
+@sync_router.get("/api/quiz/export")
+def export_my_quizzes(current_user: TokenUser = Depends(get_token_user)):
+    return StreamingResponse(export_quizzes(SessionLocal, current_user.id), media_type=NDJSON_MEDIA_TYPE)
 
-# ==================== GAME SESSION ENDPOINTS ====================
 
-@app.post("/api/game/start/{game_code}")
-def start_game(
+@sync_router.get("/api/quiz/{game_code}", response_model=QuizResponse, response_class=JSONBytesResponse)
+def get_quiz(
         game_code: str,
-        current_user: User = Depends(get_current_user),
+        current_user: TokenUser = Depends(get_token_user),
         db: Session = Depends(get_db)
 ):
-    quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
+    quiz = quiz_cache.get(db, game_code)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-
-    if quiz.creator_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the host can start the game")
-
-    quiz.is_active = True
-    db.commit()
-    db.refresh(quiz)
-
-    return {"message": "Game started", "game_code": quiz.game_code}
+    # 🔒 correctAnswer bilan to'liq quiz faqat egasiga (yoki admin); o'yinchilar /player dan oladi
+    if current_user.role != "admin" and quiz.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the quiz creator can see the answers")
+    return JSONBytesResponse(quiz.response_body())
 
 
-@app.post("/api/game/join", response_model=GameSessionResponse)
-def join_game(
-        join_data: JoinGameRequest,
-        db: Session = Depends(get_db)
-):
-    quiz = db.query(Quiz).filter(Quiz.game_code == join_data.game_code).first()
+@sync_router.get("/api/quiz/{game_code}/player", response_model=PlayerQuizResponse, response_class=JSONBytesResponse)
+def get_player_quiz(game_code: str, db: Session = Depends(get_db)):
+    quiz = quiz_cache.get(db, game_code)
     if not quiz:
-        raise HTTPException(status_code=404, detail="Game not found")
-
-    if not quiz.is_active:
-        raise HTTPException(status_code=403, detail="Game is not active")
-
-    session = db.query(GameSession).filter(GameSession.game_code == join_data.game_code).first()
-    if not session:
-        session = GameSession(
-            game_code=join_data.game_code,
-            quiz_id=quiz.id,
-            host_id=quiz.creator_id,
-            players=[join_data.player_name]
-        )
-        db.add(session)
-    else:
-        players = session.players or []
-        if join_data.player_name not in players:
-            players.append(join_data.player_name)
-            session.players = players
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return JSONBytesResponse(quiz.player_body())
 
-    db.commit()
-    db.refresh(session)
 
-    return {
-        "game_code": session.game_code,
-        "players": session.players,
-        "status": session.status,
-        "host_id": session.host_id,
-        "quiz": quiz
-    }
+@sync_router.get("/api/quiz/{game_code}/question/{n}", response_model=QuestionResponse)
+def get_question(game_code: str, n: int, db: Session = Depends(get_db)):
+    # ✅ Keshda bo'lmasa, table rejimida faqat bitta savol qatori o'qiladi
+    quiz = quiz_cache.peek(game_code)
+    if quiz is None:
+        row = load_question(db, game_code, n)
+        if row is not None:
+            return {"index": n, "total": row.total, "question": player_question(row.payload)}
+        quiz = quiz_cache.get(db, game_code)
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
 
+    if not 0 <= n < len(quiz.questions):
+        raise HTTPException(status_code=404, detail="Question not found")
+    return {"index": n, "total": len(quiz.questions), "question": player_question(quiz.questions[n])}
 
-@app.get("/api/game/{game_code}/session", response_model=GameSessionResponse)
-def get_game_session(game_code: str, db: Session = Depends(get_db)):
-    quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Game not found")
 
-    if not quiz.is_active:
-        raise HTTPException(status_code=403, detail="Game is not active")
+@sync_router.get("/api/quiz/user/created", response_model=List[QuizResponse])
+def get_user_quizzes(
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    quizzes = db.query(Quiz).filter(Quiz.creator_id == current_user.id).all()
+    # questions deferred - hammasi bitta so'rovda
+    questions = load_questions(db, [quiz.id for quiz in quizzes])
+    return [quiz_with_questions(quiz, questions[quiz.id]) for quiz in quizzes]
 
-    session = db.query(GameSession).filter(GameSession.game_code == game_code).first()
-    if not session:
-        session = GameSession(
-            game_code=game_code,
-            quiz_id=quiz.id,
-            host_id=quiz.creator_id,
-            players=[]
-        )
-        db.add(session)
-        db.commit()
-        db.refresh(session)
 
-    return session
+@sync_router.get("/api/quiz/user/created/page", response_model=QuizSummaryPage)
+def get_user_quizzes_page(
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    # ✅ questions JSON o'qilmaydi, (created_at, id) bo'yicha keyset
+    rows = db.execute(quiz_summary_page_query(current_user.id, cursor, limit)).all()
+    return make_page(rows, limit, "created_at")
 
 
 # ==================== QUIZ HISTORY ENDPOINTS ====================
 
-@app.post("/api/history/add")
+@sync_router.post("/api/history/add")
 def add_quiz_history(
         history_data: QuizHistoryCreate,
-        current_user: User = Depends(get_current_user),
+        current_user: TokenUser = Depends(get_token_user),
         db: Session = Depends(get_db)
 ):
     new_history = QuizHistory(
@@ -269,16 +369,19 @@ def add_quiz_history(
         score=history_data.score,
         total_questions=history_data.total_questions,
         rank=history_data.rank,
-        participants_count=history_data.participants_count
+        participants_count=history_data.participants_count,
+        correct_answers=history_data.correct_answers
     )
     db.add(new_history)
+    # ✅ user_stats shu tranzaksiyada yangilanadi
+    record_history(db, [history_data.model_dump() | {"user_id": current_user.id}])
     db.commit()
     return {"message": "History saved successfully"}
 
 
-@app.get("/api/history/me", response_model=List[QuizHistoryResponse])
+@sync_router.get("/api/history/me", response_model=List[QuizHistoryResponse])
 def get_my_history(
-        current_user: User = Depends(get_current_user),
+        current_user: TokenUser = Depends(get_token_user),
         db: Session = Depends(get_db)
 ):
     history = db.query(QuizHistory).filter(
@@ -287,6 +390,27 @@ def get_my_history(
     return history
 
 
+@sync_router.get("/api/history/me/page", response_model=QuizHistoryPage)
+def get_my_history_page(
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    rows = db.execute(history_page_query(current_user.id, cursor, limit)).scalars().all()
+    return make_page(rows, limit, "played_at")
+
+
+# ==================== STATS ENDPOINTS ====================
+
+@sync_router.get("/api/stats/me", response_model=UserStatsResponse)
+def get_my_stats(
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    return stats_response(current_user.id, db.get(UserStats, current_user.id))
+
+
 # ==================== HEALTH CHECK ====================
 
 @app.get("/")
@@ -296,4 +420,68 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    """Liveness: jarayon tirik (DB ga bog'liq emas)"""
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: startup tugagan va DB READY_TIMEOUT ichida javob beradi"""
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is None or not warmup.done():
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        if async_engine is not None:
+            await asyncio.wait_for(aping(async_engine), READY_TIMEOUT)
+        else:
+            await asyncio.wait_for(run_in_threadpool(ping, engine), READY_TIMEOUT)
+    except Exception:
+        return JSONResponse(status_code=503, content={"status": "database unavailable"})
+    return {"status": "ready"}
+
+
+@app.get("/api/system/db-pool")
+def db_pool_metrics():
+    """Pool holati: band ulanishlar, overflow, kutish vaqti histogrammasi"""
+    pools = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+    return pools
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: route metrikalari, DB pool, quiz cache, rate limit, event log, janitor, round taymerlari"""
+    pools = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+    return PlainTextResponse(render_prometheus(pools, quiz_cache, rate_limiter, event_log, janitor, round_scheduler),
+                             media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# ==================== ROUTERS ====================
+
+if DB_BACKEND == "async":
+    from routes import async_routes
+    app.include_router(async_routes.router)
+else:
+    app.include_router(sync_router)
+    app.include_router(game_routes.router)
+app.include_router(ws_routes.router)
+
+
+def assert_unique_routes(routes):
+    """Har bir (method, path) ni aynan bitta handler xizmat qiladi - aks holda ishga tushmaydi"""
+    seen = {}
+    for route in routes:
+        methods = getattr(route, "methods", None) or {"WEBSOCKET"}
+        for method in methods:
+            key = (method, route.path)
+            if key in seen:
+                raise RuntimeError(
+                    f"{method} {route.path} is served by both {seen[key]} and {route.name}"
+                )
+            seen[key] = route.name
+
+
+assert_unique_routes(app.routes)
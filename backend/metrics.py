@@ -0,0 +1,92 @@
+"""Oddiy in-process metrikalar (counter, histogram, Prometheus matni)"""
+
+import bisect
+import threading
+from typing import Sequence
+
+# Sekundlarda (latency uchun)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus uslubida)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # oxirgisi +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total, maximum = self.count, self.sum, self.max
+
+        cumulative = []
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative.append(("+Inf" if bound == float("inf") else bound, running))
+        return {"count": count, "sum": total, "max": maximum, "buckets": cumulative}
+
+
+# ==================== PROMETHEUS TEXT FORMAT ====================
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != float("inf") else "+Inf"
+    return str(value)
+
+
+class PrometheusWriter:
+    """Metrikalarni text exposition formatida yig'ish (HELP/TYPE bir marta)"""
+
+    def __init__(self):
+        self.lines = []
+        self._declared = set()
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, kind: str, help_text: str, value, labels: dict = None):
+        self._declare(name, kind, help_text)
+        self.lines.append(f"{name}{format_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, snapshot: dict, labels: dict = None):
+        self._declare(name, "histogram", help_text)
+        labels = labels or {}
+        for bound, count in snapshot["buckets"]:
+            le = bound if bound == "+Inf" else _number(float(bound))
+            self.lines.append(f"{name}_bucket{format_labels({**labels, 'le': le})} {count}")
+        self.lines.append(f"{name}_sum{format_labels(labels)} {_number(float(snapshot['sum']))}")
+        self.lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+game_sessions: janitor uchun updated_at ustuni, indeks va arxiv jadvali
+
+Mavjud bazada game_sessions.updated_at ustuni qo'shiladi va created_at dan
+id bo'yicha BATCH qatordan to'ldiriladi, (is_active, updated_at) indeksi va
+game_sessions_archive jadvali yaratiladi. Qayta ishga tushirish xavfsiz.
+updated_at NULL bo'lgan qatorlarga janitor tegmaydi.
+
+Usage:
+    python migrate_game_sessions.py [--batch 5000]
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import inspect, select, text, update
+
+from database import Base, SessionLocal, engine
+from models import GameSession, GameSessionArchive
+
+
+def migrate(batch_size: int = 5000) -> int:
+    Base.metadata.create_all(bind=engine, tables=[GameSessionArchive.__table__])
+
+    columns = {column["name"] for column in inspect(engine).get_columns("game_sessions")}
+    if "updated_at" not in columns:
+        print("🏗️  game_sessions.updated_at qo'shilmoqda...")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE game_sessions ADD COLUMN updated_at DATETIME NULL"))
+
+    filled = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            ids = db.execute(
+                select(GameSession.id)
+                .where(GameSession.id > last_id, GameSession.updated_at.is_(None))
+                .order_by(GameSession.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = ids[-1]
+            db.execute(
+                update(GameSession)
+                .where(GameSession.id.in_(ids))
+                .values(updated_at=GameSession.created_at)
+            )
+            db.commit()
+            filled += len(ids)
+            print(f"   ... {filled} qator to'ldirildi (id <= {last_id})")
+    finally:
+        db.close()
+
+    for index in GameSession.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    return filled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="game_sessions janitor migratsiyasi")
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  game_sessions migratsiyasi (updated_at + arxiv)")
+    print("=" * 60)
+    started = time.perf_counter()
+    try:
+        filled = migrate(args.batch)
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    print(f"✅ {filled} qator to'ldirildi ({time.perf_counter() - started:.1f} s)")
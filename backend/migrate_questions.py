@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+quizzes.questions (JSON) → questions jadvaliga ko'chirish
+
+Quizlar id bo'yicha BATCH tadan o'qiladi; questions jadvalida qatori yo'q
+har bir quiz uchun savollar position tartibida yoziladi. Qayta ishga
+tushirish xavfsiz - ko'chirilgan quizlar tashlab ketiladi.
+
+--clear-json berilsa, ko'chirilgan quizlarning JSON ustuni [] ga
+tozalanadi. Buni serverni QUESTION_STORAGE=table bilan ishga tushirgandan
+keyin qiling (json rejimi savollarni faqat JSON ustunidan o'qiydi).
+
+Usage:
+    python migrate_questions.py [--clear-json] [--batch 500]
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import insert, select, update
+
+from database import Base, SessionLocal, engine
+from models import Question, Quiz
+from question_store import question_rows
+
+
+def migrate(batch_size: int = 500, clear_json: bool = False):
+    Base.metadata.create_all(bind=engine, tables=[Question.__table__])
+
+    migrated = skipped = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            quizzes = db.execute(
+                select(Quiz.id, Quiz.questions)
+                .where(Quiz.id > last_id)
+                .order_by(Quiz.id)
+                .limit(batch_size)
+            ).all()
+            if not quizzes:
+                break
+            last_id = quizzes[-1].id
+
+            ids = [quiz.id for quiz in quizzes]
+            done = set(db.execute(
+                select(Question.quiz_id).where(Question.quiz_id.in_(ids)).distinct()
+            ).scalars())
+
+            rows = []
+            moved = []
+            for quiz in quizzes:
+                if quiz.id in done or not quiz.questions:
+                    skipped += 1
+                    continue
+                rows.extend(question_rows(quiz.id, quiz.questions))
+                moved.append(quiz.id)
+
+            if rows:
+                db.execute(insert(Question), rows)
+            if clear_json:
+                # Allaqachon ko'chirilganlar ham tozalanadi
+                cleared = moved + [quiz_id for quiz_id in ids if quiz_id in done]
+                if cleared:
+                    db.execute(update(Quiz).where(Quiz.id.in_(cleared)).values(questions=[]))
+            db.commit()
+            migrated += len(moved)
+            print(f"   ... {migrated} ko'chirildi, {skipped} o'tkazib yuborildi (id <= {last_id})")
+    finally:
+        db.close()
+    return migrated, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quiz savollarini questions jadvaliga ko'chirish")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--clear-json", action="store_true")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Savollar migratsiyasi (quizzes.questions → questions)")
+    print("=" * 60)
+    started = time.perf_counter()
+    try:
+        migrated, skipped = migrate(args.batch, args.clear_json)
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    print(f"✅ {migrated} quiz ko'chirildi, {skipped} o'tkazib yuborildi "
+          f"({time.perf_counter() - started:.1f} s)")
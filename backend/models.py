@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, JSON, Boolean, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
 
@@ -23,11 +23,18 @@ class User(Base):
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    __table_args__ = (
+        # /api/quiz/user/created/page uchun keyset indeks
+        Index("ix_quizzes_creator_created", "creator_id", "created_at", "id"),
+        # O'yin boshlanganda hostning boshqa aktiv quizlarini topish
+        Index("ix_quizzes_creator_active", "creator_id", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     game_code = Column(String(20), unique=True, index=True, nullable=False)  # game_code uchun kifoya
-    questions = Column(JSON, nullable=False)  # Store as JSON
+    # Store as JSON; deferred - faqat kerak bo'lganda yuklanadi (QUESTION_STORAGE=table da [])
+    questions = deferred(Column(JSON, nullable=False))
     creator_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
@@ -37,8 +44,25 @@ class Quiz(Base):
     participants = relationship("QuizHistory", back_populates="quiz")
 
 
+class Question(Base):
+    """Normallashtirilgan savollar (QUESTION_STORAGE=table)"""
+    __tablename__ = "questions"
+    __table_args__ = (
+        UniqueConstraint("quiz_id", "position", name="uq_questions_quiz_position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # 0 dan boshlanadi
+    payload = Column(JSON, nullable=False)  # QuestionSchema (alias bilan)
+
+
 class QuizHistory(Base):
     __tablename__ = "quiz_history"
+    __table_args__ = (
+        # /api/history/me/page uchun keyset indeks
+        Index("ix_quiz_history_user_played", "user_id", "played_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -48,6 +72,7 @@ class QuizHistory(Base):
     total_questions = Column(Integer)
     rank = Column(Integer)
     participants_count = Column(Integer)
+    correct_answers = Column(Integer, nullable=True)  # noma'lum bo'lsa NULL (accuracy'ga kirmaydi)
     played_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -57,6 +82,10 @@ class QuizHistory(Base):
 
 class GameSession(Base):
     __tablename__ = "game_sessions"
+    __table_args__ = (
+        # Janitor: idle aktiv sessiyalar va arxivlanadigan tugaganlar
+        Index("ix_game_sessions_active_updated", "is_active", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     game_code = Column(String(20), unique=True, index=True)  # max 20 chars
@@ -65,4 +94,44 @@ class GameSession(Base):
     is_active = Column(Boolean, default=False)
     players = Column(JSON, default=[])  # List of player names
     status = Column(String(20), default="waiting")  # waiting, playing, finished
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # oxirgi faollik (join, leave, next, end)
+
+
+class GameSessionArchive(Base):
+    """Tugagan sessiyalar - janitor game_sessions dan bo'laklab ko'chiradi"""
+    __tablename__ = "game_sessions_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, nullable=False, index=True)
+    game_code = Column(String(20), nullable=False, index=True)
+    quiz_id = Column(Integer)
+    host_id = Column(Integer)
+    players = Column(JSON)
+    status = Column(String(20))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class UserStats(Base):
+    """quiz_history'dan har bir insert'da inkremental yangilanadi"""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0)
+    total_score = Column(BigInteger, nullable=False, default=0)
+    best_score = Column(Integer, nullable=True)
+    best_rank = Column(Integer, nullable=True)
+    total_questions = Column(Integer, nullable=False, default=0)
+    graded_questions = Column(Integer, nullable=False, default=0)  # correct_answers ma'lum bo'lgan o'yinlar savollari
+    correct_answers = Column(Integer, nullable=False, default=0)
+    last_played_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class GameCodeCounter(Base):
+    __tablename__ = "game_code_counters"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=0)  # keyingi bo'sh counter qiymati
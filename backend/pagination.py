@@ -0,0 +1,70 @@
+"""
+Keyset (cursor) pagination
+
+Sahifalar (timestamp, id) bo'yicha yangisidan eskisiga, OFFSET o'rniga indeks bo'yicha o'qiladi.
+"""
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select
+
+from models import Quiz, QuizHistory
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Ro'yxatlarda questions JSON o'qilmaydi
+QUIZ_SUMMARY_COLUMNS = (
+    Quiz.id, Quiz.title, Quiz.game_code, Quiz.creator_id, Quiz.created_at, Quiz.is_active,
+)
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _keyset(stmt, timestamp_column, id_column, cursor: Optional[str], limit: int):
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id),
+        ))
+    # Keyingi sahifa borligini bilish uchun bitta ortiqcha qator
+    return stmt.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def history_page_query(user_id: int, cursor: Optional[str], limit: int):
+    stmt = select(QuizHistory).where(QuizHistory.user_id == user_id)
+    return _keyset(stmt, QuizHistory.played_at, QuizHistory.id, cursor, limit)
+
+
+def quiz_summary_page_query(creator_id: int, cursor: Optional[str], limit: int):
+    stmt = select(*QUIZ_SUMMARY_COLUMNS).where(Quiz.creator_id == creator_id)
+    return _keyset(stmt, Quiz.created_at, Quiz.id, cursor, limit)
+
+
+def make_page(rows: List, limit: int, timestamp_attr: str) -> dict:
+    """limit+1 qatordan sahifa va next_cursor yasash"""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_attr), last.id)
+    return {"items": items, "next_cursor": next_cursor}
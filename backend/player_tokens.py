@@ -0,0 +1,76 @@
+"""
+O'yinchi tokenlari (anonim join va qayta ulanish)
+
+Token ism va o'yindagi slotga bog'lanadi, PLAYER_TOKEN_SECRET bilan HMAC-SHA256 imzolanadi -
+har qanday worker uni DB ga murojaatsiz tekshiradi.
+"""
+
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from auth import SECRET_KEY
+from serialization import dumps
+
+PLAYER_TOKEN_SECRET = os.getenv("PLAYER_TOKEN_SECRET", SECRET_KEY).encode()
+PLAYER_TOKEN_TTL = int(os.getenv("PLAYER_TOKEN_TTL", "86400"))
+# Faqat eski mijozlar uchun: answer/leave ni tokensiz, bare player_name bilan qabul qilish
+PLAYER_TOKEN_OPTIONAL = os.getenv("PLAYER_TOKEN_OPTIONAL", "false").lower() in ("1", "true", "yes", "on")
+
+
+class PlayerClaim(NamedTuple):
+    game_code: str
+    player_name: str
+    slot: str
+    issued: int = 0  # unix sekund
+    run: int = 0  # o'yin boshlangan vaqt (run_id) - restart'dan keyin token yaroqsiz
+
+
+def run_id(created_at: Optional[datetime]) -> int:
+    """Sessiya created_at (start vaqti) mikrosekundlarda - har bir start uchun yangi"""
+    if created_at is None:
+        return 0
+    return calendar.timegm(created_at.utctimetuple()) * 1_000_000 + created_at.microsecond
+
+
+def new_slot() -> str:
+    return secrets.token_hex(4)
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return _b64encode(hmac.new(PLAYER_TOKEN_SECRET, payload, hashlib.sha256).digest())
+
+
+def issue(game_code: str, player_name: str, slot: str, run: int) -> str:
+    payload = _b64encode(dumps([game_code, player_name, slot, int(time.time()), run]))
+    return (payload + b"." + _sign(payload)).decode("ascii")
+
+
+def verify(token: str, game_code: str) -> Optional[PlayerClaim]:
+    """Imzo to'g'ri va token shu o'yin uchun bo'lsa claim, aks holda None"""
+    payload, _, signature = token.encode("utf-8").partition(b".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claim = PlayerClaim(*json.loads(_b64decode(payload)))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if claim.game_code != game_code or time.time() - claim.issued > PLAYER_TOKEN_TTL:
+        return None
+    return claim
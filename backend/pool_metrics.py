@@ -0,0 +1,98 @@
+"""
+Connection pool metrikalari
+
+InstrumentedQueuePool checkout vaqtini (kutish bilan) va timeoutlarni o'lchaydi.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from metrics import Histogram
+
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkout_latency = Histogram(CHECKOUT_BUCKETS)
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _TimedCheckoutMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # engine.dispose() yangi pool yaratadi - metrikalar (va listenerlar) o'sha obyektda qoladi
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.incr("timeouts")
+            raise
+        finally:
+            self.metrics.checkout_latency.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine) -> PoolMetrics:
+    """Engine pool'iga event listenerlarni ulash"""
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        # Instrumentlanmagan pool (masalan SQLite :memory:) - faqat eventlar
+        metrics = pool.metrics = PoolMetrics()
+
+    event.listen(pool, "connect", lambda *args: metrics.incr("connects"))
+    event.listen(pool, "checkout", lambda *args: metrics.incr("checkouts"))
+    event.listen(pool, "checkin", lambda *args: metrics.incr("checkins"))
+    event.listen(pool, "invalidate", lambda *args: metrics.incr("invalidations"))
+    return metrics
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    metrics: PoolMetrics = pool.metrics
+    status = {
+        "pool_class": type(pool).__name__,
+        "connects": metrics.connects,
+        "checkouts": metrics.checkouts,
+        "checkins": metrics.checkins,
+        "invalidations": metrics.invalidations,
+        "timeouts": metrics.timeouts,
+        "checkout_latency": metrics.checkout_latency.snapshot(),
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        })
+    return status
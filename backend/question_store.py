@@ -0,0 +1,123 @@
+"""
+Savollarni saqlash
+
+QUESTION_STORAGE=json (default) - quizzes.questions JSON ustunida,
+QUESTION_STORAGE=table - questions jadvalida (quiz_id, position) bo'yicha.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Question, Quiz
+
+QUESTION_STORAGE = os.getenv("QUESTION_STORAGE", "json").lower()
+
+
+def use_table() -> bool:
+    return QUESTION_STORAGE == "table"
+
+
+def question_rows(quiz_id: int, questions: List[dict]) -> List[dict]:
+    return [
+        {"quiz_id": quiz_id, "position": position, "payload": payload}
+        for position, payload in enumerate(questions)
+    ]
+
+
+def stored_json(questions: List[dict]) -> List[dict]:
+    """quizzes.questions ustuniga nima yoziladi"""
+    return [] if use_table() else questions
+
+
+def save_questions(db: Session, quiz_id: int, questions: List[dict]):
+    if use_table() and questions:
+        db.execute(insert(Question), question_rows(quiz_id, questions))
+
+
+async def asave_questions(db: AsyncSession, quiz_id: int, questions: List[dict]):
+    if use_table() and questions:
+        await db.execute(insert(Question), question_rows(quiz_id, questions))
+
+
+def _table_query(quiz_ids: Iterable[int]):
+    return (
+        select(Question.quiz_id, Question.payload)
+        .where(Question.quiz_id.in_(list(quiz_ids)))
+        .order_by(Question.quiz_id, Question.position)
+    )
+
+
+def _json_query(quiz_ids: Iterable[int]):
+    return select(Quiz.id, Quiz.questions).where(Quiz.id.in_(list(quiz_ids)))
+
+
+def _group(rows) -> Dict[int, List[dict]]:
+    grouped: Dict[int, List[dict]] = {}
+    for quiz_id, payload in rows:
+        grouped.setdefault(quiz_id, []).append(payload)
+    return grouped
+
+
+def load_questions(db: Session, quiz_ids: List[int]) -> Dict[int, List[dict]]:
+    """quiz_id -> savollar ro'yxati (tartib bilan)"""
+    if not quiz_ids:
+        return {}
+    loaded = _group(db.execute(_table_query(quiz_ids))) if use_table() else {}
+    missing = [quiz_id for quiz_id in quiz_ids if quiz_id not in loaded]
+    if missing:
+        loaded.update(db.execute(_json_query(missing)).all())
+    return loaded
+
+
+async def aload_questions(db: AsyncSession, quiz_ids: List[int]) -> Dict[int, List[dict]]:
+    if not quiz_ids:
+        return {}
+    loaded = _group(await db.execute(_table_query(quiz_ids))) if use_table() else {}
+    missing = [quiz_id for quiz_id in quiz_ids if quiz_id not in loaded]
+    if missing:
+        loaded.update((await db.execute(_json_query(missing))).all())
+    return loaded
+
+
+def _question_query(game_code: str, position: int):
+    quiz_id = select(Quiz.id).where(Quiz.game_code == game_code).scalar_subquery()
+    total = (
+        select(func.count()).select_from(Question).where(Question.quiz_id == quiz_id).scalar_subquery()
+    )
+    return select(Question.payload, total.label("total")).where(
+        Question.quiz_id == quiz_id, Question.position == position
+    )
+
+
+def load_question(db: Session, game_code: str, position: int) -> Optional[tuple]:
+    """Bitta savol (payload, jami) - faqat table rejimida, topilmasa None"""
+    if not use_table():
+        return None
+    return db.execute(_question_query(game_code, position)).first()
+
+
+async def aload_question(db: AsyncSession, game_code: str, position: int) -> Optional[tuple]:
+    if not use_table():
+        return None
+    return (await db.execute(_question_query(game_code, position))).first()
+
+
+def quiz_with_questions(quiz: Quiz, questions: List[dict]) -> dict:
+    """QuizResponse uchun dict (deferred questions'ga tegmasdan)"""
+    return {
+        "id": quiz.id,
+        "title": quiz.title,
+        "game_code": quiz.game_code,
+        "questions": questions,
+        "creator_id": quiz.creator_id,
+        "created_at": quiz.created_at,
+        "is_active": quiz.is_active,
+    }
+
+
+def player_question(payload: dict) -> dict:
+    return {key: value for key, value in payload.items() if key != "correctAnswer"}
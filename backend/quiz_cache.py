@@ -0,0 +1,157 @@
+"""
+game_code bo'yicha quizlar keshi
+
+Quiz yaratilgandan keyin o'zgarmaydi, faqat is_active alohida saqlanadi.
+Hajm QUIZ_CACHE_SIZE (LRU) va QUIZ_CACHE_TTL bilan cheklangan.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+
+from models import Quiz
+from question_store import load_questions, aload_questions, use_table
+from schemas import QuizResponse
+from serialization import dumps
+
+QUIZ_CACHE_SIZE = int(os.getenv("QUIZ_CACHE_SIZE", "1024"))
+QUIZ_CACHE_TTL = float(os.getenv("QUIZ_CACHE_TTL", "300"))
+
+
+class CachedQuiz:
+    """Quiz qatorining o'zgarmas nusxasi (QuizResponse bilan mos)"""
+
+    __slots__ = (
+        "id", "title", "game_code", "questions", "creator_id", "created_at",
+        "_flags", "_body", "_player_body",
+    )
+
+    def __init__(self, quiz: Quiz, flags: Dict[str, bool], questions: List[dict]):
+        self.id = quiz.id
+        self.title = quiz.title
+        self.game_code = quiz.game_code
+        self.questions = questions
+        self.creator_id = quiz.creator_id
+        self.created_at = quiz.created_at
+        self._flags = flags
+        self._body: Optional[bytes] = None
+        self._player_body: Optional[bytes] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self._flags.get(self.game_code, False)
+
+    def _serialize(self):
+        # QuizResponse orqali bir marta validatsiya, is_active oxirida qo'shiladi
+        data = QuizResponse.model_validate(self).model_dump(mode="json", by_alias=True)
+        del data["is_active"]
+        body = dumps(data)
+        for question in data["questions"]:
+            del question["correctAnswer"]
+        self._player_body = dumps(data)
+        self._body = body
+
+    def _with_active(self, body: bytes) -> bytes:
+        return body[:-1] + (b',"is_active":true}' if self.is_active else b',"is_active":false}')
+
+    def response_body(self) -> bytes:
+        """To'liq QuizResponse JSON (correctAnswer bilan)"""
+        if self._body is None:
+            self._serialize()
+        return self._with_active(self._body)
+
+    def player_body(self) -> bytes:
+        """O'yinchilar uchun: correctAnswer olib tashlangan"""
+        if self._player_body is None:
+            self._serialize()
+        return self._with_active(self._player_body)
+
+
+class QuizCache:
+    def __init__(self, max_size: int = QUIZ_CACHE_SIZE, ttl: float = QUIZ_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._active: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, game_code: str) -> Optional[CachedQuiz]:
+        """Faqat keshdan (DB ga murojaatsiz)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(game_code)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(game_code)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def get(self, db: Session, game_code: str) -> Optional[CachedQuiz]:
+        cached = self.peek(game_code)
+        if cached is not None:
+            return cached
+
+        if use_table():
+            quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
+            if not quiz:
+                return None
+            return self.put(quiz, load_questions(db, [quiz.id])[quiz.id])
+
+        # JSON rejimida savollar shu so'rovning o'zida
+        quiz = db.query(Quiz).options(undefer(Quiz.questions)).filter(Quiz.game_code == game_code).first()
+        if not quiz:
+            return None
+        return self.put(quiz, quiz.questions)
+
+    async def aget(self, db: AsyncSession, game_code: str) -> Optional[CachedQuiz]:
+        cached = self.peek(game_code)
+        if cached is not None:
+            return cached
+
+        stmt = select(Quiz).where(Quiz.game_code == game_code)
+        if not use_table():
+            stmt = stmt.options(undefer(Quiz.questions))
+        quiz = (await db.execute(stmt)).scalars().first()
+        if not quiz:
+            return None
+        if use_table():
+            return self.put(quiz, (await aload_questions(db, [quiz.id]))[quiz.id])
+        return self.put(quiz, quiz.questions)
+
+    def put(self, quiz: Quiz, questions: List[dict]) -> CachedQuiz:
+        cached = CachedQuiz(quiz, self._active, questions)
+        with self._lock:
+            self._entries[quiz.game_code] = (time.monotonic() + self.ttl, cached)
+            self._entries.move_to_end(quiz.game_code)
+            self._active[quiz.game_code] = bool(quiz.is_active)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._active.pop(evicted, None)
+        return cached
+
+    def set_active(self, game_code: str, is_active: bool):
+        with self._lock:
+            if game_code in self._entries:
+                self._active[game_code] = is_active
+
+    def invalidate(self, game_code: str):
+        with self._lock:
+            self._entries.pop(game_code, None)
+            self._active.pop(game_code, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._active.clear()
+
+
+quiz_cache = QuizCache()
@@ -0,0 +1,256 @@
+"""
+Quizlarni NDJSON import/export qilish (stream)
+
+Import QUIZ_IMPORT_BATCH qatordan bitta executemany bilan yoziladi, export server-side cursor'dan o'qiladi.
+"""
+
+import os
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from game_codes import game_code_allocator, is_code_collision, GAME_CODE_ATTEMPTS
+from models import Question, Quiz
+from question_store import (
+    aload_questions, load_questions, question_rows, stored_json, use_table
+)
+from schemas import QuizCreate
+from serialization import dumps
+
+QUIZ_IMPORT_BATCH = int(os.getenv("QUIZ_IMPORT_BATCH", "500"))
+QUIZ_IMPORT_MAX_BATCH = 5000
+QUIZ_IMPORT_MAX_LINE = int(os.getenv("QUIZ_IMPORT_MAX_LINE", str(1024 * 1024)))
+QUIZ_IMPORT_MAX_ERRORS = int(os.getenv("QUIZ_IMPORT_MAX_ERRORS", "1000"))
+QUIZ_EXPORT_BATCH = int(os.getenv("QUIZ_EXPORT_BATCH", "500"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < QUIZ_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'line'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Body bo'laklaridan (qator raqami, qator) - juda uzun qatorlar b"" bo'lib keladi"""
+    buffer = b""
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                break
+            line, buffer = buffer[:end], buffer[end + 1:]
+            line_no += 1
+            if oversized or len(line) > QUIZ_IMPORT_MAX_LINE:
+                oversized = False
+                yield line_no, b""
+            elif line.strip():
+                yield line_no, line
+        if len(buffer) > QUIZ_IMPORT_MAX_LINE:
+            # Qator oxirigacha qolganini tashlab yuboramiz
+            oversized = True
+            buffer = b""
+    if oversized:
+        yield line_no + 1, b""
+    elif buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def read_batches(chunks: AsyncIterator[bytes], report: ImportReport, batch_size: int):
+    """Xom qatorlar batch'lari (validatsiya threadpool'da, prepare_batch ichida)"""
+    batch: List[Tuple[int, bytes]] = []
+    async for line_no, line in iter_ndjson(chunks):
+        if not line:
+            report.error(line_no, f"Line exceeds {QUIZ_IMPORT_MAX_LINE} bytes")
+            continue
+        batch.append((line_no, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prepare_batch(lines: List[Tuple[int, bytes]], creator_id: int, report: ImportReport) -> List[Tuple[int, dict]]:
+    """Validatsiya + game code ajratish: (line, quiz qatori)"""
+    prepared = []
+    for line_no, line in lines:
+        try:
+            quiz = QuizCreate.model_validate_json(line)
+        except ValidationError as e:
+            report.error(line_no, _validation_message(e))
+            continue
+        prepared.append((line_no, {
+            "title": quiz.title,
+            "game_code": game_code_allocator.allocate(),
+            "questions": [q.dict(by_alias=True) for q in quiz.questions],
+            "creator_id": creator_id,
+        }))
+    return prepared
+
+
+def _insert_rows(rows: List[dict]) -> List[dict]:
+    return [dict(row, questions=stored_json(row["questions"])) for row in rows]
+
+
+def _question_rows(rows: List[dict], ids: Dict[str, int]) -> List[dict]:
+    result = []
+    for row in rows:
+        result.extend(question_rows(ids[row["game_code"]], row["questions"]))
+    return result
+
+
+def _ids_query(rows: List[dict]):
+    return select(Quiz.game_code, Quiz.id).where(Quiz.game_code.in_([row["game_code"] for row in rows]))
+
+
+def _insert(db: Session, rows: List[dict]):
+    db.execute(insert(Quiz), _insert_rows(rows))
+    if use_table():
+        ids = dict(db.execute(_ids_query(rows)).all())
+        db.execute(insert(Question), _question_rows(rows, ids))
+    db.commit()
+
+
+async def _ainsert(db: AsyncSession, rows: List[dict]):
+    await db.execute(insert(Quiz), _insert_rows(rows))
+    if use_table():
+        ids = dict((await db.execute(_ids_query(rows))).all())
+        await db.execute(insert(Question), _question_rows(rows, ids))
+    await db.commit()
+
+
+def import_batch(db: Session, lines: List[Tuple[int, bytes]], creator_id: int, report: ImportReport):
+    """Bitta executemany; eski kod bilan to'qnashuvda qatorma-qator qayta urinish"""
+    prepared = prepare_batch(lines, creator_id, report)
+    if not prepared:
+        return
+    try:
+        _insert(db, [row for _, row in prepared])
+        report.imported += len(prepared)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    for line_no, row in prepared:
+        for _ in range(GAME_CODE_ATTEMPTS):
+            try:
+                _insert(db, [row])
+                report.imported += 1
+                break
+            except IntegrityError as exc:
+                db.rollback()
+                if not is_code_collision(exc):
+                    raise
+                row["game_code"] = game_code_allocator.allocate()
+        else:
+            report.error(line_no, "Could not allocate a game code")
+
+
+async def aimport_batch(db: AsyncSession, lines: List[Tuple[int, bytes]], creator_id: int, report: ImportReport):
+    prepared = await run_in_threadpool(prepare_batch, lines, creator_id, report)
+    if not prepared:
+        return
+    try:
+        await _ainsert(db, [row for _, row in prepared])
+        report.imported += len(prepared)
+        return
+    except IntegrityError:
+        await db.rollback()
+
+    for line_no, row in prepared:
+        for _ in range(GAME_CODE_ATTEMPTS):
+            try:
+                await _ainsert(db, [row])
+                report.imported += 1
+                break
+            except IntegrityError as exc:
+                await db.rollback()
+                if not is_code_collision(exc):
+                    raise
+                row["game_code"] = await run_in_threadpool(game_code_allocator.allocate)
+        else:
+            report.error(line_no, "Could not allocate a game code")
+
+
+def _export_query(creator_id: int):
+    return (
+        select(Quiz.id, Quiz.title, Quiz.game_code, Quiz.questions)
+        .where(Quiz.creator_id == creator_id)
+        .order_by(Quiz.created_at, Quiz.id)
+    )
+
+
+def _export_lines(partition, questions: Dict[int, List[dict]]) -> bytes:
+    return b"".join(
+        dumps({
+            "title": row.title,
+            "game_code": row.game_code,
+            "questions": questions.get(row.id) or row.questions,
+        }) + b"\n"
+        for row in partition
+    )
+
+
+def export_quizzes(session_factory, creator_id: int) -> Iterator[bytes]:
+    """Server-side cursor (yield_per) bilan; table rejimida savollar ikkinchi sessiyadan"""
+    db = session_factory()
+    lookup = session_factory() if use_table() else None
+    try:
+        result = db.execute(_export_query(creator_id).execution_options(yield_per=QUIZ_EXPORT_BATCH))
+        for partition in result.partitions():
+            questions = {}
+            if lookup is not None:
+                questions = load_questions(lookup, [row.id for row in partition if not row.questions])
+                lookup.rollback()
+            yield _export_lines(partition, questions)
+    finally:
+        db.close()
+        if lookup is not None:
+            lookup.close()
+
+
+async def aexport_quizzes(session_factory, creator_id: int) -> AsyncIterator[bytes]:
+    async with session_factory() as db:
+        lookup = session_factory() if use_table() else None
+        try:
+            result = await db.stream(_export_query(creator_id).execution_options(yield_per=QUIZ_EXPORT_BATCH))
+            async for partition in result.partitions():
+                questions = {}
+                if lookup is not None:
+                    questions = await aload_questions(lookup, [row.id for row in partition if not row.questions])
+                    await lookup.rollback()
+                yield _export_lines(partition, questions)
+        finally:
+            if lookup is not None:
+                await lookup.close()
@@ -0,0 +1,152 @@
+"""
+Token-bucket rate limit (autentifikatsiyasiz endpointlar uchun)
+
+Limitlar RATE_LIMIT_<ROUTE>_<KEY> dan olinadi ("20/60", "off"), oshganda 429 + Retry-After.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from metrics import PrometheusWriter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Proksi (nginx) ortida haqiqiy IP X-Forwarded-For da
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes", "on")
+
+DEFAULT_RULES = {
+    ("auth_login", "ip"): "30/60",
+    ("auth_login", "user"): "10/60",  # bitta email ga urinishlar (IP dan qat'i nazar)
+    ("auth_register", "ip"): "10/60",
+    ("game_join", "ip"): "120/10",  # sinf bitta NAT ortida bo'lishi mumkin
+    ("game_join", "game_code"): "500/10",
+}
+
+
+def parse_rule(value: str) -> Optional[Tuple[int, float]]:
+    """"20/60" -> (20, 60.0); "off" yoki "0" -> None"""
+    value = value.strip().lower()
+    if value in ("", "0", "off", "none"):
+        return None
+    requests, _, seconds = value.partition("/")
+    return int(requests), float(seconds or 1)
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateRule:
+    def __init__(self, route: str, key: str, requests: int, seconds: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.route = route
+        self.key = key
+        self.burst = float(requests)
+        self.rate = requests / seconds
+        self.idle = seconds  # shuncha vaqtda bucket to'ladi - yangi bucket bilan bir xil
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def _evict(self, now: float):
+        buckets = self.buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if now - oldest.updated < self.idle and len(buckets) <= self.max_keys:
+                break
+            buckets.popitem(last=False)
+
+    def refill(self, value: str, now: float) -> TokenBucket:
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            bucket = self.buckets[value] = TokenBucket(self.burst, now)
+        else:
+            self.buckets.move_to_end(value)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        # Yangi bucket qo'shilgandan keyin - kalitlar soni max_keys dan oshmaydi
+        self._evict(now)
+        return bucket
+
+    def wait_time(self, bucket: TokenBucket) -> float:
+        return (1 - bucket.tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, rules: Dict[Tuple[str, str], str]):
+        self.rules: Dict[str, Dict[str, RateRule]] = {}
+        for (route, key), default in rules.items():
+            parsed = parse_rule(os.getenv(f"RATE_LIMIT_{route}_{key}".upper(), default))
+            if parsed is not None:
+                self.rules.setdefault(route, {})[key] = RateRule(route, key, *parsed)
+        self._lock = threading.Lock()
+
+    def retry_after(self, route: str, **keys: Optional[str]) -> float:
+        """0 - ruxsat (barcha bucketlardan bittadan token olinadi), aks holda kutish (s)"""
+        rules = self.rules.get(route)
+        if not RATE_LIMIT_ENABLED or not rules:
+            return 0.0
+
+        now = time.monotonic()
+        with self._lock:
+            checked = []
+            wait = 0.0
+            for key, value in keys.items():
+                rule = rules.get(key)
+                if rule is None or value is None:
+                    continue
+                bucket = rule.refill(str(value), now)
+                checked.append((rule, bucket))
+                if bucket.tokens < 1:
+                    wait = max(wait, rule.wait_time(bucket))
+                    rule.rejected += 1
+
+            if wait:
+                return wait
+            for rule, bucket in checked:
+                bucket.tokens -= 1
+                rule.allowed += 1
+            return 0.0
+
+    def check(self, route: str, **keys: Optional[str]):
+        wait = self.retry_after(route, **keys)
+        if wait:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    def write(self, writer: PrometheusWriter):
+        with self._lock:
+            rules = [rule for route in self.rules.values() for rule in route.values()]
+            counts = [(rule, rule.allowed, rule.rejected, len(rule.buckets)) for rule in rules]
+        for name, kind, help_text, index in (
+            ("quiz_rate_limit_allowed_total", "counter", "Requests admitted by the rate limiter", 1),
+            ("quiz_rate_limit_rejected_total", "counter", "Requests rejected with 429", 2),
+            ("quiz_rate_limit_keys", "gauge", "Tracked rate limit buckets", 3),
+        ):
+            for row in counts:
+                writer.sample(name, kind, help_text, row[index], {"route": row[0].route, "key": row[0].key})
+
+
+rate_limiter = RateLimiter(DEFAULT_RULES)
+
+
+def client_ip(request: Request) -> str:
+    """Dependency: so'rov yuborgan IP (RATE_LIMIT_TRUST_PROXY da X-Forwarded-For dan)"""
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
@@ -0,0 +1,218 @@
+"""
+O'yin hodisalarini WebSocket orqali tarqatish
+
+Mijozlar /ws/game/{game_code} ga ulanadi. publish() thread-safe - sync handlerlardan ham chaqiriladi.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from shared_state import SharedStateDB, shared_db, use_shared_state
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+GAME_EVENT_POLL_INTERVAL = float(os.getenv("GAME_EVENT_POLL_INTERVAL", "0.05"))
+GAME_EVENT_RETENTION = float(os.getenv("GAME_EVENT_RETENTION", "60"))
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_event(event: str, game_code: str, data: dict) -> str:
+    return json.dumps(
+        {"event": event, "game_code": game_code, "data": data},
+        default=_default,
+        separators=(",", ":"),
+    )
+
+
+class Connection:
+    """Bitta WebSocket ulanishi va uning yuborish navbati"""
+
+    def __init__(self, game_code: str, websocket: WebSocket):
+        self.game_code = game_code
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.sender: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.sender is None:
+            self.sender = asyncio.create_task(self.send_loop())
+
+    def stop(self):
+        if self.sender is not None:
+            self.sender.cancel()
+
+    async def send_loop(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:
+                    break
+                await self.websocket.send_text(message)
+        except Exception:
+            # Ulanish uzilgan - receive tomoni tozalaydi
+            pass
+
+
+class SQLiteEventBus:
+    """Workerlar o'rtasida event almashish: events jadvaliga yozish va so'rab turish"""
+
+    def __init__(self, db: SharedStateDB, deliver: Callable[[str, str, str], None]):
+        self.db = db
+        self.deliver = deliver
+        self.origin = uuid.uuid4().hex
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_id = 0
+        self._last_cleanup = 0.0
+
+    def send(self, game_code: str, event: str, message: str):
+        # Yozuv fon threadida - handler SQLite lock'ini kutmaydi
+        self._pending.put((game_code, event, message, self.origin, time.time()))
+        self._wakeup.set()
+
+    def _write_pending(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO events (game_code, event, message, origin, created) VALUES (?, ?, ?, ?, ?)", rows
+                )
+
+    def _read_new(self):
+        rows = self.db.execute(
+            "SELECT id, game_code, event, message, origin FROM events WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        for event_id, game_code, event, message, origin in rows:
+            self._last_id = event_id
+            if origin != self.origin:
+                self.deliver(game_code, event, message)
+
+    def _cleanup(self):
+        now = time.time()
+        if now - self._last_cleanup >= GAME_EVENT_RETENTION:
+            self._last_cleanup = now
+            self.db.execute("DELETE FROM events WHERE created < ?", (now - GAME_EVENT_RETENTION,))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(GAME_EVENT_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self._write_pending()
+                self._read_new()
+                self._cleanup()
+            except Exception:
+                logger.exception("Game event bus poll failed")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._last_id = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="game-event-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._write_pending()
+
+
+class GameHub:
+    def __init__(self):
+        self._rooms: Dict[str, Set[Connection]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._bus = SQLiteEventBus(shared_db, self._deliver_remote) if use_shared_state() else None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def start(self):
+        if self._bus is not None:
+            self._bus.start()
+
+    def stop(self):
+        if self._bus is not None:
+            self._bus.stop()
+
+    def add_listener(self, listener: Callable[[str, str], None]):
+        """Boshqa workerlardan kelgan eventlar uchun (game_code, event) callback"""
+        self._listeners.append(listener)
+
+    def connection_count(self, game_code: str) -> int:
+        return len(self._rooms.get(game_code, ()))
+
+    async def connect(self, game_code: str, websocket: WebSocket, start: bool = True) -> Connection:
+        """Ulanishni xonaga qo'shish; start=False - eventlar navbatda yig'iladi, conn.start() gacha yuborilmaydi"""
+        conn = Connection(game_code, websocket)
+        self._rooms.setdefault(game_code, set()).add(conn)
+        if start:
+            conn.start()
+        return conn
+
+    async def disconnect(self, conn: Connection):
+        room = self._rooms.get(conn.game_code)
+        if room is not None:
+            room.discard(conn)
+            if not room:
+                del self._rooms[conn.game_code]
+        conn.stop()
+
+    def _fan_out(self, game_code: str, message: str):
+        for conn in list(self._rooms.get(game_code, ())):
+            try:
+                conn.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Sekin klient boshqalarni to'xtatmasligi uchun uziladi
+                logger.warning("Dropping slow websocket client for game %s", game_code)
+                self._rooms[game_code].discard(conn)
+                conn.stop()
+                asyncio.ensure_future(conn.websocket.close(code=1013))
+
+    def _deliver_remote(self, game_code: str, event: str, message: str):
+        for listener in self._listeners:
+            listener(game_code, event)
+        if self._loop is not None and game_code in self._rooms:
+            self._loop.call_soon_threadsafe(self._fan_out, game_code, message)
+
+    def publish(self, game_code: str, event: str, data: dict):
+        """Event'ni o'yindagi barcha ulanishlarga yuborish (istalgan threaddan)"""
+        local = self._loop is not None and game_code in self._rooms
+        if not local and self._bus is None:
+            return
+        message = encode_event(event, game_code, data)
+        if self._bus is not None:
+            self._bus.send(game_code, event, message)
+        if local:
+            self._loop.call_soon_threadsafe(self._fan_out, game_code, message)
+
+
+game_hub = GameHub()
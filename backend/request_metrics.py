@@ -0,0 +1,213 @@
+"""
+So'rovlar metrikasi (route bo'yicha)
+
+Har bir so'rov uchun vaqt, SQL so'rovlar soni, DB vaqti va javob hajmi yoziladi.
+SLOW_REQUEST_MS dan sekin so'rovlar SQL'lari bilan log qilinadi.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from metrics import Histogram, PrometheusWriter
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))  # 0 = o'chirilgan
+SLOW_REQUEST_MAX_QUERIES = int(os.getenv("SLOW_REQUEST_MAX_QUERIES", "50"))
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+logger = logging.getLogger("quiz.slow_requests")
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self, capture: bool):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if capture else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += elapsed
+    if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_QUERIES:
+        stats.statements.append((elapsed, statement))
+
+
+def _handle_error(context):
+    # Xato bilan tugagan so'rov after_cursor_execute ga yetmaydi - boshlanish vaqti stekda qolmasin
+    if context.connection is None or context.statement is None:
+        return
+    started = context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+def instrument_queries(engine):
+    """Sync Engine (async uchun async_engine.sync_engine) ga hook'lar"""
+    if not METRICS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "queries", "db_time", "response_size", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = Histogram()
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, elapsed: float,
+               stats: RequestStats, size: int):
+        key = (method, route)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._routes.setdefault(key, RouteMetrics())
+        metrics.latency.observe(elapsed)
+        metrics.queries.observe(stats.queries)
+        metrics.db_time.observe(stats.db_time)
+        metrics.response_size.observe(size)
+        with self._lock:
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def write(self, writer: PrometheusWriter):
+        with self._lock:
+            routes = sorted(self._routes.items())
+            statuses = [(key, dict(m.statuses)) for key, m in routes]
+
+        for (method, route), counts in statuses:
+            for status, count in sorted(counts.items()):
+                writer.sample("quiz_http_requests_total", "counter", "HTTP requests by route and status",
+                              count, {"method": method, "route": route, "status": status})
+        families = (
+            ("quiz_http_request_duration_seconds", "Request latency", "latency"),
+            ("quiz_http_request_queries", "SQL statements per request", "queries"),
+            ("quiz_http_request_db_seconds", "Time spent in SQL per request", "db_time"),
+            ("quiz_http_response_size_bytes", "Response body size", "response_size"),
+        )
+        for name, help_text, attr in families:
+            for (method, route), metrics in routes:
+                writer.histogram(name, help_text, getattr(metrics, attr).snapshot(),
+                                 {"method": method, "route": route})
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _log_slow(scope, route: str, status: int, elapsed: float, stats: RequestStats):
+    lines = [
+        f"{scope['method']} {scope['path']} ({route}) -> {status} in {elapsed * 1000:.1f} ms, "
+        f"{stats.queries} queries, {stats.db_time * 1000:.1f} ms in DB"
+    ]
+    for query_time, statement in stats.statements or ():
+        lines.append(f"  {query_time * 1000:7.2f} ms  {' '.join(statement.split())[:300]}")
+    if stats.queries > len(stats.statements or ()):
+        lines.append(f"  ... {stats.queries - len(stats.statements)} more")
+    logger.warning("Slow request: %s", "\n".join(lines))
+
+
+class RequestMetricsMiddleware:
+    """Sof ASGI middleware (javob body'si buferlanmaydi)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(capture=SLOW_REQUEST_MS > 0)
+        token = _current.set(stats)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            request_metrics.record(scope["method"], template, status, elapsed, stats, size)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                _log_slow(scope, template, status, elapsed, stats)
+
+
+def _write_pools(writer: PrometheusWriter, pools: Dict[str, dict]):
+    counters = ("connects", "checkouts", "checkins", "invalidations", "timeouts")
+    for name in counters:
+        for pool, status in pools.items():
+            writer.sample(f"quiz_db_pool_{name}_total", "counter", f"Connection pool {name}",
+                          status[name], {"pool": pool})
+    for name in ("size", "checked_out", "checked_in", "overflow"):
+        for pool, status in pools.items():
+            if name in status:
+                writer.sample(f"quiz_db_pool_{name}", "gauge", f"Connection pool {name.replace('_', ' ')}",
+                              status[name], {"pool": pool})
+    for pool, status in pools.items():
+        writer.histogram("quiz_db_pool_checkout_seconds", "Connection checkout latency",
+                         status["checkout_latency"], {"pool": pool})
+
+
+def render_prometheus(pools: Dict[str, dict], cache, rate_limiter=None, event_log=None, janitor=None,
+                      round_scheduler=None) -> str:
+    """/metrics uchun: so'rovlar, pool holati (pool_status natijalari), quiz cache va fon xizmatlari"""
+    writer = PrometheusWriter()
+    request_metrics.write(writer)
+    _write_pools(writer, pools)
+    writer.sample("quiz_cache_hits_total", "counter", "Quiz cache hits", cache.hits)
+    writer.sample("quiz_cache_misses_total", "counter", "Quiz cache misses", cache.misses)
+    if rate_limiter is not None:
+        rate_limiter.write(writer)
+    if event_log is not None:
+        event_log.write(writer)
+    if janitor is not None:
+        janitor.write(writer)
+    if round_scheduler is not None:
+        round_scheduler.write(writer)
+    return writer.render()
@@ -0,0 +1,156 @@
+"""
+Barcha o'yinlar uchun umumiy savol taymeri
+
+Bitta asyncio task va bitta deadline heap (o'yin boshiga task emas). Muddati kelgan
+taymerlar game_service handleriga bitta batch bilan threadpool'da beriladi.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import Histogram, PrometheusWriter
+
+logger = logging.getLogger("quiz.rounds")
+
+ROUND_SCHEDULER_ENABLED = os.getenv("ROUND_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+ROUND_AUTO_ADVANCE = os.getenv("ROUND_AUTO_ADVANCE", "true").lower() in ("1", "true", "yes", "on")
+ROUND_BREAK = float(os.getenv("ROUND_BREAK", "5"))  # savol yopilgandan keyingi savolgacha
+
+CLOSE = "close"
+ADVANCE = "advance"
+
+LATENESS_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# (deadline, seq, game_code, kind, question_index, question_count)
+Entry = Tuple[float, int, str, str, int, int]
+
+
+class RoundScheduler:
+    def __init__(self):
+        self._heap: List[Entry] = []
+        self._current: Dict[str, int] = {}  # game_code -> amaldagi yozuv seq
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._handler: Optional[Callable[[List[Entry]], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.stale = 0
+        self.lateness = Histogram(LATENESS_BUCKETS)
+
+    def set_handler(self, handler: Callable[[List[Entry]], None]):
+        self._handler = handler
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    # ---------- schedule / cancel (istalgan threaddan) ----------
+
+    def schedule(self, game_code: str, delay: float, kind: str, index: int, questions: int):
+        """O'yinning yagona taymerini delay sekunddan keyinga qo'yish (avvalgisi bekor)
+
+        questions - savollar soni: handler quiz'ni keshdan qayta o'qimaydi.
+        """
+        if not ROUND_SCHEDULER_ENABLED:
+            return
+        deadline = time.monotonic() + max(delay, 0.0)
+        with self._lock:
+            self._seq += 1
+            self._current[game_code] = self._seq
+            heapq.heappush(self._heap, (deadline, self._seq, game_code, kind, index, questions))
+            earliest = self._heap[0][1] == self._seq
+            # Bekor qilinganlar ko'payib ketsa heap qayta quriladi
+            if len(self._heap) > 2 * len(self._current) + 1024:
+                self._heap = [entry for entry in self._heap if self._current.get(entry[2]) == entry[1]]
+                heapq.heapify(self._heap)
+        if earliest:
+            self._wake()
+
+    def cancel(self, game_code: str):
+        with self._lock:
+            self._current.pop(game_code, None)
+
+    def _wake(self):
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    # ---------- event loop ----------
+
+    def _pop_due(self, now: float) -> List[Entry]:
+        due = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if self._current.get(entry[2]) != entry[1]:
+                    self.stale += 1
+                    continue
+                del self._current[entry[2]]
+                due.append(entry)
+        return due
+
+    def _next_deadline(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    async def _run(self):
+        while True:
+            # Avval clear, keyin heap: orada qo'shilgan erta deadline wakeup'ni qayta o'rnatadi
+            self._wakeup.clear()
+            deadline = self._next_deadline()
+            if deadline is None:
+                await self._wakeup.wait()
+            elif deadline > time.monotonic():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    pass
+
+            now = time.monotonic()
+            due = self._pop_due(now)
+            if not due:
+                continue
+            for entry in due:
+                self.lateness.observe(now - entry[0])
+            self.fired += len(due)
+            if self._handler is not None:
+                try:
+                    await run_in_threadpool(self._handler, due)
+                except Exception:
+                    logger.exception("Round handler failed")
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = self._loop = self._wakeup = None
+
+    # ---------- metrikalar ----------
+
+    def write(self, writer: PrometheusWriter):
+        writer.sample("quiz_rounds_scheduled", "gauge", "Games with a running question timer", len(self))
+        writer.sample("quiz_rounds_fired_total", "counter", "Round deadlines handled", self.fired)
+        writer.sample("quiz_rounds_stale_total", "counter", "Superseded or cancelled timers skipped", self.stale)
+        writer.histogram("quiz_rounds_lateness_seconds", "Delay between a round deadline and its handling",
+                         self.lateness.snapshot())
+
+
+round_scheduler = RoundScheduler()
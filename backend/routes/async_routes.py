@@ -0,0 +1,412 @@
+"""
+Async (AsyncSession) HTTP handlerlar
+
+DB_BACKEND=async bo'lganda game_routes va sync router o'rniga ulanadi.
+"""
+
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from auth import (
+    create_access_token, aget_current_user, aget_token_user, aget_optional_user,
+    aget_cached_user, invalidate_user, TokenUser, ACCESS_TOKEN_EXPIRE_MINUTES
+)
+from database import get_async_db, AsyncSessionLocal
+from game_codes import game_code_allocator, is_code_collision, GAME_CODE_ATTEMPTS
+from models import User, Quiz, QuizHistory, UserStats
+from pagination import (
+    history_page_query, quiz_summary_page_query, make_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from password_pool import hash_password_async, verify_password_async
+from question_store import (
+    stored_json, asave_questions, aload_questions, aload_question, quiz_with_questions, player_question
+)
+from quiz_cache import quiz_cache
+from ratelimit import rate_limiter, client_ip
+from quiz_io import (
+    ImportReport, read_batches, aimport_batch, aexport_quizzes,
+    QUIZ_IMPORT_BATCH, QUIZ_IMPORT_MAX_BATCH, NDJSON_MEDIA_TYPE
+)
+from schemas import (
+    UserCreate, UserResponse, UserUpdate, Token, LoginRequest,
+    QuizCreate, QuizResponse, PlayerQuizResponse, QuestionResponse, QuizHistoryCreate, QuizHistoryResponse,
+    JoinGameRequest, JoinGameResponse, GameSessionResponse, AnswerSubmit, AnswerResult, LeaderboardResponse,
+    ReplayLeaderboardResponse, QuizSummaryPage, QuizHistoryPage, UserStatsResponse
+)
+from serialization import JSONBytesResponse
+from stats import arecord_history, stats_response
+import game_service
+
+router = APIRouter()
+
+
+async def _first(db: AsyncSession, stmt):
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+
+def _token_response(user: User) -> dict:
+    access_token = create_access_token(
+        user_id=user.id,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        role=user.role
+    )
+    return {"access_token": access_token, "token_type": "bearer", "user": user}
+
+
+# ==================== AUTH ENDPOINTS ====================
+
+@router.post("/api/auth/register", response_model=Token)
+async def register(
+        user_data: UserCreate,
+        ip: str = Depends(client_ip),
+        db: AsyncSession = Depends(get_async_db)
+):
+    rate_limiter.check("auth_register", ip=ip)
+    if await _first(db, select(User.id).where(User.email == user_data.email)):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    if await _first(db, select(User.id).where(User.nickname == user_data.nickname)):
+        raise HTTPException(status_code=400, detail="Nickname already taken")
+
+    new_user = User(
+        email=user_data.email,
+        nickname=user_data.nickname,
+        name=user_data.name,
+        hashed_password=await hash_password_async(user_data.password),
+        role=user_data.role
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    return _token_response(new_user)
+
+
+@router.post("/api/auth/login", response_model=Token)
+async def login(
+        login_data: LoginRequest,
+        ip: str = Depends(client_ip),
+        db: AsyncSession = Depends(get_async_db)
+):
+    rate_limiter.check("auth_login", ip=ip, user=login_data.email.lower())
+    user = await _first(db, select(User).where(User.email == login_data.email))
+    if not user or not await verify_password_async(login_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+
+    return _token_response(user)
+
+
+@router.get("/api/auth/me", response_model=UserResponse)
+async def get_me(
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    user = await aget_cached_user(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@router.put("/api/auth/profile", response_model=UserResponse)
+async def update_profile(
+        updates: UserUpdate,
+        current_user: User = Depends(aget_current_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    if updates.name:
+        current_user.name = updates.name
+    if updates.nickname:
+        existing = await _first(db, select(User.id).where(
+            User.nickname == updates.nickname,
+            User.id != current_user.id
+        ))
+        if existing:
+            raise HTTPException(status_code=400, detail="Nickname already taken")
+        current_user.nickname = updates.nickname
+    if updates.profile_picture:
+        current_user.profile_picture = updates.profile_picture
+
+    await db.commit()
+    await db.refresh(current_user)
+    invalidate_user(current_user.id)
+    return current_user
+
+
+# ==================== QUIZ ENDPOINTS ====================
+
+@router.post("/api/quiz/create", response_model=QuizResponse, response_class=JSONBytesResponse)
+async def create_quiz(
+        quiz_data: QuizCreate,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    questions = [q.dict(by_alias=True) for q in quiz_data.questions]
+
+    for _ in range(GAME_CODE_ATTEMPTS):
+        # Blok tugaganda allocator DB ga boradi, shuning uchun threadpool'da
+        game_code = await run_in_threadpool(game_code_allocator.allocate)
+        new_quiz = Quiz(
+            title=quiz_data.title,
+            game_code=game_code,
+            questions=stored_json(questions),
+            creator_id=current_user.id
+        )
+        db.add(new_quiz)
+        try:
+            await db.flush()
+            await asave_questions(db, new_quiz.id, questions)
+            await db.commit()
+            break
+        except IntegrityError as exc:
+            await db.rollback()
+            if not is_code_collision(exc):
+                game_code_allocator.release(game_code)
+                raise
+        except Exception:
+            await db.rollback()
+            game_code_allocator.release(game_code)
+            raise
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate a game code")
+    await db.refresh(new_quiz)
+
+    return JSONBytesResponse(quiz_cache.put(new_quiz, questions).response_body())
+
+
+@router.post("/api/quiz/import")
+async def import_quizzes(
+        request: Request,
+        batch_size: int = Query(QUIZ_IMPORT_BATCH, ge=1, le=QUIZ_IMPORT_MAX_BATCH),
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    report = ImportReport()
+    async for lines in read_batches(request.stream(), report, batch_size):
+        await aimport_batch(db, lines, current_user.id, report)
+    return report.as_dict()
+
+
+@router.get("/api/quiz/export")
+async def export_my_quizzes(current_user: TokenUser = Depends(aget_token_user)):
+    return StreamingResponse(
+        aexport_quizzes(AsyncSessionLocal, current_user.id), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@router.get("/api/quiz/{game_code}", response_model=QuizResponse, response_class=JSONBytesResponse)
+async def get_quiz(
+        game_code: str,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    quiz = await quiz_cache.aget(db, game_code)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if current_user.role != "admin" and quiz.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the quiz creator can see the answers")
+    return JSONBytesResponse(quiz.response_body())
+
+
+@router.get("/api/quiz/{game_code}/player", response_model=PlayerQuizResponse, response_class=JSONBytesResponse)
+async def get_player_quiz(game_code: str, db: AsyncSession = Depends(get_async_db)):
+    quiz = await quiz_cache.aget(db, game_code)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return JSONBytesResponse(quiz.player_body())
+
+
+@router.get("/api/quiz/{game_code}/question/{n}", response_model=QuestionResponse)
+async def get_question(game_code: str, n: int, db: AsyncSession = Depends(get_async_db)):
+    quiz = quiz_cache.peek(game_code)
+    if quiz is None:
+        row = await aload_question(db, game_code, n)
+        if row is not None:
+            return {"index": n, "total": row.total, "question": player_question(row.payload)}
+        quiz = await quiz_cache.aget(db, game_code)
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+
+    if not 0 <= n < len(quiz.questions):
+        raise HTTPException(status_code=404, detail="Question not found")
+    return {"index": n, "total": len(quiz.questions), "question": player_question(quiz.questions[n])}
+
+
+@router.get("/api/quiz/user/created", response_model=List[QuizResponse])
+async def get_user_quizzes(
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(select(Quiz).where(Quiz.creator_id == current_user.id))
+    quizzes = result.scalars().all()
+    questions = await aload_questions(db, [quiz.id for quiz in quizzes])
+    return [quiz_with_questions(quiz, questions[quiz.id]) for quiz in quizzes]
+
+
+@router.get("/api/quiz/user/created/page", response_model=QuizSummaryPage)
+async def get_user_quizzes_page(
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(quiz_summary_page_query(current_user.id, cursor, limit))
+    return make_page(result.all(), limit, "created_at")
+
+
+# ==================== GAME SESSION ENDPOINTS ====================
+
+@router.post("/api/game/start/{game_code}", response_model=GameSessionResponse)
+async def start_game_session(
+        game_code: str,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await game_service.astart_game(db, game_code, current_user)
+
+
+@router.post("/api/game/join", response_model=JoinGameResponse)
+async def join_game(
+        request: JoinGameRequest,
+        ip: str = Depends(client_ip),
+        db: AsyncSession = Depends(get_async_db)
+):
+    rate_limiter.check("game_join", ip=ip, game_code=request.game_code)
+    return await game_service.ajoin_game(db, request.game_code, request.player_name, request.player_token)
+
+
+@router.post("/api/game/leave")
+async def leave_game(request: JoinGameRequest, db: AsyncSession = Depends(get_async_db)):
+    return await game_service.aleave_game(db, request.game_code, request.player_name, request.player_token)
+
+
+@router.get("/api/game/{game_code}/session", response_model=GameSessionResponse)
+async def get_game_session(game_code: str, db: AsyncSession = Depends(get_async_db)):
+    return await game_service.agame_session(db, game_code)
+
+
+@router.post("/api/game/{game_code}/next", response_model=GameSessionResponse)
+async def next_question(
+        game_code: str,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await game_service.anext_question(db, game_code, current_user)
+
+
+@router.post("/api/game/{game_code}/answer", response_model=AnswerResult)
+async def submit_answer(
+        game_code: str,
+        submission: AnswerSubmit,
+        current_user: Optional[TokenUser] = Depends(aget_optional_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    user_id = current_user.id if current_user else None
+    return await game_service.asubmit_answer(db, game_code, submission, user_id)
+
+
+@router.get("/api/game/{game_code}/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+        game_code: str,
+        limit: int = Query(10, ge=1, le=100),
+        player_name: Optional[str] = None
+):
+    return await game_service.aleaderboard(game_code, limit, player_name)
+
+
+@router.patch("/api/game/end/{game_code}")
+async def end_game_session(
+        game_code: str,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await game_service.aend_game(db, game_code, current_user)
+
+
+@router.get("/api/game/{game_code}/events")
+async def get_game_events(
+        game_code: str,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    # Fayl o'qish sinxron generator - Starlette uni threadpool'da aylantiradi
+    events = await game_service.areplay_events(db, game_code, current_user)
+    return StreamingResponse(events, media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/api/game/{game_code}/replay/leaderboard", response_model=ReplayLeaderboardResponse)
+async def get_replay_leaderboard(
+        game_code: str,
+        until_question: Optional[int] = Query(None, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await game_service.areplay_leaderboard(db, game_code, current_user, until_question, limit)
+
+
+# ==================== QUIZ HISTORY ENDPOINTS ====================
+
+@router.post("/api/history/add")
+async def add_quiz_history(
+        history_data: QuizHistoryCreate,
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    await db.execute(insert(QuizHistory).values(
+        user_id=current_user.id,
+        quiz_id=history_data.quiz_id,
+        quiz_title=history_data.quiz_title,
+        score=history_data.score,
+        total_questions=history_data.total_questions,
+        rank=history_data.rank,
+        participants_count=history_data.participants_count,
+        correct_answers=history_data.correct_answers
+    ))
+    await arecord_history(db, [history_data.model_dump() | {"user_id": current_user.id}])
+    await db.commit()
+    return {"message": "History saved successfully"}
+
+
+@router.get("/api/history/me", response_model=List[QuizHistoryResponse])
+async def get_my_history(
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(
+        select(QuizHistory)
+        .where(QuizHistory.user_id == current_user.id)
+        .order_by(QuizHistory.played_at.desc())
+    )
+    return result.scalars().all()
+
+
+@router.get("/api/history/me/page", response_model=QuizHistoryPage)
+async def get_my_history_page(
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(history_page_query(current_user.id, cursor, limit))
+    return make_page(result.scalars().all(), limit, "played_at")
+
+
+# ==================== STATS ENDPOINTS ====================
+
+@router.get("/api/stats/me", response_model=UserStatsResponse)
+async def get_my_stats(
+        current_user: TokenUser = Depends(aget_token_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return stats_response(current_user.id, await db.get(UserStats, current_user.id))
@@ -1,103 +1,114 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
+from typing import Optional
+from auth import get_optional_user, get_token_user, TokenUser
 from database import get_db
-from models import Quiz, GameSession
-from schemas import GameSessionResponse, JoinGameRequest
+from quiz_io import NDJSON_MEDIA_TYPE
+from ratelimit import rate_limiter, client_ip
+from schemas import (
+    GameSessionResponse, JoinGameRequest, JoinGameResponse, AnswerSubmit, AnswerResult, LeaderboardResponse,
+    ReplayLeaderboardResponse
+)
+import game_service
 
 router = APIRouter(prefix="/api/game", tags=["Game Sessions"])
 
 
 # 🎮 1️⃣ O‘yinni boshlash yoki mavjudini faollashtirish
 @router.post("/start/{game_code}", response_model=GameSessionResponse)
-def start_game_session(game_code: str, db: Session = Depends(get_db)):
-    quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-
-    # Mavjud sessiyani tekshirish
-    session = db.query(GameSession).filter(GameSession.game_code == game_code).first()
-
-    if not session:
-        # 🔹 Yangi session yaratish
-        session = GameSession(
-            game_code=game_code,
-            quiz_id=quiz.id,
-            host_id=quiz.creator_id,  # ✅ kim yaratganini yozamiz
-            created_at=datetime.utcnow(),
-            players=[],
-            status="waiting",
-            is_active=True,
-        )
-        db.add(session)
-    else:
-        # 🔹 Mavjud sessiyani qayta faollashtirish
-        session.is_active = True
-        session.status = "waiting"
-        session.created_at = datetime.utcnow()
-
-    # 🔹 Faqat shu quiz aktiv bo‘lsin
-    db.query(Quiz).update({Quiz.is_active: False})
-    quiz.is_active = True
-
-    db.commit()
-    db.refresh(session)
-    return session
+def start_game_session(
+        game_code: str,
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    return game_service.start_game(db, game_code, current_user)
 
 
 # 🙋 2️⃣ O‘yinchi faqat faol sessiyaga qo‘shilishi mumkin
-@router.post("/join", response_model=GameSessionResponse)
-def join_game(request: JoinGameRequest, db: Session = Depends(get_db)):
-    session = db.query(GameSession).filter(
-        GameSession.game_code == request.game_code,
-        GameSession.is_active == True
-    ).first()
+@router.post("/join", response_model=JoinGameResponse)
+def join_game(
+        request: JoinGameRequest,
+        ip: str = Depends(client_ip),
+        db: Session = Depends(get_db)
+):
+    # 🔹 Avtorizatsiyasiz endpoint - IP va o'yin bo'yicha limit
+    rate_limiter.check("game_join", ip=ip, game_code=request.game_code)
+    return game_service.join_game(db, request.game_code, request.player_name, request.player_token)
 
-    if not session:
-        raise HTTPException(
-            status_code=400,
-            detail="This game is not active. Wait for the host to start it."
-        )
 
-    # 🔹 O‘yinchi ro‘yxatga qo‘shiladi
-    players = session.players or []
-    if request.player_name not in players:
-        players.append(request.player_name)
-        session.players = players
-
-    session.status = "waiting"
-    db.commit()
-    db.refresh(session)
-
-    return session
+# 🚪 O‘yinchi lobbydan chiqishi
+@router.post("/leave")
+def leave_game(request: JoinGameRequest, db: Session = Depends(get_db)):
+    return game_service.leave_game(db, request.game_code, request.player_name, request.player_token)
 
 
 # 🧊 3️⃣ Sessionni olish (Frontend uchun)
 @router.get("/{game_code}/session", response_model=GameSessionResponse)
 def get_game_session(game_code: str, db: Session = Depends(get_db)):
-    session = db.query(GameSession).filter(GameSession.game_code == game_code).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Game session not found")
+    return game_service.game_session(db, game_code)
+
+
+# ⏭ Keyingi savolga o‘tish
+@router.post("/{game_code}/next", response_model=GameSessionResponse)
+def next_question(
+        game_code: str,
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    return game_service.next_question(db, game_code, current_user)
+
+
+# ✅ Javobni serverda tekshirish va ball berish
+@router.post("/{game_code}/answer", response_model=AnswerResult)
+def submit_answer(
+        game_code: str,
+        submission: AnswerSubmit,
+        current_user: Optional[TokenUser] = Depends(get_optional_user),
+        db: Session = Depends(get_db)
+):
+    user_id = current_user.id if current_user else None
+    return game_service.submit_answer(db, game_code, submission, user_id)
+
 
-    return session
+# 🏆 Jonli reyting
+@router.get("/{game_code}/leaderboard", response_model=LeaderboardResponse)
+def get_leaderboard(
+        game_code: str,
+        limit: int = Query(10, ge=1, le=100),
+        player_name: Optional[str] = None
+):
+    return game_service.leaderboard(game_code, limit, player_name)
 
 
 # 🛑 4️⃣ O‘yinni tugatish
 @router.patch("/end/{game_code}")
-def end_game_session(game_code: str, db: Session = Depends(get_db)):
-    session = db.query(GameSession).filter(GameSession.game_code == game_code).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Game session not found")
-
-    quiz = db.query(Quiz).filter(Quiz.game_code == game_code).first()
-
-    session.is_active = False
-    session.status = "finished"
-    if quiz:
-        quiz.is_active = False
-
-    db.commit()
-    return {
-        "message": "Game session ended successfully",
-        "game_code": game_code
-    }
\ No newline at end of file
+def end_game_session(
+        game_code: str,
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    return game_service.end_game(db, game_code, current_user)
+
+
+# 📼 O‘yin jurnali: barcha hodisalar NDJSON oqimi (host yoki admin)
+@router.get("/{game_code}/events")
+def get_game_events(
+        game_code: str,
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    events = game_service.replay_events(db, game_code, current_user)
+    return StreamingResponse(events, media_type=NDJSON_MEDIA_TYPE)
+
+
+# 🔁 Jurnaldan qayta tiklangan reyting (until_question - shu savolgacha)
+@router.get("/{game_code}/replay/leaderboard", response_model=ReplayLeaderboardResponse)
+def get_replay_leaderboard(
+        game_code: str,
+        until_question: Optional[int] = Query(None, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        current_user: TokenUser = Depends(get_token_user),
+        db: Session = Depends(get_db)
+):
+    return game_service.replay_leaderboard(db, game_code, current_user, until_question, limit)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from realtime import game_hub, encode_event
+from session_store import session_registry
+
+router = APIRouter(tags=["Realtime"])
+
+
+def _load_session(game_code: str):
+    db = SessionLocal()
+    try:
+        return session_registry.get(db, game_code)
+    finally:
+        db.close()
+
+
+# 📡 Lobby va savol holatini real vaqtda yuborish (polling o‘rniga)
+@router.websocket("/ws/game/{game_code}")
+async def game_events(websocket: WebSocket, game_code: str):
+    # 🔹 Avval obuna: snapshot o'qilayotganda chiqqan eventlar navbatda kutadi va yo'qolmaydi
+    conn = await game_hub.connect(game_code, websocket, start=False)
+    try:
+        session = await run_in_threadpool(_load_session, game_code)
+        if not session:
+            await websocket.close(code=4404)
+            return
+
+        await websocket.accept()
+        # 🔹 Avval to‘liq holat, keyin faqat o‘zgarishlar
+        await websocket.send_text(encode_event("session", game_code, session))
+        conn.start()
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await game_hub.disconnect(conn)
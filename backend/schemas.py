@@ -63,6 +63,20 @@ class QuestionSchema(BaseModel):
         }
 
 
+class PlayerQuestionSchema(BaseModel):
+    """Savol - to'g'ri javobsiz (o'yinchilar uchun)"""
+    id: str
+    question: str
+    options: List[str]
+
+
+class QuestionResponse(BaseModel):
+    """Bitta savol: /api/quiz/{game_code}/question/{n}"""
+    index: int
+    total: int
+    question: PlayerQuestionSchema
+
+
 class QuizCreate(BaseModel):
     title: str
     questions: List[QuestionSchema]
@@ -81,6 +95,34 @@ class QuizResponse(BaseModel):
         from_attributes = True
 
 
+class QuizSummary(BaseModel):
+    """Ro'yxatlar uchun: questions'siz"""
+    id: int
+    title: str
+    game_code: str
+    creator_id: int
+    created_at: datetime
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class QuizSummaryPage(BaseModel):
+    items: List[QuizSummary]
+    next_cursor: Optional[str] = None
+
+
+class PlayerQuizResponse(BaseModel):
+    id: int
+    title: str
+    game_code: str
+    questions: List[PlayerQuestionSchema]
+    creator_id: int
+    created_at: datetime
+    is_active: bool
+
+
 # ================== QUIZ HISTORY SCHEMAS ==================
 class QuizHistoryCreate(BaseModel):
     quiz_id: int
@@ -89,6 +131,7 @@ class QuizHistoryCreate(BaseModel):
     total_questions: int
     rank: int
     participants_count: int
+    correct_answers: Optional[int] = None
 
 
 class QuizHistoryResponse(BaseModel):
@@ -98,16 +141,67 @@ class QuizHistoryResponse(BaseModel):
     total_questions: int
     rank: int
     participants_count: int
+    correct_answers: Optional[int] = None
     played_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class QuizHistoryPage(BaseModel):
+    items: List[QuizHistoryResponse]
+    next_cursor: Optional[str] = None
+
+
+class UserStatsResponse(BaseModel):
+    user_id: int
+    games_played: int
+    total_score: int
+    average_score: float
+    best_score: Optional[int] = None
+    best_rank: Optional[int] = None
+    accuracy: Optional[float] = None  # 0..1, correct_answers ma'lum o'yinlar bo'yicha
+    last_played_at: Optional[datetime] = None
+
+
 # ================== GAME SESSION SCHEMAS ==================
 class JoinGameRequest(BaseModel):
     game_code: str
+    player_name: Optional[str] = None
+    player_token: Optional[str] = None  # qayta ulanish: join javobidagi token
+
+
+class AnswerSubmit(BaseModel):
+    player_name: Optional[str] = None
+    player_token: Optional[str] = None  # berilsa ism tokendan olinadi
+    question_index: int
+    answer: int
+
+
+class AnswerResult(BaseModel):
+    correct: bool
+    points: int
+    score: int
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
     player_name: str
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    game_code: str
+    total_players: int
+    top: List[LeaderboardEntry]
+    player: Optional[LeaderboardEntry] = None
+
+
+class ReplayLeaderboardResponse(BaseModel):
+    game_code: str
+    total_players: int
+    answers: int
+    top: List[LeaderboardEntry]
 
 
 class GameSessionResponse(BaseModel):
@@ -119,7 +213,15 @@ class GameSessionResponse(BaseModel):
     status: str
     is_active: bool                # ✅ yangi qo‘shilgan
     created_at: datetime
+    current_question: int = -1     # -1 = hali savol boshlanmagan
+    question_started_at: Optional[datetime] = None
+    question_ends_at: Optional[datetime] = None  # javob oynasi shu paytda yopiladi
     quiz: Optional[QuizResponse] = None  # ✅ related quiz response uchun
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class JoinGameResponse(GameSessionResponse):
+    player_token: str  # qayta ulanish va javoblar uchun
+    resumed: bool = False
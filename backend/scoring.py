@@ -0,0 +1,343 @@
+"""
+Javoblarni server tomonda baholash
+
+Natijalar o'yin davomida xotirada (yoki sqlite store'da) turadi, o'yin tugaganda
+quiz_history ga bitta bulk insert bilan yoziladi.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from leaderboard import Leaderboard
+from models import QuizHistory
+from quiz_cache import CachedQuiz, quiz_cache
+from shared_state import SharedStateDB, offload, shared_db, use_shared_state
+from stats import record_history, arecord_history
+
+QUESTION_TIME_LIMIT = float(os.getenv("QUESTION_TIME_LIMIT", "20"))
+BASE_POINTS = int(os.getenv("BASE_POINTS", "500"))
+MAX_TIME_BONUS = int(os.getenv("MAX_TIME_BONUS", "500"))
+
+
+class AnswerRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def score_answer(correct: bool, elapsed: float) -> int:
+    """To'g'ri javob uchun asosiy ball + tezlik uchun bonus (elapsed - savol ochilganidan beri)"""
+    if not correct:
+        return 0
+    remaining = max(0.0, 1.0 - elapsed / QUESTION_TIME_LIMIT)
+    return BASE_POINTS + int(MAX_TIME_BONUS * remaining)
+
+
+class PlayerResult:
+    __slots__ = ("player_name", "user_id", "score", "correct", "answered")
+
+    def __init__(self, player_name: str):
+        self.player_name = player_name
+        self.user_id: Optional[int] = None
+        self.score = 0
+        self.correct = 0
+        self.answered = set()
+
+
+class GameScores:
+    """Bitta o'yinning javoblari (xotirada)"""
+
+    def __init__(self, quiz: CachedQuiz):
+        self.quiz_id = quiz.id
+        self.quiz_title = quiz.title
+        self.correct_answers: List[int] = [q.get("correctAnswer") for q in quiz.questions]
+        self.players: Dict[str, PlayerResult] = {}
+        self.leaderboard = Leaderboard(len(self.correct_answers) * (BASE_POINTS + MAX_TIME_BONUS))
+        self.lock = threading.Lock()
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.correct_answers)
+
+    def submit(
+        self,
+        player_name: str,
+        question_index: int,
+        answer: int,
+        elapsed: float,
+        user_id: Optional[int] = None,
+    ) -> dict:
+        if not 0 <= question_index < self.total_questions:
+            raise AnswerRejected(404, "Question not found")
+
+        correct = answer == self.correct_answers[question_index]
+        points = score_answer(correct, elapsed)
+
+        with self.lock:
+            result = self.players.get(player_name)
+            if result is None:
+                result = self.players[player_name] = PlayerResult(player_name)
+            if question_index in result.answered:
+                raise AnswerRejected(409, "Question already answered")
+
+            result.answered.add(question_index)
+            result.score += points
+            if correct:
+                result.correct += 1
+            if user_id is not None:
+                result.user_id = user_id
+            total = result.score
+            self.leaderboard.update(player_name, total)
+
+        return {"correct": correct, "points": points, "score": total}
+
+    def standings(self, limit: Optional[int] = 10, player_name: Optional[str] = None) -> dict:
+        with self.lock:
+            top = self.leaderboard.top(limit)
+            player = None
+            if player_name is not None and player_name in self.leaderboard:
+                player = (
+                    self.leaderboard.rank(player_name),
+                    player_name,
+                    self.leaderboard.score(player_name),
+                )
+            total = len(self.leaderboard)
+
+        def entry(item):
+            rank, name, score = item
+            return {"rank": rank, "player_name": name, "score": score}
+
+        return {
+            "total_players": total,
+            "top": [entry(item) for item in top],
+            "player": entry(player) if player else None,
+        }
+
+    def history_rows(self, participants_count: int) -> List[dict]:
+        """Yakuniy rank va participants_count leaderboard'dan olinadi"""
+        with self.lock:
+            ranking = self.leaderboard.top()
+            results = dict(self.players)
+
+        participants_count = max(participants_count, len(ranking))
+        return [
+            {
+                "user_id": results[name].user_id,
+                "quiz_id": self.quiz_id,
+                "quiz_title": self.quiz_title,
+                "score": score,
+                "total_questions": self.total_questions,
+                "rank": rank,
+                "participants_count": participants_count,
+                "correct_answers": results[name].correct,
+            }
+            for rank, name, score in ranking
+        ]
+
+
+class SharedGameScores:
+    """GameScores interfeysi, javoblar shared store'ning answers jadvalida"""
+
+    # Teng ballda shu ballga birinchi yetgan oldinda (Leaderboard kabi)
+    RANKING_SQL = """
+        WITH totals AS (
+            SELECT player_name,
+                   SUM(points) AS score,
+                   SUM(correct) AS correct,
+                   MAX(user_id) AS user_id,
+                   COALESCE(MAX(CASE WHEN points > 0 THEN seq END), MIN(seq)) AS reached
+            FROM answers WHERE game_code = ? GROUP BY player_name
+        )
+        SELECT RANK() OVER (ORDER BY score DESC), player_name, score, correct, user_id
+        FROM totals ORDER BY score DESC, reached LIMIT ?
+    """
+
+    def __init__(self, db: SharedStateDB, game_code: str, quiz_id: int, quiz_title: str,
+                 correct_answers: List[int]):
+        self.db = db
+        self.game_code = game_code
+        self.quiz_id = quiz_id
+        self.quiz_title = quiz_title
+        self.correct_answers = correct_answers
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.correct_answers)
+
+    def submit(
+        self,
+        player_name: str,
+        question_index: int,
+        answer: int,
+        elapsed: float,
+        user_id: Optional[int] = None,
+    ) -> dict:
+        if not 0 <= question_index < self.total_questions:
+            raise AnswerRejected(404, "Question not found")
+
+        correct = answer == self.correct_answers[question_index]
+        points = score_answer(correct, elapsed)
+
+        with self.db.transaction() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO answers (game_code, player_name, question_index, points, correct, user_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.game_code, player_name, question_index, points, int(correct), user_id),
+                )
+            except sqlite3.IntegrityError:
+                raise AnswerRejected(409, "Question already answered")
+            total = conn.execute(
+                "SELECT SUM(points) FROM answers WHERE game_code = ? AND player_name = ?",
+                (self.game_code, player_name),
+            ).fetchone()[0]
+
+        return {"correct": correct, "points": points, "score": total}
+
+    def _ranking(self, limit: Optional[int] = None) -> list:
+        return self.db.execute(self.RANKING_SQL, (self.game_code, -1 if limit is None else limit)).fetchall()
+
+    def standings(self, limit: Optional[int] = 10, player_name: Optional[str] = None) -> dict:
+        top = self._ranking(limit)
+        total = self.db.execute(
+            "SELECT COUNT(DISTINCT player_name) FROM answers WHERE game_code = ?", (self.game_code,)
+        ).fetchone()[0]
+
+        player = None
+        if player_name is not None:
+            row = self.db.execute(
+                """
+                WITH totals AS (
+                    SELECT player_name, SUM(points) AS score FROM answers
+                    WHERE game_code = ? GROUP BY player_name
+                )
+                SELECT 1 + (SELECT COUNT(*) FROM totals AS other WHERE other.score > totals.score), score
+                FROM totals WHERE player_name = ?
+                """,
+                (self.game_code, player_name),
+            ).fetchone()
+            if row is not None:
+                player = {"rank": row[0], "player_name": player_name, "score": row[1]}
+
+        return {
+            "total_players": total,
+            "top": [{"rank": rank, "player_name": name, "score": score} for rank, name, score, _, _ in top],
+            "player": player,
+        }
+
+    def history_rows(self, participants_count: int) -> List[dict]:
+        ranking = self._ranking()
+        participants_count = max(participants_count, len(ranking))
+        return [
+            {
+                "user_id": user_id,
+                "quiz_id": self.quiz_id,
+                "quiz_title": self.quiz_title,
+                "score": score,
+                "total_questions": self.total_questions,
+                "rank": rank,
+                "participants_count": participants_count,
+                "correct_answers": correct,
+            }
+            for rank, _, score, correct, user_id in ranking
+        ]
+
+
+class ScoreBuffer:
+    def __init__(self):
+        self._games: Dict[str, GameScores] = {}
+        self._lock = threading.Lock()
+
+    def get(self, game_code: str) -> Optional[GameScores]:
+        return self._games.get(game_code)
+
+    def _register(self, game_code: str, quiz: CachedQuiz) -> GameScores:
+        with self._lock:
+            return self._games.setdefault(game_code, GameScores(quiz))
+
+    def get_or_create(self, db: Session, game_code: str) -> Optional[GameScores]:
+        scores = self.get(game_code)
+        if scores is not None:
+            return scores
+
+        quiz = quiz_cache.get(db, game_code)
+        if not quiz:
+            return None
+        return self._register(game_code, quiz)
+
+    async def aget_or_create(self, db: AsyncSession, game_code: str) -> Optional[GameScores]:
+        scores = await offload(self.get, game_code)
+        if scores is not None:
+            return scores
+
+        quiz = await quiz_cache.aget(db, game_code)
+        if not quiz:
+            return None
+        return await offload(self._register, game_code, quiz)
+
+    def discard(self, game_code: str):
+        with self._lock:
+            self._games.pop(game_code, None)
+
+    def add_history(self, db: Session, game_code: str, participants_count: int) -> int:
+        """Natijalarni quiz_history ga bitta bulk insert bilan qo'shish (commit chaqiruvchida)"""
+        scores = self.get(game_code)
+        if scores is None:
+            return 0
+
+        rows = scores.history_rows(participants_count)
+        if rows:
+            db.execute(insert(QuizHistory), rows)
+            record_history(db, rows)
+        return len(rows)
+
+    async def aadd_history(self, db: AsyncSession, game_code: str, participants_count: int) -> int:
+        scores = await offload(self.get, game_code)
+        if scores is None:
+            return 0
+
+        rows = await offload(scores.history_rows, participants_count)
+        if rows:
+            await db.execute(insert(QuizHistory), rows)
+            await arecord_history(db, rows)
+        return len(rows)
+
+
+class SharedScoreBuffer(ScoreBuffer):
+    """O'yinlar scored_games, javoblar answers jadvalida (barcha workerlar uchun)"""
+
+    def __init__(self, db: SharedStateDB):
+        super().__init__()
+        self.db = db
+
+    def get(self, game_code: str) -> Optional[SharedGameScores]:
+        row = self.db.execute(
+            "SELECT quiz_id, quiz_title, correct_answers FROM scored_games WHERE game_code = ?", (game_code,)
+        ).fetchone()
+        if row is None:
+            return None
+        return SharedGameScores(self.db, game_code, row[0], row[1], json.loads(row[2]))
+
+    def _register(self, game_code: str, quiz: CachedQuiz) -> SharedGameScores:
+        correct_answers = [q.get("correctAnswer") for q in quiz.questions]
+        self.db.execute(
+            "INSERT OR IGNORE INTO scored_games (game_code, quiz_id, quiz_title, correct_answers) VALUES (?, ?, ?, ?)",
+            (game_code, quiz.id, quiz.title, json.dumps(correct_answers)),
+        )
+        return SharedGameScores(self.db, game_code, quiz.id, quiz.title, correct_answers)
+
+    def discard(self, game_code: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM answers WHERE game_code = ?", (game_code,))
+            conn.execute("DELETE FROM scored_games WHERE game_code = ?", (game_code,))
+
+
+score_buffer = SharedScoreBuffer(shared_db) if use_shared_state() else ScoreBuffer()
@@ -0,0 +1,22 @@
+"""Oldindan serialize qilingan javoblar uchun JSON yordamchilari (orjson bo'lsa u, aks holda stdlib)"""
+
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Tayyor JSON baytlarini qayta validatsiyasiz yuborish"""
+
+    media_type = "application/json"
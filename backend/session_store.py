@@ -0,0 +1,534 @@
+"""
+Faol o'yin sessiyalari registri
+
+Sessiyalar store'da saqlanadi (xotira yoki GAME_STATE_BACKEND=sqlite), o'zgarganlari
+game_sessions jadvaliga fon flusher tomonidan batch bilan yoziladi.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import GameSession
+from player_tokens import PlayerClaim, run_id
+from scoring import QUESTION_TIME_LIMIT
+from shared_state import SharedStateDB, offload, shared_db, use_shared_state
+
+logger = logging.getLogger(__name__)
+
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class LiveSession:
+    """Bitta GameSession qatorining xotiradagi nusxasi"""
+
+    def __init__(
+        self,
+        id: int,
+        game_code: str,
+        quiz_id: int,
+        host_id: int,
+        status: str,
+        is_active: bool,
+        created_at: Optional[datetime],
+        players: Iterable[str],  # ismlar yoki {ism: slot}
+        current_question: int = -1,
+        question_started_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
+    ):
+        self.id = id
+        self.game_code = game_code
+        self.quiz_id = quiz_id
+        self.host_id = host_id
+        self.status = status
+        self.is_active = is_active
+        self.created_at = created_at
+        # ism -> slot: O(1) a'zolik tekshiruvi, qo'shilish tartibi saqlanadi.
+        # DB dan yuklanganda slot noma'lum (None) - token faqat ism bo'yicha tekshiriladi
+        self.players: Dict[str, Optional[str]] = players if isinstance(players, dict) else dict.fromkeys(players)
+        # Savol holati DB ga yozilmaydi, faqat session store'da
+        self.current_question = current_question
+        self.question_started_at = question_started_at
+        self.updated_at = updated_at or created_at
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_row(cls, row: GameSession) -> "LiveSession":
+        return cls(
+            row.id, row.game_code, row.quiz_id, row.host_id, row.status or "waiting",
+            bool(row.is_active), row.created_at, row.players or [],
+            updated_at=row.updated_at,
+        )
+
+    @classmethod
+    def from_state(cls, state: str) -> "LiveSession":
+        data = json.loads(state)
+        data.pop("question_ends_at", None)  # hisoblanadigan maydon
+        data["created_at"] = _parse_datetime(data["created_at"])
+        data["question_started_at"] = _parse_datetime(data["question_started_at"])
+        data["updated_at"] = _parse_datetime(data.get("updated_at"))
+        return cls(**data)
+
+    def to_state(self) -> str:
+        # players {ism: slot} ko'rinishida - slotlar workerlar o'rtasida saqlanadi
+        return json.dumps({**self.snapshot(), "players": self.players}, default=_iso, separators=(",", ":"))
+
+    def row(self) -> dict:
+        """game_sessions ga yoziladigan maydonlar (lock ostida chaqiriladi)"""
+        return {
+            "id": self.id,
+            "players": list(self.players),
+            "status": self.status,
+            "is_active": self.is_active,
+            "updated_at": self.updated_at,
+        }
+
+    def snapshot(self) -> dict:
+        """Response uchun nusxa (lock ostida chaqiriladi)"""
+        return {
+            "id": self.id,
+            "game_code": self.game_code,
+            "quiz_id": self.quiz_id,
+            "host_id": self.host_id,
+            "players": list(self.players),
+            "status": self.status,
+            "is_active": self.is_active,
+            "created_at": self.created_at,
+            "current_question": self.current_question,
+            "question_started_at": self.question_started_at,
+            "question_ends_at": self.question_ends_at(),
+            "updated_at": self.updated_at,
+        }
+
+    def question_ends_at(self) -> Optional[datetime]:
+        if self.question_started_at is None:
+            return None
+        return self.question_started_at + timedelta(seconds=QUESTION_TIME_LIMIT)
+
+
+# ==================== SESSION OPERATIONS ====================
+# Store ularni bitta sessiya ustida atomik bajaradi. None = o'zgarish yo'q.
+
+class PlayerNameTaken(Exception):
+    """Ism lobbyda band va so'rovda shu slot uchun token yo'q"""
+
+
+class StalePlayerToken(Exception):
+    """Token o'yin qayta boshlanishidan oldin berilgan"""
+
+
+def _this_run(live: LiveSession, claim: PlayerClaim) -> bool:
+    # Restart'dan oldin berilgan token yangi o'yinga yaroqsiz
+    return claim.run == run_id(live.created_at)
+
+
+def _owns(live: LiveSession, player_name: str, claim: Optional[PlayerClaim]) -> bool:
+    # claim None - tokensiz so'rov; saqlangan slot None - DB dan yuklangan sessiya
+    if player_name not in live.players:
+        return False
+    return claim is None or (_this_run(live, claim) and live.players[player_name] in (claim.slot, None))
+
+
+def _snapshot(live: LiveSession) -> dict:
+    return live.snapshot()
+
+
+def _player_view(live: LiveSession, player_name: str, claim: Optional[PlayerClaim] = None) -> dict:
+    return {
+        "is_active": live.is_active,
+        "joined": _owns(live, player_name, claim),
+        "current_question": live.current_question,
+        "question_started_at": live.question_started_at,
+    }
+
+
+def _join(live: LiveSession, player_name: str, slot: str, claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+    if not live.is_active:
+        return None
+    if claim is not None and not _this_run(live, claim):
+        raise StalePlayerToken(player_name)
+    # Ism bo'sh yoki tokendagi slotniki bo'lsa - qayta ulanish
+    resumed = claim is not None and live.players.get(player_name, claim.slot) in (claim.slot, None)
+    if resumed:
+        slot = claim.slot
+    elif player_name in live.players:
+        raise PlayerNameTaken(player_name)
+    live.players[player_name] = slot
+    live.updated_at = datetime.utcnow()
+    return {**live.snapshot(), "player_slot": slot, "resumed": resumed}
+
+
+def _leave(live: LiveSession, player_name: str, claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+    if not _owns(live, player_name, claim):
+        return None
+    del live.players[player_name]
+    live.updated_at = datetime.utcnow()
+    return live.snapshot()
+
+
+def _advance(live: LiveSession, total_questions: int, expected: Optional[int] = None) -> Optional[dict]:
+    if not live.is_active or live.current_question + 1 >= total_questions:
+        return None
+    # Taymer eskirgan (host yoki boshqa worker allaqachon o'tkazgan)
+    if expected is not None and live.current_question != expected:
+        return None
+    live.current_question += 1
+    live.question_started_at = live.updated_at = datetime.utcnow()
+    live.status = "playing"
+    return live.snapshot()
+
+
+def _finish(live: LiveSession) -> dict:
+    live.is_active = False
+    live.status = "finished"
+    live.updated_at = datetime.utcnow()
+    return live.snapshot()
+
+
+def _expire(live: LiveSession, cutoff: datetime) -> Optional[dict]:
+    # DB ga hali yozilmagan faollik bo'lsa sessiya tegilmaydi
+    if live.updated_at and live.updated_at >= cutoff:
+        return None
+    return _finish(live)
+
+
+_sessions = GameSession.__table__
+
+# Fon flush: tugatilgan (end) yoki yangiroq qatorni eskirgan snapshot bilan ustidan yozmaydi
+_FLUSH_STATEMENT = (
+    update(_sessions)
+    .where(
+        _sessions.c.id == bindparam("row_id"),
+        _sessions.c.is_active.is_(True),
+        or_(_sessions.c.updated_at.is_(None), _sessions.c.updated_at <= bindparam("row_updated_at")),
+    )
+    .values(
+        players=bindparam("row_players", type_=_sessions.c.players.type),
+        status=bindparam("row_status"),
+        is_active=bindparam("row_is_active"),
+        updated_at=bindparam("row_updated_at"),
+    )
+)
+
+
+def _flush_params(row: dict) -> dict:
+    return {f"row_{key}": value for key, value in row.items()}
+
+
+def _row(snapshot: dict) -> dict:
+    return {key: snapshot[key] for key in ("id", "players", "status", "is_active", "updated_at")}
+
+
+# ==================== STORES ====================
+
+class MemorySessionStore:
+    """Bitta jarayon uchun: sessiyalar xotirada, har birining o'z lock'i"""
+
+    def __init__(self):
+        self._sessions: Dict[str, LiveSession] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def apply(self, game_code: str, op: Callable, write: bool = False) -> Tuple[bool, Optional[dict]]:
+        live = self._sessions.get(game_code)
+        if live is None:
+            return False, None
+        with live.lock:
+            result = op(live)
+        if write and result is not None:
+            with self._lock:
+                self._dirty.add(game_code)
+        return True, result
+
+    def add(self, live: LiveSession):
+        with self._lock:
+            self._sessions.setdefault(live.game_code, live)
+
+    def put(self, live: LiveSession):
+        with self._lock:
+            self._sessions[live.game_code] = live
+            self._dirty.discard(live.game_code)
+
+    def remove(self, game_code: str):
+        with self._lock:
+            self._sessions.pop(game_code, None)
+            self._dirty.discard(game_code)
+
+    def take_dirty(self, game_codes: Optional[Iterable[str]] = None) -> List[Tuple[str, dict]]:
+        with self._lock:
+            if game_codes is None:
+                codes = self._dirty
+                self._dirty = set()
+            else:
+                codes = {code for code in game_codes if code in self._dirty}
+                self._dirty -= codes
+            sessions = [self._sessions[code] for code in codes if code in self._sessions]
+
+        rows = []
+        for live in sessions:
+            with live.lock:
+                rows.append((live.game_code, live.row()))
+        return rows
+
+    def mark_dirty(self, game_codes: Iterable[str]):
+        with self._lock:
+            self._dirty.update(code for code in game_codes if code in self._sessions)
+
+
+class SQLiteSessionStore:
+    """Workerlar o'rtasida umumiy: sessiya holati live_sessions jadvalida JSON"""
+
+    def __init__(self, db: SharedStateDB):
+        self.db = db
+
+    def apply(self, game_code: str, op: Callable, write: bool = False) -> Tuple[bool, Optional[dict]]:
+        select_state = "SELECT state FROM live_sessions WHERE game_code = ?"
+        if not write:
+            row = self.db.execute(select_state, (game_code,)).fetchone()
+            if row is None:
+                return False, None
+            return True, op(LiveSession.from_state(row[0]))
+
+        with self.db.transaction() as conn:
+            row = conn.execute(select_state, (game_code,)).fetchone()
+            if row is None:
+                return False, None
+            live = LiveSession.from_state(row[0])
+            result = op(live)
+            if result is not None:
+                conn.execute(
+                    "UPDATE live_sessions SET state = ?, dirty = 1 WHERE game_code = ?",
+                    (live.to_state(), game_code),
+                )
+        return True, result
+
+    def add(self, live: LiveSession):
+        self.db.execute(
+            "INSERT OR IGNORE INTO live_sessions (game_code, state, dirty) VALUES (?, ?, 0)",
+            (live.game_code, live.to_state()),
+        )
+
+    def put(self, live: LiveSession):
+        self.db.execute(
+            "INSERT OR REPLACE INTO live_sessions (game_code, state, dirty) VALUES (?, ?, 0)",
+            (live.game_code, live.to_state()),
+        )
+
+    def remove(self, game_code: str):
+        self.db.execute("DELETE FROM live_sessions WHERE game_code = ?", (game_code,))
+
+    def take_dirty(self, game_codes: Optional[Iterable[str]] = None) -> List[Tuple[str, dict]]:
+        where, params = "dirty = 1", ()
+        if game_codes is not None:
+            codes = list(game_codes)
+            if not codes:
+                return []
+            where += f" AND game_code IN ({','.join('?' * len(codes))})"
+            params = tuple(codes)
+
+        with self.db.transaction() as conn:
+            rows = conn.execute(f"SELECT game_code, state FROM live_sessions WHERE {where}", params).fetchall()
+            if rows:
+                conn.execute(f"UPDATE live_sessions SET dirty = 0 WHERE {where}", params)
+        return [(code, LiveSession.from_state(state).row()) for code, state in rows]
+
+    def mark_dirty(self, game_codes: Iterable[str]):
+        codes = list(game_codes)
+        if codes:
+            self.db.execute(
+                f"UPDATE live_sessions SET dirty = 1 WHERE game_code IN ({','.join('?' * len(codes))})",
+                tuple(codes),
+            )
+
+
+# ==================== REGISTRY ====================
+
+class SessionRegistry:
+    def __init__(self, store=None):
+        self.store = store if store is not None else MemorySessionStore()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lookup ----------
+
+    def _apply_loaded(self, game_code: str, live: Optional[LiveSession], op: Callable, write: bool):
+        if live is None:
+            return None
+        if not live.is_active:
+            # Tugagan sessiyalar store'da saqlanmaydi
+            return op(live)
+
+        self.store.add(live)
+        return self.store.apply(game_code, op, write)[1]
+
+    def _apply(self, db: Session, game_code: str, op: Callable, write: bool = False):
+        found, result = self.store.apply(game_code, op, write)
+        if found:
+            return result
+
+        row = db.query(GameSession).filter(GameSession.game_code == game_code).first()
+        return self._apply_loaded(game_code, LiveSession.from_row(row) if row else None, op, write)
+
+    async def _aapply(self, db: AsyncSession, game_code: str, op: Callable, write: bool = False):
+        found, result = await offload(self.store.apply, game_code, op, write)
+        if found:
+            return result
+
+        row = (await db.execute(select(GameSession).where(GameSession.game_code == game_code))).scalars().first()
+        live = LiveSession.from_row(row) if row else None
+        return await offload(self._apply_loaded, game_code, live, op, write)
+
+    def get(self, db: Session, game_code: str) -> Optional[dict]:
+        return self._apply(db, game_code, _snapshot)
+
+    async def aget(self, db: AsyncSession, game_code: str) -> Optional[dict]:
+        return await self._aapply(db, game_code, _snapshot)
+
+    def player_view(self, db: Session, game_code: str, player_name: str,
+                    claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        """Javob qabul qilish uchun kerakli holat (players ro'yxatini nusxalamasdan)"""
+        return self._apply(db, game_code, partial(_player_view, player_name=player_name, claim=claim))
+
+    async def aplayer_view(self, db: AsyncSession, game_code: str, player_name: str,
+                           claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        return await self._aapply(db, game_code, partial(_player_view, player_name=player_name, claim=claim))
+
+    # ---------- mutations ----------
+
+    def activate(self, row: GameSession) -> dict:
+        """Start qilingan (DB ga yozilgan) sessiyani registryga joylash"""
+        live = LiveSession.from_row(row)
+        self.store.put(live)
+        return live.snapshot()
+
+    async def aactivate(self, row: GameSession) -> dict:
+        live = LiveSession.from_row(row)
+        await offload(self.store.put, live)
+        return live.snapshot()
+
+    def join(self, db: Session, game_code: str, player_name: str, slot: str,
+             claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        """O'yinchini qo'shish yoki claim bo'yicha slotini tiklash. Sessiya faol bo'lmasa None,
+        ism boshqa slotda band bo'lsa PlayerNameTaken."""
+        return self._apply(db, game_code, partial(_join, player_name=player_name, slot=slot, claim=claim),
+                           write=True)
+
+    async def ajoin(self, db: AsyncSession, game_code: str, player_name: str, slot: str,
+                    claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        return await self._aapply(db, game_code, partial(_join, player_name=player_name, slot=slot, claim=claim),
+                                  write=True)
+
+    def leave(self, db: Session, game_code: str, player_name: str, claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        return self._apply(db, game_code, partial(_leave, player_name=player_name, claim=claim), write=True)
+
+    async def aleave(self, db: AsyncSession, game_code: str, player_name: str,
+                     claim: Optional[PlayerClaim] = None) -> Optional[dict]:
+        return await self._aapply(db, game_code, partial(_leave, player_name=player_name, claim=claim), write=True)
+
+    def advance(self, db: Session, game_code: str, total_questions: int,
+                expected: Optional[int] = None) -> Optional[dict]:
+        """Keyingi savolga o'tish. Savollar tugagan yoki joriy savol expected emas bo'lsa None."""
+        return self._apply(db, game_code, partial(_advance, total_questions=total_questions, expected=expected),
+                           write=True)
+
+    async def aadvance(self, db: AsyncSession, game_code: str, total_questions: int,
+                       expected: Optional[int] = None) -> Optional[dict]:
+        return await self._aapply(db, game_code, partial(_advance, total_questions=total_questions,
+                                                         expected=expected), write=True)
+
+    def finish(self, db: Session, game_code: str) -> Optional[dict]:
+        """Sessiyani tugatish: yozuv chaqiruvchining tranzaksiyasida, commit chaqiruvchida"""
+        snapshot = self._apply(db, game_code, _finish, write=True)
+        if snapshot is None:
+            return None
+
+        # Store'dagi sessiya allaqachon tugagan - boshqa so'rovlar uni yopiq ko'radi
+        db.execute(update(GameSession), [_row(snapshot)])
+        self.store.remove(game_code)
+        return snapshot
+
+    async def afinish(self, db: AsyncSession, game_code: str) -> Optional[dict]:
+        """finish() ning async varianti"""
+        snapshot = await self._aapply(db, game_code, _finish, write=True)
+        if snapshot is None:
+            return None
+
+        await db.execute(update(GameSession), [_row(snapshot)])
+        await offload(self.store.remove, game_code)
+        return snapshot
+
+    def expire(self, game_code: str, cutoff: datetime) -> bool:
+        """Idle sessiyani store'da yopish (keyingi join rad etiladi); cutoff dan keyin faollik bo'lsa False"""
+        found, snapshot = self.store.apply(game_code, partial(_expire, cutoff=cutoff), write=True)
+        return not found or snapshot is not None
+
+    def discard(self, game_code: str):
+        self.store.remove(game_code)
+
+    # ---------- write-behind ----------
+
+    def flush(self, game_codes: Optional[Iterable[str]] = None) -> int:
+        """O'zgargan sessiyalarni bitta tranzaksiyada DB ga yozish"""
+        rows = self.store.take_dirty(game_codes)
+        if not rows:
+            return 0
+        return self._write(rows)
+
+    def _write(self, rows: List[Tuple[str, dict]]) -> int:
+        db = SessionLocal()
+        try:
+            db.execute(_FLUSH_STATEMENT, [_flush_params(row) for _, row in rows])
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.store.mark_dirty(code for code, _ in rows)
+            logger.exception("Game session flush failed")
+            return 0
+        finally:
+            db.close()
+
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(SESSION_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                # Shared store band bo'lsa keyingi tsiklda qayta urinamiz
+                logger.exception("Game session flush failed")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+session_registry = SessionRegistry(SQLiteSessionStore(shared_db) if use_shared_state() else MemorySessionStore())
@@ -0,0 +1,121 @@
+"""
+Workerlar o'rtasida umumiy o'yin holati
+
+GAME_STATE_BACKEND=memory (default) - holat process xotirasida (faqat bitta worker).
+GAME_STATE_BACKEND=sqlite - GAME_STATE_PATH dagi WAL rejimidagi SQLite bazada.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+GAME_STATE_BACKEND = os.getenv("GAME_STATE_BACKEND", "memory")  # memory | sqlite
+GAME_STATE_PATH = os.getenv("GAME_STATE_PATH", "game_state.db")
+GAME_STATE_BUSY_TIMEOUT = float(os.getenv("GAME_STATE_BUSY_TIMEOUT", "5"))
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS live_sessions (
+        game_code TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        dirty INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_live_sessions_dirty ON live_sessions (dirty)",
+    """
+    CREATE TABLE IF NOT EXISTS scored_games (
+        game_code TEXT PRIMARY KEY,
+        quiz_id INTEGER NOT NULL,
+        quiz_title TEXT NOT NULL,
+        correct_answers TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS answers (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        game_code TEXT NOT NULL,
+        player_name TEXT NOT NULL,
+        question_index INTEGER NOT NULL,
+        points INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        user_id INTEGER,
+        UNIQUE (game_code, player_name, question_index)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        game_code TEXT NOT NULL,
+        event TEXT NOT NULL,
+        message TEXT NOT NULL,
+        origin TEXT NOT NULL,
+        created REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_events_created ON events (created)",
+)
+
+
+def use_shared_state() -> bool:
+    return GAME_STATE_BACKEND == "sqlite"
+
+
+class SharedStateDB:
+    """Har bir thread o'z ulanishiga ega; yozuvlar BEGIN IMMEDIATE bilan"""
+
+    def __init__(self, path: str = GAME_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=GAME_STATE_BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            if not self._schema_ready:
+                with self._schema_lock:
+                    if not self._schema_ready:
+                        with self._transaction(conn):
+                            for statement in SCHEMA:
+                                conn.execute(statement)
+                        self._schema_ready = True
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def transaction(self):
+        """Yozuv tranzaksiyasi - boshqa workerlar bilan ketma-ketlashtiriladi"""
+        return self._transaction(self.connection())
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Autocommit (o'qish yoki bitta yozuv)"""
+        return self.connection().execute(sql, params)
+
+
+shared_db = SharedStateDB() if use_shared_state() else None
+
+
+async def offload(fn, *args):
+    """Shared backend chaqiruvlari (SQLite) event loopni bloklamasligi uchun threadpool'da"""
+    if use_shared_state():
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
@@ -0,0 +1,201 @@
+"""
+Foydalanuvchi statistikasi (user_stats)
+
+Har bir tarix yozuvi bilan bitta upsert - GET /api/stats/me primary key bo'yicha o'qiladi.
+Upsert'i yo'q dialektlarda qatorlar o'qilib, Python'da birlashtiriladi va yangilanadi.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import UserStats
+
+SUMMED_COLUMNS = ("games_played", "total_score", "total_questions", "graded_questions", "correct_answers")
+
+
+def _empty(user_id: int) -> dict:
+    return {
+        "user_id": user_id,
+        "games_played": 0,
+        "total_score": 0,
+        "best_score": None,
+        "best_rank": None,
+        "total_questions": 0,
+        "graded_questions": 0,
+        "correct_answers": 0,
+        "last_played_at": None,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _fold(stats: dict, row: Mapping):
+    score = row["score"] or 0
+    rank = row.get("rank")
+    total_questions = row.get("total_questions") or 0
+    correct = row.get("correct_answers")
+    played_at = row.get("played_at") or stats["updated_at"]
+
+    stats["games_played"] += 1
+    stats["total_score"] += score
+    stats["total_questions"] += total_questions
+    if correct is not None:
+        stats["graded_questions"] += total_questions
+        stats["correct_answers"] += correct
+    if stats["best_score"] is None or score > stats["best_score"]:
+        stats["best_score"] = score
+    if rank and (stats["best_rank"] is None or rank < stats["best_rank"]):
+        stats["best_rank"] = rank
+    if stats["last_played_at"] is None or played_at > stats["last_played_at"]:
+        stats["last_played_at"] = played_at
+
+
+def collect(rows: Iterable[Mapping], stats: Optional[Dict[int, dict]] = None) -> Dict[int, dict]:
+    """History qatorlarini user_id bo'yicha yig'ish (mehmon o'yinchilar tashlab ketiladi)"""
+    if stats is None:
+        stats = {}
+    for row in rows:
+        user_id = row.get("user_id")
+        if user_id is None:
+            continue
+        entry = stats.get(user_id)
+        if entry is None:
+            entry = stats[user_id] = _empty(user_id)
+        _fold(entry, row)
+    return stats
+
+
+def _greater(current, new):
+    return case((current.is_(None), new), (new > current, new), else_=current)
+
+
+def _smaller(current, new):
+    return case((current.is_(None), new), (new < current, new), else_=current)
+
+
+UPSERT_DIALECTS = {"mysql": mysql_insert, "sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def upsert_statement(dialect: str, replace: bool = False):
+    """user_stats upsert: oddiy holatda qo'shadi, replace=True da qayta yozadi (boshqa dialektda None)"""
+    dialect_insert = UPSERT_DIALECTS.get(dialect)
+    if dialect_insert is None:
+        return None
+    stmt = dialect_insert(UserStats)
+    new = stmt.inserted if dialect == "mysql" else stmt.excluded
+
+    table = UserStats.__table__.c
+    if replace:
+        values = {column.name: new[column.name] for column in table if column.name != "user_id"}
+    else:
+        values = {name: table[name] + new[name] for name in SUMMED_COLUMNS}
+        values["best_score"] = _greater(table.best_score, new.best_score)
+        values["best_rank"] = _smaller(table.best_rank, new.best_rank)
+        values["last_played_at"] = _greater(table.last_played_at, new.last_played_at)
+        values["updated_at"] = new.updated_at
+
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(**values)
+    return stmt.on_conflict_do_update(index_elements=[UserStats.user_id], set_=values)
+
+
+def _merge(current: Mapping, new: dict) -> dict:
+    merged = dict(new)
+    for name in SUMMED_COLUMNS:
+        merged[name] = (current[name] or 0) + new[name]
+    for name, pick in (("best_score", max), ("best_rank", min), ("last_played_at", max)):
+        values = [value for value in (current[name], new[name]) if value is not None]
+        merged[name] = pick(values) if values else None
+    return merged
+
+
+def _split(existing: Dict[int, Mapping], stats: List[dict], replace: bool):
+    """O'qilgan qatorlar bo'yicha: (yangilanadiganlar, qo'shiladiganlar)"""
+    updates, inserts = [], []
+    for entry in stats:
+        current = existing.get(entry["user_id"])
+        if current is None:
+            inserts.append(entry)
+        else:
+            updates.append(entry if replace else _merge(current, entry))
+    return updates, inserts
+
+
+def _existing_query(stats: List[dict]):
+    # FOR UPDATE: parallel yozuvchi mavjud qatorni o'qib-yangilash orasida o'zgartirmaydi
+    table = UserStats.__table__
+    ids = [entry["user_id"] for entry in stats]
+    return select(table).where(table.c.user_id.in_(ids)).with_for_update()
+
+
+def write_stats(db: Session, stats: List[dict], replace: bool = False):
+    """collect() natijasini yozish (commit chaqiruvchida)"""
+    stmt = upsert_statement(db.get_bind().dialect.name, replace)
+    if stmt is not None:
+        db.execute(stmt, stats)
+        return
+    existing = {row["user_id"]: row for row in db.execute(_existing_query(stats)).mappings()}
+    updates, inserts = _split(existing, stats, replace)
+    if updates:
+        db.execute(update(UserStats), updates)
+    if inserts:
+        db.execute(insert(UserStats), inserts)
+
+
+async def awrite_stats(db: AsyncSession, stats: List[dict], replace: bool = False):
+    stmt = upsert_statement(db.get_bind().dialect.name, replace)
+    if stmt is not None:
+        await db.execute(stmt, stats)
+        return
+    existing = {row["user_id"]: row for row in (await db.execute(_existing_query(stats))).mappings()}
+    updates, inserts = _split(existing, stats, replace)
+    if updates:
+        await db.execute(update(UserStats), updates)
+    if inserts:
+        await db.execute(insert(UserStats), inserts)
+
+
+def record_history(db: Session, rows: List[Mapping]):
+    """History insert bilan bir tranzaksiyada (commit chaqiruvchida)"""
+    stats = collect(rows)
+    if stats:
+        write_stats(db, list(stats.values()))
+
+
+async def arecord_history(db: AsyncSession, rows: List[Mapping]):
+    stats = collect(rows)
+    if stats:
+        await awrite_stats(db, list(stats.values()))
+
+
+def stats_response(user_id: int, stats: Optional[UserStats]) -> dict:
+    if stats is None or not stats.games_played:
+        return {
+            "user_id": user_id,
+            "games_played": 0,
+            "total_score": 0,
+            "average_score": 0.0,
+            "best_score": None,
+            "best_rank": None,
+            "accuracy": None,
+            "last_played_at": None,
+        }
+    return {
+        "user_id": user_id,
+        "games_played": stats.games_played,
+        "total_score": stats.total_score,
+        "average_score": round(stats.total_score / stats.games_played, 2),
+        "best_score": stats.best_score,
+        "best_rank": stats.best_rank,
+        "accuracy": (
+            round(stats.correct_answers / stats.graded_questions, 4)
+            if stats.graded_questions else None
+        ),
+        "last_played_at": stats.last_played_at,
+    }
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+QUIZ = {
+    "title": "Test quiz",
+    "questions": [
+        {"id": str(i), "question": f"Savol {i}", "options": ["a", "b", "c", "d"], "correctAnswer": i % 4}
+        for i in range(3)
+    ],
+}
+
+
+def _purge_backend_modules():
+    # DB_BACKEND import paytida o'qiladi - har bir rejim uchun modullar qayta yuklanadi
+    for name, module in list(sys.modules.items()):
+        # routes/ - namespace package: __file__ yo'q, faqat __path__
+        path = getattr(module, "__file__", None) or next(iter(getattr(module, "__path__", None) or ()), "")
+        if path.startswith(BACKEND_DIR) and not path.startswith(os.path.join(BACKEND_DIR, "tests")):
+            del sys.modules[name]
+
+
+@pytest.fixture(scope="session", params=["sync", "async"])
+def app_env(request, tmp_path_factory):
+    """(mode, main moduli) - vaqtinchalik SQLite bazada"""
+    workdir = tmp_path_factory.mktemp(f"quiz-{request.param}")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DB_BACKEND", request.param)
+        mp.setenv("DATABASE_URL", f"sqlite:///{workdir / 'quiz.db'}")
+        mp.setenv("BCRYPT_ROUNDS", "4")
+        mp.setenv("RATE_LIMIT_ENABLED", "false")
+        mp.setenv("EVENT_LOG_DIR", str(workdir / "game_logs"))
+        mp.setenv("ROUND_SCHEDULER_ENABLED", "false")
+        _purge_backend_modules()
+
+        import database
+        import main
+
+        database.Base.metadata.create_all(bind=database.engine)
+        yield request.param, main
+        _purge_backend_modules()
+
+
+@pytest.fixture(scope="session")
+def client(app_env):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app_env[1].app)
+
+
+@pytest.fixture(scope="session")
+def users(client):
+    """Host va boshqa foydalanuvchi uchun Authorization headerlari"""
+    headers = {}
+    for nickname in ("host", "other"):
+        r = client.post("/api/auth/register", json={
+            "email": f"{nickname}@test.quiz", "nickname": nickname, "name": nickname, "password": "secret",
+        })
+        assert r.status_code == 200, r.text
+        headers[nickname] = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    return headers
+
+
+@pytest.fixture
+def game_code(client, users):
+    r = client.post("/api/quiz/create", json=QUIZ, headers=users["host"])
+    assert r.status_code == 200, r.text
+    return r.json()["game_code"]
@@ -0,0 +1,34 @@
+"""Javob oynasi: faqat host ochgan savolga, server soati bo'yicha"""
+
+
+def _join(client, users, game_code, name="ann"):
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": name})
+    assert r.status_code == 200, r.text
+    return r.json()["player_token"]
+
+
+def test_answer_before_first_question_is_rejected(client, users, game_code):
+    token = _join(client, users, game_code)
+
+    for index in (0, 1):
+        r = client.post(f"/api/game/{game_code}/answer",
+                        json={"player_token": token, "question_index": index, "answer": index % 4})
+        assert r.status_code == 409, r.text
+        assert r.json()["detail"] == "No question is open yet"
+
+    board = client.get(f"/api/game/{game_code}/leaderboard").json()
+    assert board["total_players"] == 0
+
+
+def test_only_the_open_question_is_scored(client, users, game_code):
+    token = _join(client, users, game_code)
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+
+    # Hali ochilmagan savolga oldindan javob
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": token, "question_index": 1, "answer": 1})
+    assert r.status_code == 409
+
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": token, "question_index": 0, "answer": 0})
+    assert r.status_code == 200, r.text
+    assert r.json()["correct"] is True and r.json()["points"] > 0
@@ -0,0 +1,44 @@
+"""Token faqat id/role claimlarini olib yuradi - nickname har doim users jadvalidan"""
+
+from datetime import timedelta
+
+from test_stats import _player
+
+
+def _claims(headers):
+    from jose import jwt
+
+    return jwt.get_unverified_claims(headers["Authorization"].split()[1])
+
+
+def test_token_has_no_profile_claims(client):
+    headers, user_id = _player(client)
+    claims = _claims(headers)
+    assert claims["sub"] == str(user_id) and claims["role"] == "player"
+    assert "nickname" not in claims
+
+
+def test_nickname_update_is_served_with_the_old_token(client):
+    headers, _ = _player(client)
+    nickname = f"{client.get('/api/auth/me', headers=headers).json()['nickname']}x"
+
+    r = client.put("/api/auth/profile", headers=headers, json={"nickname": nickname})
+    assert r.status_code == 200 and r.json()["nickname"] == nickname
+    assert client.get("/api/auth/me", headers=headers).json()["nickname"] == nickname
+
+
+def test_legacy_nickname_claim_is_ignored(client):
+    from jose import jwt
+
+    import auth
+
+    headers, user_id = _player(client)
+    nickname = client.get("/api/auth/me", headers=headers).json()["nickname"]
+
+    # Oldingi versiya tokeni: nickname claim bor, lekin u ishlatilmaydi
+    token = auth.create_access_token(user_id, timedelta(minutes=5), role="player")
+    payload = _claims({"Authorization": f"Bearer {token}"}) | {"nickname": "stale"}
+    legacy = {"Authorization": f"Bearer {jwt.encode(payload, auth.SECRET_KEY, algorithm=auth.ALGORITHM)}"}
+
+    me = client.get("/api/auth/me", headers=legacy)
+    assert me.status_code == 200 and me.json()["nickname"] == nickname
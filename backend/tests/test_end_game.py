@@ -0,0 +1,43 @@
+"""O'yinni tugatish bitta tranzaksiyada - sync va async rejimda bir xil"""
+
+import pytest
+
+
+def _start(client, users, game_code):
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": "ann"})
+    assert r.status_code == 200, r.text
+
+
+def _stored(game_code):
+    import database
+    from models import GameSession, Quiz
+
+    db = database.SessionLocal()
+    try:
+        session = db.query(GameSession).filter(GameSession.game_code == game_code).one()
+        quiz = db.query(Quiz).filter(Quiz.game_code == game_code).one()
+        return session.is_active, quiz.is_active
+    finally:
+        db.close()
+
+
+def test_end_is_one_transaction(client, users, game_code, app_env, monkeypatch):
+    from scoring import score_buffer
+
+    _start(client, users, game_code)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("history insert failed")
+
+    # Tarix yozilmasa sessiya ham, quiz ham yopilmaydi
+    monkeypatch.setattr(score_buffer, "aadd_history" if app_env[0] == "async" else "add_history", broken)
+    with pytest.raises(RuntimeError):
+        client.patch(f"/api/game/end/{game_code}", headers=users["host"])
+    assert _stored(game_code) == (True, True)
+
+    monkeypatch.undo()
+    _start(client, users, game_code)
+    assert client.patch(f"/api/game/end/{game_code}", headers=users["host"]).status_code == 200
+    assert _stored(game_code) == (False, False)
+
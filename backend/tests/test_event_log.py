@@ -0,0 +1,124 @@
+"""O'yin hodisalari logi: kodlash/dekodlash, chala yozuv, replay"""
+
+import json
+
+import pytest
+
+from test_player_tokens import _join
+
+RECORDS = [
+    ("start", {"question_count": 2}),
+    ("join", {"player_name": "ann", "resumed": False}),
+    ("question", {"index": 0}),
+    ("answer", {"player_name": "ann", "question_index": 0, "points": 900}),
+]
+
+
+@pytest.fixture
+def log(app_env, tmp_path):
+    from event_log import EventLog
+
+    log = EventLog(str(tmp_path))
+    yield log
+    log.stop()
+
+
+def _encoded(records=RECORDS) -> bytes:
+    from event_log import encode_record
+
+    return b"".join(encode_record(event, data, ts=1000.0 + i) for i, (event, data) in enumerate(records))
+
+
+def _expected(records=RECORDS):
+    return [{"ts": 1000.0 + i, "event": event, **data} for i, (event, data) in enumerate(records)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 29, 1 << 16])
+def test_encode_decode_round_trip(app_env, chunk_size):
+    from event_log import decode_records
+
+    data = _encoded()
+    chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    assert list(decode_records(chunks)) == _expected()
+
+
+@pytest.mark.parametrize("cut", [1, 8, 16, 20])
+def test_truncated_tail_record_is_skipped(app_env, cut):
+    from event_log import decode_records
+
+    # Oxirgi yozuv yarmida uzilgan (masalan, yozish paytida crash)
+    data = _encoded()[:-cut]
+    assert list(decode_records(iter([data]))) == _expected()[:-1]
+
+
+def test_corrupt_record_stops_decoding(app_env):
+    from event_log import HEADER, decode_records, encode_record
+
+    first = encode_record("start", {"question_count": 2}, ts=1.0)
+    second = bytearray(encode_record("join", {"player_name": "ann"}, ts=2.0))
+    second[HEADER.size] ^= 0xFF
+    third = encode_record("end", {"results_saved": 1}, ts=3.0)
+    assert [r["event"] for r in decode_records(iter([first + bytes(second) + third]))] == ["start"]
+
+
+def test_append_flush_read(log):
+    for event, data in RECORDS:
+        log.append("ABC123", event, data)
+    log.append("../etc", "start", {})  # fayl nomi sifatida yaroqsiz - tashlab ketiladi
+    assert log.flush()
+
+    records = list(log.read("ABC123"))
+    assert [{k: v for k, v in r.items() if k != "ts"} for r in records] == [
+        {"event": event, **data} for event, data in RECORDS
+    ]
+    assert log.written == len(RECORDS) and log.dropped == 0
+    assert not log.exists("../etc") and list(log.read("../etc")) == []
+    assert list(log.read("NOPE42")) == []
+
+
+def test_replay_after_truncated_tail(log):
+    with open(log.path("ABC123"), "wb") as f:
+        f.write(_encoded())
+        f.write(_encoded([("answer", {"player_name": "bob", "question_index": 0, "points": 700})])[:-3])
+
+    lines = b"".join(log.replay_ndjson("ABC123", lines_per_chunk=3)).splitlines()
+    assert [json.loads(line) for line in lines] == _expected()
+
+    board = log.replay_leaderboard("ABC123")
+    assert board["answers"] == 1 and board["total_players"] == 1
+    assert board["top"] == [{"rank": 1, "player_name": "ann", "score": 900}]
+
+
+def test_replay_leaderboard_uses_the_last_run(log):
+    records = [
+        ("start", {}),
+        ("answer", {"player_name": "old", "question_index": 0, "points": 999}),
+        ("start", {}),
+        ("answer", {"player_name": "ann", "question_index": 0, "points": 300}),
+        ("answer", {"player_name": "bob", "question_index": 0, "points": 500}),
+        ("answer", {"player_name": "ann", "question_index": 1, "points": 400}),
+    ]
+    with open(log.path("ABC123"), "wb") as f:
+        f.write(_encoded(records))
+
+    board = log.replay_leaderboard("ABC123")
+    assert [(e["player_name"], e["score"]) for e in board["top"]] == [("ann", 700), ("bob", 500)]
+    board = log.replay_leaderboard("ABC123", until_question=0, limit=1)
+    assert board["answers"] == 2 and board["total_players"] == 2
+    assert board["top"] == [{"rank": 1, "player_name": "bob", "score": 500}]
+
+
+def test_replay_endpoints(client, users, game_code):
+    token = _join(client, users, game_code)
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": token, "question_index": 0, "answer": 0})
+    assert r.status_code == 200, r.text
+    points = r.json()["points"]
+
+    r = client.get(f"/api/game/{game_code}/events", headers=users["host"])
+    assert r.status_code == 200, r.text
+    events = [json.loads(line) for line in r.content.splitlines()]
+    assert [e["event"] for e in events] == ["start", "join", "question", "answer"]
+
+    r = client.get(f"/api/game/{game_code}/replay/leaderboard", headers=users["host"])
+    assert r.json()["top"] == [{"rank": 1, "player_name": "ann", "score": points}]
+    assert client.get(f"/api/game/{game_code}/events", headers=users["other"]).status_code == 403
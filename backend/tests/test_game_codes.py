@@ -0,0 +1,53 @@
+"""create_quiz: faqat game_code to'qnashuvida qayta urinadi, boshqa IntegrityError yuqoriga chiqadi"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from conftest import QUIZ
+
+
+@pytest.fixture
+def allocated(monkeypatch):
+    """game_code_allocator.allocate: avval navbatdagi kodlar, keyin asl allocator"""
+    from game_codes import game_code_allocator
+
+    queue, calls = [], []
+    allocate = game_code_allocator.allocate
+
+    def fake():
+        calls.append(queue.pop(0) if queue else allocate())
+        return calls[-1]
+
+    monkeypatch.setattr(game_code_allocator, "allocate", fake)
+    return queue, calls
+
+
+def test_code_collision_is_retried(client, users, game_code, allocated):
+    queue, calls = allocated
+    queue.append(game_code)
+
+    r = client.post("/api/quiz/create", json=QUIZ, headers=users["host"])
+    assert r.status_code == 200, r.text
+    assert len(calls) == 2 and r.json()["game_code"] == calls[1] != game_code
+
+
+def test_other_integrity_errors_are_raised(client, users, app_env, allocated, monkeypatch):
+    mode, main = app_env
+    queue, calls = allocated
+
+    def broken(*args, **kwargs):
+        raise IntegrityError("INSERT INTO questions", {}, Exception("NOT NULL constraint failed: questions.text"))
+
+    if mode == "async":
+        import routes.async_routes as routes
+
+        async def abroken(*args, **kwargs):
+            broken()
+
+        monkeypatch.setattr(routes, "asave_questions", abroken)
+    else:
+        monkeypatch.setattr(main, "save_questions", broken)
+
+    with pytest.raises(IntegrityError):
+        client.post("/api/quiz/create", json=QUIZ, headers=users["host"])
+    assert len(calls) == 1
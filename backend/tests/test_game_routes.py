@@ -0,0 +1,113 @@
+"""Har bir /api/game/* (method, path) qaysi game_service funksiyasiga yetib borishi"""
+
+import functools
+import inspect
+
+import pytest
+from fastapi.routing import APIRoute
+
+# (method, path) -> game_service funksiyasi (async rejimda "a" prefiksli varianti)
+GAME_ROUTES = {
+    ("POST", "/api/game/start/{game_code}"): "start_game",
+    ("POST", "/api/game/join"): "join_game",
+    ("POST", "/api/game/leave"): "leave_game",
+    ("GET", "/api/game/{game_code}/session"): "game_session",
+    ("POST", "/api/game/{game_code}/next"): "next_question",
+    ("POST", "/api/game/{game_code}/answer"): "submit_answer",
+    ("GET", "/api/game/{game_code}/leaderboard"): "leaderboard",
+    ("PATCH", "/api/game/end/{game_code}"): "end_game",
+    ("GET", "/api/game/{game_code}/events"): "replay_events",
+    ("GET", "/api/game/{game_code}/replay/leaderboard"): "replay_leaderboard",
+}
+
+
+def _service_name(mode: str, name: str) -> str:
+    return f"a{name}" if mode == "async" else name
+
+
+def _spy(fn, calls: list):
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            calls.append(fn.__name__)
+            return await fn(*args, **kwargs)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            calls.append(fn.__name__)
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture
+def service_calls(app_env, monkeypatch):
+    import game_service
+
+    mode = app_env[0]
+    calls = []
+    for name in GAME_ROUTES.values():
+        name = _service_name(mode, name)
+        monkeypatch.setattr(game_service, name, _spy(getattr(game_service, name), calls))
+    return calls
+
+
+def test_every_game_path_is_mapped(app_env):
+    mode, main = app_env
+    routes = {
+        (method, route.path): route
+        for route in main.app.routes if isinstance(route, APIRoute) and route.path.startswith("/api/game")
+        for method in route.methods
+    }
+    assert set(routes) == set(GAME_ROUTES)
+
+    # Sync rejimda game_routes, async rejimda async_routes xizmat qiladi
+    expected_module = "routes.async_routes" if mode == "async" else "routes.game_routes"
+    for key, route in routes.items():
+        assert route.endpoint.__module__ == expected_module, key
+
+
+def test_each_path_reaches_its_service(client, users, game_code, service_calls, app_env):
+    mode = app_env[0]
+    host = users["host"]
+    player = {"game_code": game_code, "player_name": "ann"}
+    # answer/leave join javobidagi token bilan
+    answer = {"question_index": 0, "answer": 0}
+    leave = {"game_code": game_code}
+
+    requests = [
+        ("POST", f"/api/game/start/{game_code}", {"headers": host}),
+        ("POST", "/api/game/join", {"json": player}),
+        ("GET", f"/api/game/{game_code}/session", {}),
+        ("POST", f"/api/game/{game_code}/next", {"headers": host}),
+        ("POST", f"/api/game/{game_code}/answer",
+         {"json": answer}),
+        ("GET", f"/api/game/{game_code}/leaderboard", {}),
+        ("POST", "/api/game/leave", {"json": leave}),
+        ("PATCH", f"/api/game/end/{game_code}", {"headers": host}),
+        ("GET", f"/api/game/{game_code}/events", {"headers": host}),
+        ("GET", f"/api/game/{game_code}/replay/leaderboard", {"headers": host}),
+    ]
+    assert {(method, path.replace(game_code, "{game_code}")) for method, path, _ in requests} == set(GAME_ROUTES)
+
+    for method, path, kwargs in requests:
+        del service_calls[:]
+        response = client.request(method, path, **kwargs)
+        if path == "/api/game/join":
+            answer["player_token"] = leave["player_token"] = response.json()["player_token"]
+        expected = _service_name(mode, GAME_ROUTES[(method, path.replace(game_code, "{game_code}"))])
+        assert service_calls == [expected], (method, path, response.status_code, response.text)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/api/game/start/{code}"),
+    ("POST", "/api/game/{code}/next"),
+    ("PATCH", "/api/game/end/{code}"),
+])
+def test_host_only_routes(client, users, game_code, method, path):
+    path = path.format(code=game_code)
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+
+    assert client.request(method, path).status_code == 401
+    r = client.request(method, path, headers=users["other"])
+    assert r.status_code == 403 and r.json()["detail"].startswith("Only the host")
+    assert client.request(method, path, headers=users["host"]).status_code == 200
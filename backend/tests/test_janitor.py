@@ -0,0 +1,91 @@
+"""Janitor: idle sessiya tugatiladi va keyinroq arxivga ko'chiriladi"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from test_end_game import _start, _stored
+
+
+@pytest.fixture
+def janitor(app_env, monkeypatch):
+    """Kichik batch'li janitor - keyset bo'laklari ham ishlaydi"""
+    import janitor
+
+    monkeypatch.setattr(janitor, "JANITOR_CHUNK_PAUSE", 0)
+    return janitor
+
+
+def _archived(game_code):
+    import database
+    from models import GameSession, GameSessionArchive
+
+    db = database.SessionLocal()
+    try:
+        live = db.query(GameSession).filter(GameSession.game_code == game_code).count()
+        rows = db.query(GameSessionArchive).filter(GameSessionArchive.game_code == game_code).all()
+        return live, [(row.status, row.players) for row in rows]
+    finally:
+        db.close()
+
+
+def _age(game_code, seconds):
+    """DB dagi updated_at ni orqaga surish (live store tegilmaydi)"""
+    import database
+    from models import GameSession
+
+    db = database.SessionLocal()
+    try:
+        db.query(GameSession).filter(GameSession.game_code == game_code).update(
+            {"updated_at": datetime.utcnow() - timedelta(seconds=seconds)})
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_idle_session_is_expired_and_archived(client, users, game_code, janitor):
+    from event_log import event_log
+
+    _start(client, users, game_code)
+    cleaner = janitor.Janitor(batch_size=2, max_chunks=1000)
+
+    # TTL hali o'tmagan
+    cleaner.run_once(datetime.utcnow() + timedelta(seconds=janitor.SESSION_IDLE_TTL - 60))
+    assert _stored(game_code) == (True, True)
+
+    result = cleaner.run_once(datetime.utcnow() + timedelta(seconds=janitor.SESSION_IDLE_TTL + 60))
+    assert result["expired"] >= 1 and result["archived"] == 0
+    assert _stored(game_code) == (False, False)
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": "bob"})
+    assert r.status_code == 400
+    assert client.get(f"/api/game/{game_code}/session").json()["is_active"] is False
+    event_log.flush()
+    assert list(event_log.read(game_code))[-1] | {"ts": 0} == {"ts": 0, "event": "end", "expired": True}
+
+    # Tugaganiga SESSION_ARCHIVE_AFTER o'tgach arxivga ko'chadi
+    result = cleaner.run_once(datetime.utcnow() + timedelta(seconds=janitor.SESSION_ARCHIVE_AFTER + 60))
+    assert result["archived"] >= 1
+    assert _archived(game_code) == (0, [("finished", ["ann"])])
+    assert cleaner.conflicts == 0
+
+
+def test_recent_live_activity_is_not_expired(client, users, game_code, janitor):
+    from session_store import session_registry
+
+    _start(client, users, game_code)
+    session_registry.flush([game_code])
+    # DB qatori eski, lekin live store'dagi faollik yangi
+    _age(game_code, janitor.SESSION_IDLE_TTL + 600)
+
+    cleaner = janitor.Janitor(batch_size=2, max_chunks=1000)
+    cleaner.run_once()
+    assert _stored(game_code) == (True, True)
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": "bob"})
+    assert r.status_code == 200, r.text
+
+    # Live store'dan tushgan sessiya DB dagi vaqt bo'yicha tugatiladi
+    session_registry.flush([game_code])
+    session_registry.discard(game_code)
+    _age(game_code, janitor.SESSION_IDLE_TTL + 600)
+    cleaner.run_once()
+    assert _stored(game_code) == (False, False)
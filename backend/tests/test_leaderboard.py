@@ -0,0 +1,56 @@
+"""Leaderboard (Fenwick daraxti): teng o'rinlar, o'sish, o'rin pasayishi va top(k)"""
+
+from leaderboard import Leaderboard
+
+
+def test_tied_scores_share_a_rank():
+    lb = Leaderboard(max_score=100)
+    lb.update("ann", 50)
+    lb.update("bob", 80)
+    lb.update("cid", 50)
+    lb.update("dan", 10)
+
+    assert [lb.rank(p) for p in ("bob", "ann", "cid", "dan")] == [1, 2, 2, 4]
+    # Teng ballda shu ballga birinchi yetgan oldinda
+    assert lb.top() == [(1, "bob", 80), (2, "ann", 50), (2, "cid", 50), (4, "dan", 10)]
+    assert lb.top(2) == [(1, "bob", 80), (2, "ann", 50)]
+    assert lb.rank("eve") is None
+
+
+def test_score_above_max_score_grows_the_tree():
+    lb = Leaderboard(max_score=3)
+    lb.update("ann", 2)
+    lb.update("bob", 3)
+    lb.update("cid", 1000)
+    lb.update("dan", 17)
+
+    assert lb.top() == [(1, "cid", 1000), (2, "dan", 17), (3, "bob", 3), (4, "ann", 2)]
+    assert [lb.rank(p) for p in ("cid", "dan", "bob", "ann")] == [1, 2, 3, 4]
+    assert lb.score("cid") == 1000 and len(lb) == 4
+
+
+def test_lowered_score_drops_the_rank():
+    lb = Leaderboard(max_score=100)
+    lb.update("ann", 90)
+    lb.update("bob", 60)
+    lb.update("cid", 30)
+    assert lb.rank("ann") == 1
+
+    lb.update("ann", 20)
+    assert [lb.rank(p) for p in ("bob", "cid", "ann")] == [1, 2, 3]
+    assert lb.top() == [(1, "bob", 60), (2, "cid", 30), (3, "ann", 20)]
+
+    # Eski bal bo'shadi: boshqa o'yinchi u yerga bir o'zi tushadi
+    lb.update("cid", 90)
+    assert lb.top(1) == [(1, "cid", 90)]
+    assert lb.rank("bob") == 2 and lb.rank("ann") == 3
+
+
+def test_top_k_larger_than_players():
+    lb = Leaderboard()
+    assert lb.top(5) == []
+
+    lb.update("ann", 7)
+    lb.update("bob", 7)
+    assert lb.top(10) == [(1, "ann", 7), (1, "bob", 7)]
+    assert lb.top(0) == []
@@ -0,0 +1,82 @@
+"""Keyset sahifalash: sahifalar orasida takror va bo'shliq yo'q, buzilgan cursor - 400"""
+
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import QUIZ
+from test_stats import _player
+
+
+def _walk(client, url, headers, limit):
+    """Barcha sahifalarni next_cursor bo'yicha o'qish"""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        r = client.get(url, headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page["items"]) <= limit
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_history_pages_have_no_duplicates_or_gaps(client):
+    import database
+    from models import QuizHistory
+
+    headers, user_id = _player(client)
+    # Bir xil played_at'li qatorlar: tartib id bo'yicha davom etadi
+    played = datetime(2026, 1, 1, 12, 0, 0)
+    times = [played, played, played, played - timedelta(seconds=1), played + timedelta(seconds=1), played]
+    db = database.SessionLocal()
+    try:
+        db.add_all([
+            QuizHistory(user_id=user_id, quiz_id=1, quiz_title=f"q{i}", score=i, total_questions=3,
+                        rank=1, participants_count=1, played_at=at)
+            for i, at in enumerate(times)
+        ])
+        db.commit()
+        expected = [
+            row.id for row in db.query(QuizHistory).filter(QuizHistory.user_id == user_id)
+            .order_by(QuizHistory.played_at.desc(), QuizHistory.id.desc())
+        ]
+    finally:
+        db.close()
+
+    for limit in (1, 2, 4, 6, 10):
+        pages = _walk(client, "/api/history/me/page", headers, limit)
+        assert [item["id"] for page in pages for item in page] == expected
+        assert all(pages[:-1])
+
+
+def test_quiz_pages_have_no_duplicates_or_gaps(client):
+    headers, _ = _player(client)
+    created = []
+    for _ in range(5):
+        r = client.post("/api/quiz/create", json=QUIZ, headers=headers)
+        assert r.status_code == 200, r.text
+        created.append(r.json()["game_code"])
+
+    pages = _walk(client, "/api/quiz/user/created/page", headers, 2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    codes = [item["game_code"] for page in pages for item in page]
+    assert sorted(codes) == sorted(created)
+    # Yangisidan eskisiga
+    assert codes == created[::-1]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"yesterday|1").decode(),
+    base64.urlsafe_b64encode(b"2026-01-01T00:00:00|x").decode(),
+    base64.urlsafe_b64encode(b"2026-01-01T00:00:00").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+])
+def test_bad_cursor_is_400(client, users, cursor):
+    for url in ("/api/history/me/page", "/api/quiz/user/created/page"):
+        r = client.get(url, headers=users["host"], params={"cursor": cursor})
+        assert r.status_code == 400 and r.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,69 @@
+"""answer/leave o'yinchi tokeni bilan; bare player_name faqat PLAYER_TOKEN_OPTIONAL bilan"""
+
+
+def _join(client, users, game_code, name="ann"):
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": name})
+    assert r.status_code == 200, r.text
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+    return r.json()["player_token"]
+
+
+def test_bare_name_is_rejected(client, users, game_code):
+    _join(client, users, game_code)
+
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_name": "ann", "question_index": 0, "answer": 0})
+    assert r.status_code == 401 and r.json()["detail"] == "Player token required"
+    r = client.post("/api/game/leave", json={"game_code": game_code, "player_name": "ann"})
+    assert r.status_code == 401
+
+    players = client.get(f"/api/game/{game_code}/session").json()["players"]
+    assert players == ["ann"]
+
+
+def test_token_answers_and_leaves(client, users, game_code):
+    token = _join(client, users, game_code)
+
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": token, "question_index": 0, "answer": 0})
+    assert r.status_code == 200, r.text
+    r = client.post("/api/game/leave", json={"game_code": game_code, "player_token": token + "x"})
+    assert r.status_code == 401 and r.json()["detail"] == "Invalid player token"
+    r = client.post("/api/game/leave", json={"game_code": game_code, "player_token": token})
+    assert r.status_code == 200, r.text
+
+
+def test_bare_name_opt_out(client, users, game_code, monkeypatch):
+    import game_service
+
+    monkeypatch.setattr(game_service, "PLAYER_TOKEN_OPTIONAL", True)
+    _join(client, users, game_code)
+
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_name": "ann", "question_index": 0, "answer": 0})
+    assert r.status_code == 200, r.text
+    r = client.post("/api/game/leave", json={"game_code": game_code, "player_name": "ann"})
+    assert r.status_code == 200, r.text
+
+
+
+def test_restart_starts_an_empty_lobby(client, users, game_code):
+    old_token = _join(client, users, game_code, "Ali")
+    assert client.patch(f"/api/game/end/{game_code}", headers=users["host"]).status_code == 200
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+
+    assert client.get(f"/api/game/{game_code}/session").json()["players"] == []
+
+    # Oldingi o'yin tokeni bilan qayta ulanib bo'lmaydi
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_token": old_token})
+    assert r.status_code == 401 and "earlier run" in r.json()["detail"]
+
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": "Ali"})
+    assert r.status_code == 200, r.text
+    assert r.json()["players"] == ["Ali"] and r.json()["resumed"] is False
+    token = r.json()["player_token"]
+
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": old_token, "question_index": 0, "answer": 0})
+    assert r.status_code == 403
+    assert client.post("/api/game/leave", json={"game_code": game_code, "player_token": old_token}).status_code == 404
+    r = client.post(f"/api/game/{game_code}/answer", json={"player_token": token, "question_index": 0, "answer": 0})
+    assert r.status_code == 200, r.text
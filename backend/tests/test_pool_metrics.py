@@ -0,0 +1,34 @@
+"""Har bir pool o'z metrikalarini yuritadi"""
+
+from sqlalchemy import create_engine, text
+
+from pool_metrics import InstrumentedQueuePool, instrument_pool
+
+
+def _engine(tmp_path, name):
+    engine = create_engine(f"sqlite:///{tmp_path / name}", poolclass=InstrumentedQueuePool)
+    return engine, instrument_pool(engine)
+
+
+def test_metrics_are_per_pool(tmp_path):
+    first, first_metrics = _engine(tmp_path, "a.db")
+    second, second_metrics = _engine(tmp_path, "b.db")
+    assert first_metrics is not second_metrics
+
+    for _ in range(3):
+        with first.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert first_metrics.checkouts == 3 and first_metrics.checkout_latency.snapshot()["count"] == 3
+    assert second_metrics.checkouts == 0 and second_metrics.checkout_latency.snapshot()["count"] == 0
+
+
+def test_dispose_keeps_metrics(tmp_path):
+    engine, metrics = _engine(tmp_path, "a.db")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert engine.pool.metrics is metrics
+    assert metrics.checkouts == 2 and metrics.connects == 2
@@ -0,0 +1,107 @@
+"""NDJSON import: qatorma-qator xato hisoboti, uzun qatorlar; export -> import aylanma yo'li"""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import QUIZ
+from test_stats import _player
+
+
+def _ndjson(*lines) -> bytes:
+    return b"\n".join(line if isinstance(line, bytes) else json.dumps(line).encode() for line in lines)
+
+
+def _import(client, headers, body: bytes, **params):
+    r = client.post("/api/quiz/import", headers=headers, content=body, params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _export(client, headers):
+    r = client.get("/api/quiz/export", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in r.content.splitlines()]
+
+
+def test_import_reports_errors_per_line(client):
+    headers, _ = _player(client)
+    body = _ndjson(
+        QUIZ,                                  # 1
+        b"{not json",                          # 2
+        b"",                                   # 3 - bo'sh qator o'tkazib yuboriladi
+        {"title": "no questions"},             # 4
+        QUIZ | {"title": "second"},            # 5
+        {"title": 1, "questions": []},         # 6
+        QUIZ | {"title": "last"},              # 7 - oxirida \n yo'q
+    )
+    report = _import(client, headers, body, batch_size=2)
+    assert report["imported"] == 3 and report["failed"] == 3
+    assert [error["line"] for error in report["errors"]] == [2, 4, 6]
+    assert "questions" in report["errors"][1]["error"]
+    assert report["errors_truncated"] is False
+    assert [quiz["title"] for quiz in _export(client, headers)] == ["Test quiz", "second", "last"]
+
+
+def test_errors_are_truncated(client, monkeypatch):
+    import quiz_io
+
+    monkeypatch.setattr(quiz_io, "QUIZ_IMPORT_MAX_ERRORS", 2)
+    headers, _ = _player(client)
+    report = _import(client, headers, _ndjson(b"[]", b"{}", b"1", QUIZ))
+    assert report["imported"] == 1 and report["failed"] == 3
+    assert len(report["errors"]) == 2 and report["errors_truncated"] is True
+
+
+def test_line_over_max_is_rejected(client, monkeypatch):
+    import quiz_io
+
+    monkeypatch.setattr(quiz_io, "QUIZ_IMPORT_MAX_LINE", 400)
+    headers, _ = _player(client)
+    long_quiz = QUIZ | {"title": "x" * 500}
+    report = _import(client, headers, _ndjson(QUIZ, long_quiz, QUIZ | {"title": "after"}, long_quiz))
+    assert report["imported"] == 2
+    assert report["errors"] == [
+        {"line": 2, "error": "Line exceeds 400 bytes"},
+        {"line": 4, "error": "Line exceeds 400 bytes"},
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_iter_ndjson_chunking(app_env, monkeypatch, chunk_size):
+    import quiz_io
+
+    monkeypatch.setattr(quiz_io, "QUIZ_IMPORT_MAX_LINE", 16)
+    body = b"short\n\n" + b"y" * 40 + b"\nexactly-16-bytes\n" + b"z" * 17 + b"\ntail"
+
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    async def collect():
+        return [item async for item in quiz_io.iter_ndjson(chunks())]
+
+    assert asyncio.run(collect()) == [
+        (1, b"short"), (3, b""), (4, b"exactly-16-bytes"), (5, b""), (6, b"tail"),
+    ]
+
+
+def test_export_round_trip(client):
+    headers, _ = _player(client)
+    quizzes = [QUIZ | {"title": f"quiz {i}"} for i in range(5)]
+    assert _import(client, headers, _ndjson(*quizzes), batch_size=2)["imported"] == 5
+
+    exported = _export(client, headers)
+    assert [quiz["title"] for quiz in exported] == [quiz["title"] for quiz in quizzes]
+    assert all(quiz["questions"] == QUIZ["questions"] for quiz in exported)
+    assert len({quiz["game_code"] for quiz in exported}) == 5
+
+    # Eksport qayta import qilinadi: game_code yangidan ajratiladi
+    again, _ = _player(client)
+    body = b"".join(json.dumps(quiz).encode() + b"\n" for quiz in exported)
+    assert _import(client, again, body) == {"imported": 5, "failed": 0, "errors": [], "errors_truncated": False}
+    copied = _export(client, again)
+    assert [(q["title"], q["questions"]) for q in copied] == [(q["title"], q["questions"]) for q in exported]
+    assert not {q["game_code"] for q in copied} & {q["game_code"] for q in exported}
@@ -0,0 +1,19 @@
+"""To'liq quiz (correctAnswer bilan) faqat egasiga; o'yinchilar /player dan oladi"""
+
+
+def test_full_quiz_is_for_the_creator(client, users, game_code):
+    path = f"/api/quiz/{game_code}"
+    assert client.get(path).status_code == 401
+    r = client.get(path, headers=users["other"])
+    assert r.status_code == 403 and r.json()["detail"] == "Only the quiz creator can see the answers"
+
+    r = client.get(path, headers=users["host"])
+    assert r.status_code == 200
+    assert [q["correctAnswer"] for q in r.json()["questions"]] == [0, 1, 2]
+
+
+def test_player_quiz_has_no_answers(client, game_code):
+    r = client.get(f"/api/quiz/{game_code}/player")
+    assert r.status_code == 200
+    assert all("correctAnswer" not in q for q in r.json()["questions"])
+    assert client.get("/api/quiz/NOPE00/player").status_code == 404
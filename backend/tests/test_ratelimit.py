@@ -0,0 +1,90 @@
+"""Token-bucket rate limit: 429 + Retry-After, bucketlarni chiqarib yuborish"""
+
+import pytest
+
+
+@pytest.fixture
+def ratelimit(app_env, monkeypatch):
+    """Yoqilgan limiter moduli"""
+    import ratelimit
+
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    return ratelimit
+
+
+@pytest.fixture
+def clock(ratelimit, monkeypatch):
+    """Qo'lda suriladigan time.monotonic"""
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _login(client, email="nobody@test.quiz"):
+    return client.post("/api/auth/login", json={"email": email, "password": "wrong"})
+
+
+def test_login_over_limit_is_429(client, ratelimit, clock, monkeypatch):
+    rule = ratelimit.RateRule("auth_login", "ip", 2, 60)
+    monkeypatch.setitem(ratelimit.rate_limiter.rules, "auth_login", {"ip": rule})
+
+    assert [_login(client).status_code for _ in range(2)] == [401, 401]
+    r = _login(client)
+    assert r.status_code == 429 and r.json()["detail"] == "Too many requests"
+    # 2 ta so'rov / 60 s: bitta token 30 s da qaytadi
+    assert r.headers["Retry-After"] == "30"
+
+    clock[0] += 10
+    # Suzuvchi nuqta: ceil 20 yoki 21 berishi mumkin
+    assert 20 <= int(_login(client).headers["Retry-After"]) <= 21
+    clock[0] += 20
+    assert _login(client).status_code == 401
+    assert (rule.allowed, rule.rejected) == (3, 2)
+
+
+def test_rejection_takes_no_tokens(ratelimit, clock):
+    limiter = ratelimit.RateLimiter({("auth_login", "ip"): "5/60", ("auth_login", "user"): "1/60"})
+
+    assert limiter.retry_after("auth_login", ip="1.2.3.4", user="a@b.c") == 0
+    assert limiter.retry_after("auth_login", ip="1.2.3.4", user="a@b.c") == 60
+    # user bucketi rad etdi - ip bucketidan token olinmadi
+    assert limiter.rules["auth_login"]["ip"].buckets["1.2.3.4"].tokens == 4
+    assert limiter.retry_after("auth_login", ip="1.2.3.4", user="d@e.f") == 0
+
+
+def test_rule_off_or_disabled(ratelimit, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_AUTH_LOGIN_IP", "off")
+    limiter = ratelimit.RateLimiter({("auth_login", "ip"): "1/60"})
+    assert limiter.rules == {}
+    assert all(limiter.retry_after("auth_login", ip="1.2.3.4") == 0 for _ in range(3))
+
+    monkeypatch.delenv("RATE_LIMIT_AUTH_LOGIN_IP")
+    limiter = ratelimit.RateLimiter({("auth_login", "ip"): "1/60"})
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", False)
+    assert all(limiter.retry_after("auth_login", ip="1.2.3.4") == 0 for _ in range(3))
+
+
+def test_idle_buckets_are_evicted(ratelimit):
+    rule = ratelimit.RateRule("game_join", "ip", 10, 10)
+    rule.refill("a", 0.0)
+    rule.refill("b", 5.0)
+    # "a" to'liq to'lgan (idle) - yangi bucketdan farqi yo'q, o'chiriladi
+    rule.refill("c", 10.0)
+    assert list(rule.buckets) == ["b", "c"]
+    rule.refill("d", 20.0)
+    assert list(rule.buckets) == ["d"]
+
+
+def test_least_recent_bucket_is_evicted_over_max_keys(ratelimit):
+    rule = ratelimit.RateRule("game_join", "ip", 10, 10, max_keys=2)
+    rule.refill("a", 0.0).tokens -= 3
+    rule.refill("b", 1.0)
+    rule.refill("a", 2.0)  # "a" oxiriga o'tadi
+    rule.refill("c", 3.0)
+    rule.refill("d", 4.0)
+    # max_keys dan oshganda eng uzoq ishlatilmagan chiqadi
+    assert list(rule.buckets) == ["c", "d"]
+    assert len(rule.buckets) <= 2
+
+    # Chiqarilgan kalit yangi (to'liq) bucket oladi
+    assert rule.refill("a", 4.0).tokens == 10
@@ -0,0 +1,18 @@
+"""SQL hook'lari: xato bilan tugagan so'rov ham query_started stekini bo'shatadi"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+def test_failed_statement_pops_its_start(app_env):
+    import database
+
+    with database.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["query_started"] == []
+
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.info["query_started"] == []
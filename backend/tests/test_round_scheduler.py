@@ -0,0 +1,140 @@
+"""Savol taymeri: muddatda savol yopiladi va keyingisiga o'tiladi; eskirgan taymer no-op"""
+
+import asyncio
+import time
+
+import pytest
+
+
+def _start(client, users, game_code):
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+
+
+def test_advance_expected(client, users, game_code, app_env):
+    import database
+    from session_store import session_registry
+
+    _start(client, users, game_code)
+
+    if app_env[0] == "async":
+        async def advance(expected):
+            async with database.AsyncSessionLocal() as db:
+                return await session_registry.aadvance(db, game_code, 3, expected=expected)
+    else:
+        def advance_sync(expected):
+            db = database.SessionLocal()
+            try:
+                return session_registry.advance(db, game_code, 3, expected=expected)
+            finally:
+                db.close()
+
+        async def advance(expected):
+            return advance_sync(expected)
+
+    # Joriy savol -1: expected=0 - eskirgan taymer, no-op
+    assert asyncio.run(advance(0)) is None
+    assert asyncio.run(advance(-1))["current_question"] == 0
+    assert asyncio.run(advance(-1)) is None
+    assert asyncio.run(advance(0))["current_question"] == 1
+
+
+@pytest.fixture
+def scheduled(app_env, monkeypatch):
+    """game_service.round_scheduler.schedule chaqiruvlari (testlarda scheduler o'chiq)"""
+    import game_service
+
+    calls = []
+    monkeypatch.setattr(game_service.round_scheduler, "schedule",
+                        lambda game_code, delay, kind, index, questions: calls.append((kind, index, questions)))
+    return calls
+
+
+def _closed(game_code):
+    from event_log import event_log
+
+    event_log.flush()
+    return [record["index"] for record in event_log.read(game_code) if record["event"] == "closed"]
+
+
+def test_deadline_closes_and_auto_advances(client, users, game_code, scheduled, monkeypatch):
+    import game_service
+    from round_scheduler import ADVANCE, CLOSE
+
+    _start(client, users, game_code)
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+    assert scheduled == [(CLOSE, 0, 3)]
+
+    def current():
+        return client.get(f"/api/game/{game_code}/session").json()["current_question"]
+
+    def fire(kind, index):
+        game_service._on_deadlines([(0.0, 0, game_code, kind, index, 3)])
+
+    # Handler quiz'ni keshdan o'qimaydi - savollar soni taymer yozuvida
+    def no_cache(*args, **kwargs):
+        raise AssertionError("deadline handler read the quiz cache")
+
+    with monkeypatch.context() as m:
+        m.setattr(game_service.quiz_cache, "get", no_cache)
+
+        fire(CLOSE, 0)
+        assert _closed(game_code) == [0]
+        assert scheduled[-1] == (ADVANCE, 0, 3)
+
+        fire(ADVANCE, 0)
+        assert current() == 1 and scheduled[-1] == (CLOSE, 1, 3)
+
+        # Eskirgan taymerlar: savol 0 allaqachon o'tgan
+        calls = len(scheduled)
+        fire(ADVANCE, 0)
+        fire(CLOSE, 0)
+        assert current() == 1 and _closed(game_code) == [0] and len(scheduled) == calls
+
+    # Host o'zi /next bosdi - savol 1 ning taymerlari no-op
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+    fire(CLOSE, 1)
+    fire(ADVANCE, 1)
+    assert current() == 2 and _closed(game_code) == [0]
+
+    # Oxirgi savol yopiladi, lekin keyingisiga o'tilmaydi
+    fire(CLOSE, 2)
+    assert _closed(game_code) == [0, 2]
+    assert scheduled[-1] == (CLOSE, 2, 3)
+
+
+def test_ended_game_is_not_closed(client, users, game_code, scheduled):
+    import game_service
+    from round_scheduler import CLOSE
+
+    _start(client, users, game_code)
+    assert client.post(f"/api/game/{game_code}/next", headers=users["host"]).status_code == 200
+    assert client.patch(f"/api/game/end/{game_code}", headers=users["host"]).status_code == 200
+
+    game_service._on_deadlines([(0.0, 0, game_code, CLOSE, 0, 3)])
+    assert _closed(game_code) == [] and scheduled == [(CLOSE, 0, 3)]
+
+
+def test_scheduler_fires_only_the_latest_timer(app_env, monkeypatch):
+    import round_scheduler
+    from round_scheduler import ADVANCE, CLOSE, RoundScheduler
+
+    monkeypatch.setattr(round_scheduler, "ROUND_SCHEDULER_ENABLED", True)
+    scheduler = RoundScheduler()
+    fired = []
+    scheduler.set_handler(lambda due: fired.extend((game_code, kind, index, time.monotonic() - deadline)
+                                                   for deadline, _, game_code, kind, index, _ in due))
+
+    async def run():
+        scheduler.start()
+        scheduler.schedule("AAA111", 0.05, CLOSE, 0, 3)
+        scheduler.schedule("BBB222", 0.02, CLOSE, 0, 3)
+        scheduler.schedule("AAA111", 0.03, ADVANCE, 0, 3)  # avvalgisini almashtiradi
+        scheduler.cancel("BBB222")
+        scheduler.schedule("CCC333", 0.01, CLOSE, 4, 5)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert [entry[:3] for entry in fired] == [("CCC333", CLOSE, 4), ("AAA111", ADVANCE, 0)]
+    assert all(0 <= entry[3] < 0.1 for entry in fired)
+    assert scheduler.fired == 2 and scheduler.stale == 2 and len(scheduler) == 0
@@ -0,0 +1,39 @@
+"""Fon flush eskirgan snapshot bilan tugatilgan sessiyani qayta faollashtirmaydi"""
+
+from test_end_game import _start, _stored
+
+
+def test_stale_flush_does_not_revive_an_ended_game(client, users, game_code):
+    from session_store import session_registry
+
+    _start(client, users, game_code)
+    # Flusher dirty qatorlarni oldi, lekin yozishga ulgurmadi...
+    rows = session_registry.store.take_dirty([game_code])
+    assert rows and rows[0][1]["is_active"] is True
+
+    # ...shu orada host o'yinni tugatdi
+    assert client.patch(f"/api/game/end/{game_code}", headers=users["host"]).status_code == 200
+    session_registry._write(rows)
+    assert _stored(game_code) == (False, False)
+
+    # Keshdan tushgan sessiya DB dan yopiq holda yuklanadi
+    session_registry.discard(game_code)
+    assert client.get(f"/api/game/{game_code}/session").json()["is_active"] is False
+    r = client.post("/api/game/join", json={"game_code": game_code, "player_name": "bob"})
+    assert r.status_code == 400
+
+
+def test_flush_writes_players(client, users, game_code):
+    import database
+    from models import GameSession
+    from session_store import session_registry
+
+    _start(client, users, game_code)
+    assert session_registry.flush([game_code]) == 1
+
+    db = database.SessionLocal()
+    try:
+        row = db.query(GameSession).filter(GameSession.game_code == game_code).one()
+        assert row.players == ["ann"] and row.is_active
+    finally:
+        db.close()
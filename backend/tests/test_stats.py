@@ -0,0 +1,107 @@
+"""user_stats: tarix bilan yig'iladi (upsert va o'qib-yangilash yo'li), backfill qayta yozadi"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture(params=["upsert", "portable"])
+def stats_path(request, app_env, monkeypatch):
+    import stats
+
+    if request.param == "portable":
+        # Upsert'i yo'q dialekt: qatorlar o'qilib, Python'da birlashtiriladi
+        monkeypatch.setattr(stats, "UPSERT_DIALECTS", {})
+    return request.param
+
+
+def _player(client):
+    nickname = f"p{uuid.uuid4().hex[:10]}"
+    r = client.post("/api/auth/register", json={
+        "email": f"{nickname}@test.quiz", "nickname": nickname, "name": nickname, "password": "secret",
+    })
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}, r.json()["user"]["id"]
+
+
+def _played(client, headers, score, rank, correct=None, total=10):
+    r = client.post("/api/history/add", headers=headers, json={
+        "quiz_id": 1, "quiz_title": "Test quiz", "score": score, "total_questions": total,
+        "rank": rank, "participants_count": 5, "correct_answers": correct,
+    })
+    assert r.status_code == 200, r.text
+
+
+def _my_stats(client, headers):
+    r = client.get("/api/stats/me", headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_no_games_yet(client, stats_path):
+    headers, user_id = _player(client)
+    stats = _my_stats(client, headers)
+    assert stats["user_id"] == user_id and stats["games_played"] == 0
+    assert stats["best_score"] is None and stats["accuracy"] is None
+
+
+def test_counters_are_summed(client, stats_path):
+    headers, _ = _player(client)
+    _played(client, headers, score=800, rank=3, correct=8)
+    _played(client, headers, score=300, rank=1, correct=2)
+    # Baholanmagan o'yin aniqlikka kirmaydi
+    _played(client, headers, score=100, rank=4)
+
+    stats = _my_stats(client, headers)
+    assert stats["games_played"] == 3
+    assert stats["total_score"] == 1200
+    assert stats["average_score"] == 400.0
+    assert stats["accuracy"] == 0.5
+    assert stats["best_rank"] == 1
+    assert stats["last_played_at"] is not None
+
+
+def test_best_score_across_two_games(client, stats_path):
+    headers, _ = _player(client)
+    _played(client, headers, score=900, rank=2)
+    assert _my_stats(client, headers)["best_score"] == 900
+
+    # Pastroq natija eng yaxshisini tushirmaydi, yuqorirog'i almashtiradi
+    _played(client, headers, score=400, rank=1)
+    assert _my_stats(client, headers)["best_score"] == 900
+    _played(client, headers, score=950, rank=5)
+    stats = _my_stats(client, headers)
+    assert stats["best_score"] == 950 and stats["best_rank"] == 1
+
+
+def test_replace_rewrites_the_row(client, stats_path):
+    import backfill_stats
+    import database
+    from stats import write_stats
+
+    headers, user_id = _player(client)
+    _played(client, headers, score=500, rank=2, correct=5)
+    _played(client, headers, score=700, rank=1, correct=9)
+    before = _my_stats(client, headers)
+
+    db = database.SessionLocal()
+    try:
+        write_stats(db, [{
+            "user_id": user_id, "games_played": 1, "total_score": 10, "best_score": 10, "best_rank": 9,
+            "total_questions": 10, "graded_questions": 0, "correct_answers": 0,
+            "last_played_at": None, "updated_at": datetime.utcnow(),
+        }], replace=True)
+        db.commit()
+    finally:
+        db.close()
+    stats = _my_stats(client, headers)
+    assert (stats["games_played"], stats["total_score"], stats["best_rank"]) == (1, 10, 9)
+    assert stats["accuracy"] is None
+
+    # Backfill tarixdan qayta quradi (batch chegarasida foydalanuvchi bo'linadi)
+    backfill_stats.backfill(batch_size=1)
+    after = _my_stats(client, headers)
+    # last_played_at: jonli yozuvda upsert vaqti, backfill'da played_at
+    after.pop("last_played_at"), before.pop("last_played_at")
+    assert after == before
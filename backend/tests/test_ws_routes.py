@@ -0,0 +1,49 @@
+"""WebSocket: avval obuna, keyin snapshot - orada chiqqan event yo'qolmaydi"""
+
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+def test_event_during_snapshot_is_delivered(client, users, game_code, monkeypatch):
+    import routes.ws_routes as ws_routes
+    from realtime import game_hub
+
+    assert client.post(f"/api/game/start/{game_code}", headers=users["host"]).status_code == 200
+
+    # Lifespan'siz TestClient: hub WebSocket handleri ishlayotgan loop'ga bog'lanadi
+    connect = game_hub.connect
+
+    async def connect_here(*args, **kwargs):
+        game_hub.bind_loop(asyncio.get_running_loop())
+        return await connect(*args, **kwargs)
+
+    monkeypatch.setattr(game_hub, "_loop", None)
+    monkeypatch.setattr(game_hub, "connect", connect_here)
+
+    # Snapshot o'qilgandan keyin, lekin birinchi xabar yuborilishidan oldin kimdir qo'shiladi
+    load = ws_routes._load_session
+
+    def racing(code):
+        session = load(code)
+        game_hub.publish(code, "player_joined", {"player_name": "late", "resumed": False})
+        return session
+
+    monkeypatch.setattr(ws_routes, "_load_session", racing)
+
+    with client.websocket_connect(f"/ws/game/{game_code}") as ws:
+        first = ws.receive_json()
+        assert first["event"] == "session" and first["data"]["players"] == []
+        # Event yo'qolgan bo'lsa receive osilib qolmasin - keyingi event marker
+        game_hub.publish(game_code, "player_joined", {"player_name": "marker", "resumed": False})
+        second = ws.receive_json()
+        assert second["event"] == "player_joined" and second["data"]["player_name"] == "late"
+        assert ws.receive_json()["data"]["player_name"] == "marker"
+
+
+def test_unknown_game_is_closed(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws/game/NOPE00") as ws:
+            ws.receive_json()
+    assert exc.value.code == 4404